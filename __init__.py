@@ -49,6 +49,7 @@ from .functions.timers import *
 from .operators import *
 from .operators.customization_tools import *
 from .lib import keymaps, preferences, classes_to_register
+from .lib.caches import update_cache_memory_budget
 from .lib.property_groups import *
 from .lib.mat_properties import mat_properties
 from . import addon_updater_ops
@@ -74,6 +75,7 @@ def register():
     bpy.props.manual_cmlist_update = False
     bpy.props.bfm_cache_bytes_hex = None
     bpy.props.abs_mat_properties = mat_properties  # duplicate from ABS Plastic Mats, necessary for exporting to ldraw from non-abs mats
+    update_cache_memory_budget()
 
     Object.protected = BoolProperty(
         name="protected",
@@ -180,6 +182,8 @@ def unregister():
             bpy.app.timers.unregister(handle_selections)
         if bpy.app.timers.is_registered(handle_undo_stack):
             bpy.app.timers.unregister(handle_undo_stack)
+        if bpy.app.timers.is_registered(handle_cache_memory_budget):
+            bpy.app.timers.unregister(handle_cache_memory_budget)
         if not bpy.app.background:
             bpy.app.handlers.load_post.remove(register_bricker_timers)
     elif not bpy.app.background:
@@ -30,7 +30,7 @@ from .bricksdict import *
 from .clear_cache import *
 from .brickify_utils import finish_animation
 from .matlist_utils import create_mat_objs
-from ..lib.caches import bricker_bfm_cache
+from ..lib.caches import bricker_bfm_cache, bricker_deep_cache_costs, bricker_deep_cache_sizes
 from ..lib.undo_stack import UndoStack, python_undo_state
 
 
@@ -114,6 +114,9 @@ def find_3dview_space():
 @persistent
 def clear_bfm_cache(dummy):
     clear_caches(deep_matrix=False, dupes=False)
+    # deep caches of the file being loaded are recorded as they're read (see 'get_bricksdict')
+    bricker_deep_cache_sizes.clear()
+    bricker_deep_cache_costs.clear()
 
 
 @persistent
@@ -164,6 +167,7 @@ def handle_loading_to_light_cache(dummy):
 @persistent
 def handle_storing_to_deep_cache(dummy):
     light_to_deep_cache(bricker_bfm_cache)
+    enforce_cache_memory_budget()
 
 
 @persistent
@@ -17,6 +17,7 @@
 
 # System imports
 import bpy
+import numpy as np
 
 # Blender imports
 from mathutils import Vector, Euler, Matrix
@@ -215,45 +216,57 @@ def get_args_for_background_processor(cm, bricker_addon_path, source_dup=None):
     return script, cmlist_props, cmlist_pointer_props, data_blocks_to_send
 
 
+def redraws_patched_bricks(cm):
+    """ returns True if only the bricks patched for edits to the source are redrawn, keeping the other bricks of the split model """
+    return cm.source_is_dirty and cm.split_model and cm.last_split_model and cm.instance_method != "POINT_CLOUD" and not cm.brickifying_in_background
+
+
 def get_bricksdict_for_model(cm, source, source_details, action, cur_frame, brick_scale, bricksdict, keys, redraw, update_cursor):
+    # keys of bricks patched for edits to the source
+    updated_keys = None
     if bricksdict is None:
         # load bricksdict from cache
         bricksdict = get_bricksdict(cm, d_type=action, cur_frame=cur_frame)
         loaded_from_cache = bricksdict is not None
+        # multiply brick_scale by offset distance
+        brick_scale2 = brick_scale if cm.brick_type != "CUSTOM" else vec_mult(brick_scale, Vector(cm.dist_offset))
+        # re-voxelize only the region around edits to the source
+        if loaded_from_cache and cm.source_is_dirty and action == "UPDATE_MODEL":
+            updated_keys = update_bricksdict_region(bricksdict, source, source_details, brick_scale2, cursor_status=update_cursor)
+            loaded_from_cache = updated_keys is not None
         # if not loaded, new bricksdict must be created
         if not loaded_from_cache:
-            # multiply brick_scale by offset distance
-            brick_scale2 = brick_scale if cm.brick_type != "CUSTOM" else vec_mult(brick_scale, Vector(cm.dist_offset))
             # create new bricksdict
             bricksdict = make_bricksdict(source, source_details, brick_scale2, cursor_status=update_cursor)
     else:
         loaded_from_cache = True
-    # reset all values for certain keys in bricksdict dictionaries
+    # reset all values for certain keys in bricksdict dictionaries (only bricks in the patched region need to be merged again)
+    reset_keys = keys if updated_keys is None else set(updated_keys)
     if cm.build_is_dirty and loaded_from_cache:
         threshold = getThreshold(cm)
         shell_thickness_changed = cm.last_shell_thickness != cm.shell_thickness
-        for kk in bricksdict:
-            brick_d = bricksdict[kk]
-            if keys == "ALL" or kk in keys:
-                brick_d["size"] = None
-                brick_d["parent"] = None
-                brick_d["top_exposed"] = None
-                brick_d["bot_exposed"] = None
-                if shell_thickness_changed:
-                    brick_d["draw"] = brick_d["val"] >= threshold
-            else:
-                # don't merge bricks not in 'keys'
-                brick_d["attempted_merge"] = True
+        rows = bricksdict.rows() if reset_keys == "ALL" else bricksdict.rows(reset_keys)
+        for field in ("size", "parent", "top_exposed", "bot_exposed"):
+            bricksdict.fill(rows, field, None)
+        if shell_thickness_changed:
+            bricksdict.fill(rows, "draw", bricksdict.column("val")[rows] >= threshold, encoded=True)
+        if reset_keys != "ALL" and len(rows) > 0:
+            # don't merge bricks not in 'keys'
+            bricksdict.fill(np.setdiff1d(bricksdict.rows(), rows), "attempted_merge", True)
     elif redraw:
         for kk in keys:
             bricksdict[kk]["attempted_merge"] = False
     if (not loaded_from_cache or cm.internal_is_dirty) and cm.calc_internals:
         update_internal(bricksdict, cm, keys, clear_existing=loaded_from_cache)
         cm.build_is_dirty = True
+    elif updated_keys and cm.calc_internals:
+        update_internal(bricksdict, cm, updated_keys, clear_existing=True)
     # update materials in bricksdict
     if cm.material_type != "NONE" and (cm.material_is_dirty or cm.matrix_is_dirty or cm.anim_is_dirty):
         bricksdict = update_materials(bricksdict, source, keys, cur_frame=cur_frame, action=action)
-    return bricksdict, brick_scale
+    elif cm.material_type != "NONE" and updated_keys:
+        bricksdict = update_materials(bricksdict, source, updated_keys, cur_frame=cur_frame, action=action)
+    return bricksdict, brick_scale, updated_keys
 
 
 def create_new_bricks(source, parent, source_details, dimensions, action, split=True, cm=None, cur_frame=None, bricksdict=None, keys="ALL", clear_existing_collection=True, select_created=False, print_status=True, temp_brick=False, redraw=False, orig_source=None):
@@ -264,7 +277,16 @@ def create_new_bricks(source, parent, source_details, dimensions, action, split=
     brick_scale, custom_data = get_arguments_for_bricksdict(cm, source=source, dimensions=dimensions)
     update_cursor = action in ("CREATE", "UPDATE_MODEL")
     # get bricksdict
-    bricksdict, brick_scale = get_bricksdict_for_model(cm, source, source_details, action, cur_frame, brick_scale, bricksdict, keys, redraw, update_cursor)
+    bricksdict, brick_scale, updated_keys = get_bricksdict_for_model(cm, source, source_details, action, cur_frame, brick_scale, bricksdict, keys, redraw, update_cursor)
+    # redraw only the bricks patched for edits to the source (other bricks of the split model are kept, see 'brickify_model')
+    if cur_frame is None and redraws_patched_bricks(cm):
+        if updated_keys is None:
+            # blueprint was generated again, so the whole model is drawn again
+            delete(get_bricks(cm, typ="MODEL"))
+        else:
+            delete([bpy.data.objects.get(get_brick_name(n, key)) for key in updated_keys])
+            keys = updated_keys
+            clear_existing_collection = False
     # make bricks
     if cm.instance_method == "POINT_CLOUD":
         # generate point cloud
@@ -282,12 +304,11 @@ def create_new_bricks(source, parent, source_details, dimensions, action, split=
         depsgraph_update()
         point_cloud_obj.location = source_details.mid - parent.matrix_world.to_translation()
         # initialize vars
-        keys = list(bricksdict.keys())
         rand_s2 = np.random.RandomState(cm.merge_seed + 1)
         random_rot = cm.random_rot
         random_loc = cm.random_loc
         zstep = get_zstep(cm)
-        keys_dict, sorted_keys = get_keys_dict(bricksdict, keys)
+        keys_dict, sorted_keys = get_keys_dict(bricksdict)
         i = 0
         # create points in cloud
         point_cloud.vertices.add(len(bricksdict))
@@ -300,7 +321,7 @@ def create_new_bricks(source, parent, source_details, dimensions, action, split=
                 random_rot_angle = get_random_rot_angle(random_rot * 2, rand_s2, brick_d["size"])
                 # get brick location
                 loc_offset = get_random_loc(random_loc, rand_s2, dimensions["half_width"], dimensions["half_height"])
-                brick_loc = get_brick_center(bricksdict, key, zstep, str_to_list(key)) + loc_offset
+                brick_loc = get_brick_center(bricksdict, key, zstep, key_to_loc(key)) + loc_offset
                 # set vert
                 v = point_cloud.vertices[i]
                 v.co = brick_loc
@@ -324,7 +345,10 @@ def create_new_bricks(source, parent, source_details, dimensions, action, split=
     else:
         model_name = "Bricker_%(n)s_bricks_f_%(cur_frame)s" % locals() if cur_frame is not None else "Bricker_%(n)s_bricks" % locals()
         # make bricks
-        bricks_created, bricksdict = make_bricks(source, parent, ref_logo, dimensions, bricksdict, action, cm=cm, split=split, brick_scale=brick_scale, custom_data=custom_data, coll_name=model_name, clear_existing_collection=clear_existing_collection, frame_num=cur_frame, cursor_status=update_cursor, keys=keys, print_status=print_status, temp_brick=temp_brick, redraw=redraw)
+        if keys == "ALL" or len(keys) > 0:
+            bricks_created, bricksdict = make_bricks(source, parent, ref_logo, dimensions, bricksdict, action, cm=cm, split=split, brick_scale=brick_scale, custom_data=custom_data, coll_name=model_name, clear_existing_collection=clear_existing_collection, frame_num=cur_frame, cursor_status=update_cursor, keys=keys, print_status=print_status, temp_brick=temp_brick, redraw=redraw)
+        else:
+            bricks_created = []
         # select bricks
         if select_created and len(bricks_created) > 0:
             select(bricks_created)
@@ -339,7 +363,6 @@ def create_new_bricks(source, parent, source_details, dimensions, action, split=
 def generate_brick_object(brick_name="New Brick", brick_size=(1, 1, 1)):
     scn, cm, n = get_active_context_info()
     brick_d = create_bricksdict_entry(
-        name=brick_name,
         loc=(1, 1, 1),
         val=1,
         draw=True,
@@ -0,0 +1,737 @@
+# Copyright (C) 2019 Christopher Gearhart
+# chris@bblanimation.com
+# http://bblanimation.com/
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# System imports
+import marshal
+from collections import Counter
+from collections.abc import Mapping, MutableMapping
+import numpy as np
+
+# Module imports
+from ..general import KEY_BIAS, KEY_MASK, key_to_loc, keys_to_locs, str_to_key
+
+
+# fields of bricksdict entries (see 'create_bricksdict_entry')
+BRICKSDICT_FIELDS = ("loc", "val", "draw", "co", "near_face", "near_intersection", "near_normal", "rgba", "mat_name", "custom_mat_name", "parent", "size", "attempted_merge", "top_exposed", "bot_exposed", "obscures", "type", "flipped", "rotated", "created_from")
+
+# columns of the columnar bricksdict -- name: (dtype, item shape, fill value)
+# NOTE: 'loc' has no column, as it is derived from the key of each row (see 'key_to_loc')
+_COLUMNS = {
+    "present": (bool, (), False),
+    "val": (np.float64, (), 0),
+    "draw": (bool, (), False),
+    "co": (np.float64, (3,), 0),
+    "near_face": (np.int32, (), -1),             # -1: None
+    "near_intersection": (np.float64, (3,), np.nan),  # NaN: None
+    "near_normal": (np.int16, (), -1),           # code into table of strings (-1: None)
+    "rgba": (np.float64, (4,), np.nan),          # NaN: None
+    "mat_name": (np.int16, (), -1),
+    "parent": (np.int32, (), -1),                # row of parent key (-1: None, -2: "self")
+    "size": (np.int16, (3,), -1),                # -1: None
+    "flags": (np.uint8, (), 0),                  # bits of '_FLAGS'
+    "top_exposed": (np.int8, (), -1),            # -1: None, 0: False, 1: True
+    "bot_exposed": (np.int8, (), -1),
+    "obscures": (bool, (6,), False),
+    "type": (np.int16, (), -1),
+    "created_from": (np.int32, (), -1),          # row of key (-1: None)
+}
+_FLAGS = {"custom_mat_name": 1, "attempted_merge": 2, "flipped": 4, "rotated": 8}
+_CODED_FIELDS = ("near_normal", "mat_name", "type")
+_KEY_FIELDS = ("parent", "created_from")
+_INDEXED_FIELDS = ("draw", "parent", "size", "type")
+_SELF = -2
+_MARSHAL_VERSION = 3
+# marshal format without object references, so equal bricksdicts always give equal bytes (see 'deep_cache_is_current')
+_MARSHAL_FORMAT = 2
+
+
+class BricksDict(MutableMapping):
+    """ columnar (struct-of-arrays) bricksdict
+
+    entries are stored as rows of NumPy arrays (see '_COLUMNS'), and accessed through 'BrickEntry' views with the
+    interface of the dicts returned by 'create_bricksdict_entry', so existing 'bricksdict[key]["val"]' access works
+    unchanged while hot paths use the arrays directly (see 'rows', 'column' and 'fill')
+
+    indexes of drawn keys by z layer, of the entries merged into each parent entry and of the number of bricks of each
+    size and type are kept up to date as entries change (see 'keys_by_layer', 'brick_keys' and 'brick_counts')
+
+    NOTE: values are returned as new Python objects, so lists in entries (e.g. 'size') must be set again when modified
+
+    """
+
+    def __init__(self, entries=None):
+        self._keys = []   # key of each row
+        self._rows = {}   # row of each key in bricksdict
+        self._removed_rows = {}  # row of each removed key (kept so rows of keys referenced by other rows are stable)
+        self._cols = {field: np.full((16,) + shape, fill, dtype=dtype) for field, (dtype, shape, fill) in _COLUMNS.items()}
+        self._tables = {field: [] for field in _CODED_FIELDS}
+        self._codes = {field: {} for field in _CODED_FIELDS}
+        self._layers = {}    # rows of drawn entries in each z layer
+        self._children = {}  # rows of entries merged into each parent row
+        self._brick_counts = Counter()  # number of drawn parent entries of each (size, type code)
+        if entries is not None:
+            for key, entry in entries.items():
+                self[key] = entry
+
+    ###################################################
+    # mapping interface
+
+    def __getitem__(self, key):
+        return BrickEntry(self, self._rows[key])
+
+    def __setitem__(self, key, entry):
+        row = self._row(key)
+        self._index_row(row, add=False)
+        self._add_rows([row])
+        for field in BRICKSDICT_FIELDS:
+            _SETTERS[field](self, row, entry.get(field, _DEFAULTS[field]))
+        self._index_row(row)
+
+    def __delitem__(self, key):
+        row = self._rows[key]
+        self._index_row(row, add=False)
+        del self._rows[key]
+        self._removed_rows[key] = row
+        self._cols["present"][row] = False
+
+    def __contains__(self, key):
+        return key in self._rows
+
+    def __iter__(self):
+        keys = self._keys
+        for row in np.flatnonzero(self._cols["present"][:len(keys)]).tolist():
+            yield keys[row]
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __repr__(self):
+        return "BricksDict(%d entries)" % len(self._rows)
+
+    def pop(self, key, *default):
+        """ remove entry at 'key' and return a dict of its values """
+        if key not in self:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        entry = dict(self[key])
+        del self[key]
+        return entry
+
+    @property
+    def nbytes(self):
+        """ estimated number of bytes used by bricksdict """
+        # (keys, rows and indexes take roughly 120 bytes per row in Python objects)
+        return sum(arr.nbytes for arr in self._cols.values()) + 120 * len(self._keys)
+
+    def copy(self):
+        """ returns deep copy of bricksdict """
+        new = BricksDict()
+        new._keys = self._keys.copy()
+        new._rows = self._rows.copy()
+        new._removed_rows = self._removed_rows.copy()
+        new._cols = {field: arr.copy() for field, arr in self._cols.items()}
+        new._tables = {field: table.copy() for field, table in self._tables.items()}
+        new._codes = {field: codes.copy() for field, codes in self._codes.items()}
+        new._layers = {z: rows.copy() for z, rows in self._layers.items()}
+        new._children = {row: rows.copy() for row, rows in self._children.items()}
+        new._brick_counts = self._brick_counts.copy()
+        return new
+
+    ###################################################
+    # indexes
+
+    def keys_by_layer(self):
+        """ returns dict of keys of drawn entries in each z layer, sorted by x, y (see 'get_keys_dict') """
+        keys = self._keys
+        return {z: sorted(keys[row] for row in rows) for z, rows in self._layers.items()}
+
+    def drawn_keys(self):
+        """ returns keys of drawn entries """
+        keys = self._keys
+        return [keys[row] for rows in self._layers.values() for row in rows]
+
+    def brick_keys(self, parent_key):
+        """ returns keys of entries in the brick at 'parent_key' (the parent entry followed by entries merged into it) """
+        keys = self._keys
+        return [parent_key] + [keys[row] for row in self._children.get(self._rows[parent_key], ())]
+
+    def brick_counts(self):
+        """ returns dict of number of drawn bricks of each (size, type) """
+        types = self._tables["type"]
+        return {(size, None if typ == -1 else types[typ]): count for (size, typ), count in self._brick_counts.items()}
+
+    ###################################################
+    # columnar interface
+
+    def add_entries(self, keys:list, **values):
+        """ add entries for 'keys' at once (fields not in 'values' are set to their default values)
+
+        values are sequences or arrays aligned with 'keys', encoded as in '_COLUMNS' for array columns
+        ('near_face': -1 for None, 'near_intersection'/'rgba': NaN for None) or as values of the field otherwise
+
+        """
+        rows = np.array([self._row(key) for key in keys], dtype=np.int64)
+        self._index_rows(rows, add=False)
+        self._add_rows(rows)
+        for field in BRICKSDICT_FIELDS:
+            if field in values:
+                self._fill(rows, field, values[field], encoded=True)
+            else:
+                self._fill(rows, field, _DEFAULTS[field])
+        self._index_rows(rows)
+        return rows
+
+    def rows(self, keys=None):
+        """ returns array of rows of the entries at 'keys' (or of all entries) """
+        if keys is None:
+            return np.flatnonzero(self._cols["present"][:len(self._keys)])
+        rows = self._rows
+        return np.fromiter((rows[key] for key in keys if key in rows), dtype=np.int64)
+
+    def column(self, field:str):
+        """ returns array of the values of a numeric field ('val', 'draw', 'near_face', 'co'...) for every row
+
+        NOTE: fields in '_INDEXED_FIELDS' must be set with 'fill' (not by writing to the array) to keep indexes up to date
+
+        """
+        return self._cols[field][:len(self._keys)]
+
+    def keys_at(self, rows):
+        """ returns keys of entries at 'rows' """
+        keys = self._keys
+        return [keys[row] for row in np.asarray(rows).tolist()]
+
+    def locs(self, rows):
+        """ returns (N, 3) array of locs of entries at 'rows' """
+        return keys_to_locs(np.array(self._keys, dtype=np.int64)[rows])
+
+    def bricks_at(self, rows):
+        """ returns dict of (loc, size) of the bricks that entries at 'rows' are part of, by key of each brick's parent entry """
+        cols = self._cols
+        rows = np.asarray(rows, dtype=np.int64)
+        parents = cols["parent"][rows].astype(np.int64)
+        parent_rows = np.unique(np.concatenate((rows[parents == _SELF], parents[parents >= 0])))
+        parent_rows = parent_rows[cols["present"][parent_rows] & (cols["size"][parent_rows, 0] != -1)]
+        return {key: (key_to_loc(key), size) for key, size in zip(self.keys_at(parent_rows), cols["size"][parent_rows].tolist())}
+
+    def remove_rows(self, rows):
+        """ remove entries at 'rows' at once """
+        rows = np.asarray(rows, dtype=np.int64)
+        self._index_rows(rows, add=False)
+        for row, key in zip(rows.tolist(), self.keys_at(rows)):
+            del self._rows[key]
+            self._removed_rows[key] = row
+        self._cols["present"][rows] = False
+
+    def fill(self, rows, field:str, value, encoded:bool=False):
+        """ set 'field' of entries at 'rows' to 'value' (or to each of 'value' if 'encoded', see 'add_entries') """
+        if field in _INDEXED_FIELDS:
+            self._index_rows(rows, add=False)
+            self._fill(rows, field, value, encoded)
+            self._index_rows(rows)
+        else:
+            self._fill(rows, field, value, encoded)
+
+    def copy_rows(self, src_rows, dst_rows, fields):
+        """ set 'fields' of entries at 'dst_rows' to those of entries at 'src_rows' """
+        cols = self._cols
+        for field in fields:
+            if field in _FLAGS:
+                bit = np.uint8(_FLAGS[field])
+                self._fill(dst_rows, field, cols["flags"][src_rows] & bit != 0)
+            elif field in _INDEXED_FIELDS:
+                self._index_rows(dst_rows, add=False)
+                cols[field][dst_rows] = cols[field][src_rows]
+                self._index_rows(dst_rows)
+            elif field != "loc":
+                cols[field][dst_rows] = cols[field][src_rows]
+
+    def _fill(self, rows, field:str, value, encoded:bool=False):
+        if field == "loc":
+            return
+        elif field in _FLAGS:
+            flags = self._cols["flags"]
+            bit = np.uint8(_FLAGS[field])
+            value = np.asarray(value, dtype=bool)
+            flags[rows] = np.where(value, flags[rows] | bit, flags[rows] & ~bit)
+        elif field in _CODED_FIELDS:
+            self._cols[field][rows] = [self._code(field, v) for v in value] if encoded else self._code(field, value)
+        elif field in _KEY_FIELDS:
+            self._cols[field][rows] = [self._key_row(k) for k in value] if encoded else self._key_row(value)
+        elif field in ("top_exposed", "bot_exposed") and not encoded:
+            self._cols[field][rows] = -1 if value is None else int(value)
+        elif value is None:
+            self._cols[field][rows] = _COLUMNS[field][2]
+        else:
+            self._cols[field][rows] = value
+
+    ###################################################
+    # serialization
+
+    def to_marshal(self):
+        """ returns marshal-compatible representation of bricksdict (see 'dumps_bricksdict') """
+        num_rows = len(self._keys)
+        columns = {field: arr[:num_rows].tobytes() for field, arr in self._cols.items()}
+        keys = np.array(self._keys, dtype=np.int64).tobytes()
+        return {"bricksdict_version": _MARSHAL_VERSION, "keys": keys, "columns": columns, "tables": self._tables}
+
+    @staticmethod
+    def from_marshal(data:dict):
+        """ returns bricksdict from representation returned by 'to_marshal' """
+        new = BricksDict()
+        if data["bricksdict_version"] == 1:
+            # keys of version 1 are strings (see 'key_to_str')
+            new._keys = [str_to_key(key) for key in data["keys"]]
+        else:
+            new._keys = np.frombuffer(data["keys"], dtype=np.int64).tolist()
+        num_rows = len(new._keys)
+        for field, (dtype, shape, fill) in _COLUMNS.items():
+            arr = np.full((max(num_rows, 16),) + shape, fill, dtype=dtype)
+            arr[:num_rows] = np.frombuffer(data["columns"][field], dtype=dtype).reshape((num_rows,) + shape)
+            new._cols[field] = arr
+        present = new._cols["present"][:num_rows].tolist()
+        new._rows = {key: row for row, key in enumerate(new._keys) if present[row]}
+        new._removed_rows = {key: row for row, key in enumerate(new._keys) if not present[row]}
+        new._tables = {field: list(table) for field, table in data["tables"].items()}
+        new._codes = {field: {v: i for i, v in enumerate(table)} for field, table in new._tables.items()}
+        new._index_rows(new.rows())
+        return new
+
+    @staticmethod
+    def is_marshalled(data):
+        return isinstance(data, dict) and "bricksdict_version" in data
+
+    ###################################################
+    # internal methods
+
+    def _row(self, key):
+        """ returns row of 'key', adding a row for it if necessary (without adding 'key' to bricksdict, see '_add_rows') """
+        row = self._rows.get(key)
+        if row is None:
+            row = self._removed_rows.get(key)
+        if row is None:
+            row = len(self._keys)
+            self._keys.append(key)
+            self._removed_rows[key] = row
+            if row >= len(self._cols["present"]):
+                self._grow(row + 1)
+        return row
+
+    def _key_row(self, key):
+        if key is None:
+            return -1
+        if key == "self":
+            return _SELF
+        return self._row(key)
+
+    def _add_rows(self, rows):
+        """ add keys of 'rows' to bricksdict """
+        keys = self._keys
+        for row in np.asarray(rows).tolist():
+            key = keys[row]
+            if self._removed_rows.pop(key, None) is not None:
+                self._rows[key] = row
+        self._cols["present"][rows] = True
+
+    def _index_row(self, row:int, add:bool=True):
+        """ add entry at 'row' to (or remove it from) the indexes """
+        cols = self._cols
+        if not cols["present"][row]:
+            return
+        drawn = cols["draw"][row]
+        if drawn:
+            _update_index(self._layers, (self._keys[row] & KEY_MASK) - KEY_BIAS, row, add)
+        parent = cols["parent"][row]
+        if parent >= 0:
+            _update_index(self._children, int(parent), row, add)
+        elif parent == _SELF and drawn and cols["size"][row, 0] != -1:
+            self._count_brick(row, add)
+
+    def _index_rows(self, rows, add:bool=True):
+        """ add entries at 'rows' to (or remove them from) the indexes """
+        cols = self._cols
+        rows = np.asarray(rows, dtype=np.int64)
+        rows = rows[cols["present"][rows]]
+        drawn = cols["draw"][rows]
+        # group drawn rows by z layer
+        drawn_rows = rows[drawn]
+        if len(drawn_rows) > 0:
+            keys = self._keys
+            zs = (np.array([keys[row] for row in drawn_rows.tolist()], dtype=np.int64) & KEY_MASK) - KEY_BIAS
+            order = np.argsort(zs, kind="stable")
+            zs, drawn_rows = zs[order], drawn_rows[order]
+            starts = np.flatnonzero(np.diff(zs)) + 1
+            for z, layer_rows in zip(zs[np.concatenate(([0], starts))].tolist(), np.split(drawn_rows, starts)):
+                if add:
+                    self._layers.setdefault(z, set()).update(layer_rows.tolist())
+                else:
+                    layer = self._layers[z]
+                    layer.difference_update(layer_rows.tolist())
+                    if not layer:
+                        del self._layers[z]
+        parents = cols["parent"][rows]
+        for row in rows[parents >= 0].tolist():
+            _update_index(self._children, int(cols["parent"][row]), row, add)
+        for row in rows[(parents == _SELF) & drawn & (cols["size"][rows, 0] != -1)].tolist():
+            self._count_brick(row, add)
+
+    def _count_brick(self, row:int, add:bool):
+        cols = self._cols
+        brick = (tuple(cols["size"][row].tolist()), int(cols["type"][row]))
+        self._brick_counts[brick] += 1 if add else -1
+        if self._brick_counts[brick] == 0:
+            del self._brick_counts[brick]
+
+    def _grow(self, min_rows:int):
+        capacity = max(min_rows, 2 * len(self._cols["present"]))
+        for field, (dtype, shape, fill) in _COLUMNS.items():
+            arr = self._cols[field]
+            new_arr = np.full((capacity,) + shape, fill, dtype=dtype)
+            new_arr[:len(arr)] = arr
+            self._cols[field] = new_arr
+
+    def _code(self, field, value):
+        if value is None:
+            return -1
+        code = self._codes[field].get(value)
+        if code is None:
+            code = len(self._tables[field])
+            self._tables[field].append(value)
+            self._codes[field][value] = code
+        return code
+
+
+class BrickEntry(MutableMapping):
+    """ view of the entry in a 'BricksDict' at one row, with the interface of the dicts returned by 'create_bricksdict_entry' """
+    __slots__ = ("bricksdict", "row")
+
+    def __init__(self, bricksdict, row:int):
+        self.bricksdict = bricksdict
+        self.row = row
+
+    def __getitem__(self, field):
+        return _GETTERS[field](self.bricksdict, self.row)
+
+    def __setitem__(self, field, value):
+        if field in _INDEXED_FIELDS:
+            bd, row = self.bricksdict, self.row
+            bd._index_row(row, add=False)
+            _SETTERS[field](bd, row, value)
+            bd._index_row(row)
+        else:
+            _SETTERS[field](self.bricksdict, self.row, value)
+
+    def __delitem__(self, field):
+        raise TypeError("fields can't be removed from bricksdict entries")
+
+    def __iter__(self):
+        return iter(BRICKSDICT_FIELDS)
+
+    def __len__(self):
+        return len(BRICKSDICT_FIELDS)
+
+    def __contains__(self, field):
+        return field in _GETTERS
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    def copy(self):
+        return dict(self)
+
+
+def dumps_bricksdict(bricksdict):
+    """ returns bytes of bricksdict (or dict of bricksdicts, e.g. for animation frames) for the deep cache and undo stack """
+    return marshal.dumps(_to_marshal(bricksdict), _MARSHAL_FORMAT)
+
+
+def loads_bricksdict(data:bytes):
+    """ returns bricksdict (or dict of bricksdicts) from bytes returned by 'dumps_bricksdict' (or marshalled dicts of older versions) """
+    return _from_marshal(marshal.loads(data))
+
+
+def bricksdict_delta(data:dict, base:dict):
+    """ returns marshal-compatible changes from bricksdict 'base' to bricksdict 'data' (as returned by 'to_marshal')
+
+    entries are matched by key, so only the values of entries added or changed since 'base' are stored
+
+    """
+    keys = np.frombuffer(data["keys"], dtype=np.int64)
+    base_rows = _match_rows(keys, np.frombuffer(base["keys"], dtype=np.int64))
+    new = base_rows == -1
+    predicted = _predict_columns(base, base_rows, data["tables"])
+    columns = {}
+    for field, (dtype, shape, fill) in _COLUMNS.items():
+        values = np.frombuffer(data["columns"][field], dtype=dtype).reshape((len(keys),) + shape)
+        changed = new | np.any(_row_bytes(values) != _row_bytes(predicted[field]), axis=1)
+        rows = np.flatnonzero(changed)
+        columns[field] = (_diff_encode(rows), values[rows].tobytes())
+    return {"bricksdict_delta_version": 1, "base_rows": _diff_encode(base_rows), "new_keys": keys[new].tobytes(), "columns": columns, "tables": data["tables"]}
+
+
+def apply_bricksdict_delta(delta:dict, base:dict):
+    """ returns bricksdict (as returned by 'to_marshal') from changes returned by 'bricksdict_delta' and its 'base' """
+    base_rows = _diff_decode(delta["base_rows"])
+    keys = np.empty(len(base_rows), dtype=np.int64)
+    matched = base_rows != -1
+    keys[matched] = np.frombuffer(base["keys"], dtype=np.int64)[base_rows[matched]]
+    keys[~matched] = np.frombuffer(delta["new_keys"], dtype=np.int64)
+    columns = _predict_columns(base, base_rows, delta["tables"])
+    for field, (dtype, shape, fill) in _COLUMNS.items():
+        rows, values = delta["columns"][field]
+        rows = _diff_decode(rows)
+        columns[field][rows] = np.frombuffer(values, dtype=dtype).reshape((len(rows),) + shape)
+    columns = {field: arr.tobytes() for field, arr in columns.items()}
+    return {"bricksdict_version": _MARSHAL_VERSION, "keys": keys.tobytes(), "columns": columns, "tables": delta["tables"]}
+
+
+def changed_keys(bricksdict, base):
+    """ returns keys of entries added to, removed from or changed in 'bricksdict' since 'base' (e.g. a copy of it) """
+    num_base_rows = len(base._keys)
+    if bricksdict._keys[:num_base_rows] == base._keys and all(bricksdict._tables[field][:len(table)] == table for field, table in base._tables.items()):
+        # rows and codes of 'base' are unchanged (e.g. it is a copy of 'bricksdict'), so columns compare directly
+        num_rows = len(bricksdict._keys)
+        changed = np.ones(num_rows, dtype=bool)
+        changed[:num_base_rows] = False
+        for field in _COLUMNS:
+            changed[:num_base_rows] |= np.any(_row_bytes(bricksdict.column(field)[:num_base_rows]) != _row_bytes(base.column(field)), axis=1)
+        # skip rows of keys removed from both
+        was_present = np.zeros(num_rows, dtype=bool)
+        was_present[:num_base_rows] = base.column("present")
+        changed &= bricksdict.column("present") | was_present
+        return bricksdict.keys_at(np.flatnonzero(changed))
+    data, base_data = bricksdict.to_marshal(), base.to_marshal()
+    keys = np.frombuffer(data["keys"], dtype=np.int64)
+    base_keys = np.frombuffer(base_data["keys"], dtype=np.int64)
+    base_rows = _match_rows(keys, base_keys)
+    predicted = _predict_columns(base_data, base_rows, data["tables"])
+    changed = base_rows == -1
+    for field, (dtype, shape, fill) in _COLUMNS.items():
+        values = np.frombuffer(data["columns"][field], dtype=dtype).reshape((len(keys),) + shape)
+        changed |= np.any(_row_bytes(values) != _row_bytes(predicted[field]), axis=1)
+    # skip rows of keys removed from both
+    changed &= bricksdict.column("present") | predicted["present"]
+    # keys of entries in 'base' without rows in 'bricksdict'
+    unmatched = base.column("present").copy()
+    unmatched[base_rows[base_rows != -1]] = False
+    return keys[changed].tolist() + base_keys[unmatched].tolist()
+
+
+def _match_rows(keys, base_keys):
+    """ returns row of each of 'keys' in 'base_keys' (-1 where missing) """
+    if len(base_keys) == 0:
+        return np.full(len(keys), -1, dtype=np.int64)
+    order = np.argsort(base_keys, kind="stable")
+    sorted_keys = base_keys[order]
+    idxs = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+    return np.where(sorted_keys[idxs] == keys, order[idxs], -1)
+
+
+def _predict_columns(base:dict, base_rows, tables:dict):
+    """ returns columns of the entries of 'base' at 'base_rows', with row references and codes translated """
+    num_rows = len(base_rows)
+    num_base_rows = len(base["keys"]) // 8
+    matched = base_rows != -1
+    # row of each base row in the new rows (to translate 'parent' and 'created_from')
+    new_rows = np.full(num_base_rows, -1, dtype=np.int64)
+    new_rows[base_rows[matched]] = np.flatnonzero(matched)
+    columns = {}
+    for field, (dtype, shape, fill) in _COLUMNS.items():
+        arr = np.full((num_rows,) + shape, fill, dtype=dtype)
+        base_arr = np.frombuffer(base["columns"][field], dtype=dtype).reshape((num_base_rows,) + shape)
+        arr[matched] = base_arr[base_rows[matched]]
+        if field in _KEY_FIELDS:
+            refs = arr >= 0
+            arr[refs] = new_rows[arr[refs]]
+        elif field in _CODED_FIELDS:
+            codes = {value: i for i, value in enumerate(tables[field])}
+            # (values missing from the new table never match, so their entries are stored in the delta)
+            code_map = np.array([codes.get(value, -3) for value in base["tables"][field]] or [-3], dtype=dtype)
+            coded = arr >= 0
+            arr[coded] = code_map[arr[coded]]
+        columns[field] = arr
+    return columns
+
+
+def _row_bytes(arr):
+    """ returns bytes of each row of 'arr' (so NaNs compare equal and -0.0 differs from 0.0) """
+    row_size = arr.dtype.itemsize * int(np.prod(arr.shape[1:]))
+    return np.ascontiguousarray(arr).reshape(-1).view(np.uint8).reshape(len(arr), row_size)
+
+
+def _diff_encode(ints):
+    # differences of sorted or consecutive ints are small and repetitive, so they compress well
+    return np.diff(np.asarray(ints, dtype=np.int64), prepend=0).astype(np.int32).tobytes()
+
+
+def _diff_decode(data:bytes):
+    return np.cumsum(np.frombuffer(data, dtype=np.int32), dtype=np.int64)
+
+
+def _to_marshal(obj):
+    if isinstance(obj, BricksDict):
+        return obj.to_marshal()
+    # (e.g. dicts or FrameCaches of animation frame bricksdicts)
+    elif isinstance(obj, Mapping):
+        return {key: _to_marshal(value) for key, value in obj.items()}
+    return obj
+
+
+def _from_marshal(obj):
+    if BricksDict.is_marshalled(obj):
+        return BricksDict.from_marshal(obj)
+    # convert bricksdicts of older versions stored as dicts of entry dicts (keyed by strings, see 'key_to_str')
+    elif len(obj) == 0 or "draw" in next(iter(obj.values())):
+        return BricksDict({str_to_key(key): _entry_from_str_keys(entry) for key, entry in obj.items()})
+    return {key: _from_marshal(value) for key, value in obj.items()}
+
+
+def _update_index(index:dict, index_key, row:int, add:bool):
+    if add:
+        index.setdefault(index_key, set()).add(row)
+    else:
+        rows = index[index_key]
+        rows.discard(row)
+        if not rows:
+            del index[index_key]
+
+
+def _entry_from_str_keys(entry):
+    for field in _KEY_FIELDS:
+        if entry.get(field) not in (None, "self"):
+            entry[field] = str_to_key(entry[field])
+    return entry
+
+
+# default value of each field (see 'create_bricksdict_entry')
+_DEFAULTS = {"loc": None, "val": 0, "draw": False, "co": (0, 0, 0), "near_face": None, "near_intersection": None, "near_normal": None, "rgba": None, "mat_name": "", "custom_mat_name": False, "parent": None, "size": None, "attempted_merge": False, "top_exposed": None, "bot_exposed": None, "obscures": [False] * 6, "type": None, "flipped": False, "rotated": False, "created_from": None}
+
+
+def _get_optional_tuple(field):
+    def getter(bd, row):
+        value = bd._cols[field][row]
+        return None if np.isnan(value[0]) else tuple(value.tolist())
+    return getter
+
+
+def _get_optional_index(field):
+    def getter(bd, row):
+        value = int(bd._cols[field][row])
+        return None if value == -1 else value
+    return getter
+
+
+def _get_code(field):
+    def getter(bd, row):
+        code = bd._cols[field][row]
+        return None if code == -1 else bd._tables[field][code]
+    return getter
+
+
+def _get_key(field):
+    def getter(bd, row):
+        key_row = bd._cols[field][row]
+        return None if key_row == -1 else ("self" if key_row == _SELF else bd._keys[key_row])
+    return getter
+
+
+def _get_exposure(field):
+    def getter(bd, row):
+        value = bd._cols[field][row]
+        return None if value == -1 else bool(value)
+    return getter
+
+
+def _get_flag(field):
+    bit = _FLAGS[field]
+    return lambda bd, row: bool(bd._cols["flags"][row] & bit)
+
+
+def _get_size(bd, row):
+    size = bd._cols["size"][row]
+    return None if size[0] == -1 else size.tolist()
+
+
+def _get_rgba(bd, row):
+    rgba = bd._cols["rgba"][row]
+    return None if np.isnan(rgba[0]) else rgba.tolist()
+
+
+_GETTERS = {
+    "loc": lambda bd, row: key_to_loc(bd._keys[row]),
+    "val": lambda bd, row: float(bd._cols["val"][row]),
+    "draw": lambda bd, row: bool(bd._cols["draw"][row]),
+    "co": lambda bd, row: tuple(bd._cols["co"][row].tolist()),
+    "near_face": _get_optional_index("near_face"),
+    "near_intersection": _get_optional_tuple("near_intersection"),
+    "near_normal": _get_code("near_normal"),
+    "rgba": _get_rgba,
+    "mat_name": _get_code("mat_name"),
+    "custom_mat_name": _get_flag("custom_mat_name"),
+    "parent": _get_key("parent"),
+    "size": _get_size,
+    "attempted_merge": _get_flag("attempted_merge"),
+    "top_exposed": _get_exposure("top_exposed"),
+    "bot_exposed": _get_exposure("bot_exposed"),
+    "obscures": lambda bd, row: bd._cols["obscures"][row].tolist(),
+    "type": _get_code("type"),
+    "flipped": _get_flag("flipped"),
+    "rotated": _get_flag("rotated"),
+    "created_from": _get_key("created_from"),
+}
+
+
+def _set_value(field):
+    fill = _COLUMNS[field][2]
+    def setter(bd, row, value):
+        bd._cols[field][row] = fill if value is None else value
+    return setter
+
+
+def _set_code(field):
+    def setter(bd, row, value):
+        bd._cols[field][row] = bd._code(field, value)
+    return setter
+
+
+def _set_key(field):
+    def setter(bd, row, value):
+        bd._cols[field][row] = bd._key_row(value)
+    return setter
+
+
+def _set_exposure(field):
+    def setter(bd, row, value):
+        bd._cols[field][row] = -1 if value is None else bool(value)
+    return setter
+
+
+def _set_flag(field):
+    bit = np.uint8(_FLAGS[field])
+    def setter(bd, row, value):
+        flags = bd._cols["flags"]
+        flags[row] = flags[row] | bit if value else flags[row] & ~bit
+    return setter
+
+
+_SETTERS = {field: _set_value(field) for field in BRICKSDICT_FIELDS if field in _COLUMNS}
+_SETTERS.update({field: _set_code(field) for field in _CODED_FIELDS})
+_SETTERS.update({field: _set_key(field) for field in _KEY_FIELDS})
+_SETTERS.update({field: _set_flag(field) for field in _FLAGS})
+_SETTERS.update({"top_exposed": _set_exposure("top_exposed"), "bot_exposed": _set_exposure("bot_exposed")})
+_SETTERS["loc"] = lambda bd, row, value: None
@@ -0,0 +1,277 @@
+# Copyright (C) 2019 Christopher Gearhart
+# chris@bblanimation.com
+# http://bblanimation.com/
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# System imports
+import base64
+import marshal
+import struct
+import sys
+import zlib
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+# Module imports
+from .columnar import BricksDict, apply_bricksdict_delta, bricksdict_delta, dumps_bricksdict, loads_bricksdict
+
+
+# deep caches are stored in 'cm.bfm_cache' as base64 text of a header (magic number, format version, kind of data,
+# and checksum/length of the data) followed by either the zlib-compressed bytes returned by 'dumps_bricksdict' or
+# the frame records of a 'FrameCache' (which are compressed independently)
+_DEEP_CACHE_MAGIC = b"BKDC"
+_DEEP_CACHE_VERSION = 3
+_DEEP_CACHE_HEADER = struct.Struct("<4sBBxII")
+# number of base64 characters encoding the header (header size is a multiple of 3, so it encodes on its own)
+_DEEP_CACHE_HEADER_LEN = _DEEP_CACHE_HEADER.size // 3 * 4
+# kinds of data stored in the deep cache
+_DEEP_CACHE_BRICKSDICT = 0
+_DEEP_CACHE_FRAMES = 1
+# header of each frame record stored by a FrameCache (lengths of frame key and keyframe key, checksum/length of the
+# data, and length of the compressed data or changes)
+_FRAME_RECORD_HEADER = struct.Struct("<HHIII")
+_FRAME_RECORD_HEADER_V2 = struct.Struct("<HIII")
+# favor save speed; the columnar arrays compress well even at low levels
+_DEEP_CACHE_COMPRESSION = 1
+
+
+class FrameCache(MutableMapping):
+    """ bricksdicts of animation frames (keyed by 'str(frame)') stored as compressed records
+
+    A frame's bricksdict is decompressed the first time it is accessed; only the 'max_loaded' most recently
+    accessed frames are kept decompressed, and older ones are evicted (compressing them again if they changed) unless
+    they are still referenced outside the cache (e.g. by an operator editing them).
+    Keyframes (the first frame of every 'keyframe_interval' frames) are stored whole, and the frames between them
+    as the changes from their keyframe (see 'bricksdict_delta'), so any frame decodes from at most two records.
+    NOTE: changes to a frame's bricksdict after 'evict' is called explicitly are lost; get it from the cache again instead
+    """
+    max_loaded = 8
+    keyframe_interval = 10
+    # number of decompressed keyframes kept for decoding the frames stored as changes from them
+    max_keyframes = 2
+
+    def __init__(self, frames=None, records=None):
+        # frame -> (crc32, length of 'dumps_bricksdict' data, compressed data or changes, keyframe ("" if whole)),
+        # or None if not compressed yet
+        self._records = dict(records or {})
+        # frame -> bricksdict, in order of last access
+        self._loaded = OrderedDict()
+        # keyframe -> marshalled bricksdict, in order of last access
+        self._keyframes = OrderedDict()
+        if frames is not None:
+            self.update(frames)
+
+    def __getitem__(self, frame):
+        if frame in self._loaded:
+            self._loaded.move_to_end(frame)
+            return self._loaded[frame]
+        bricksdict = BricksDict.from_marshal(self._decompress(frame))
+        self._load(frame, bricksdict)
+        return bricksdict
+
+    def __setitem__(self, frame, bricksdict):
+        if frame in self._records:
+            self._store_dependents_whole(frame)
+        self._records[frame] = None
+        self._loaded.pop(frame, None)
+        self._load(frame, bricksdict)
+
+    def __delitem__(self, frame):
+        self._store_dependents_whole(frame)
+        del self._records[frame]
+        self._loaded.pop(frame, None)
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def __len__(self):
+        return len(self._records)
+
+    @property
+    def nbytes(self):
+        """ estimated number of bytes used by compressed records and decompressed bricksdicts """
+        records_size = sum(len(record[2]) for record in self._records.values() if record is not None)
+        keyframes_size = sum(len(data["keys"]) + sum(map(len, data["columns"].values())) for data in self._keyframes.values())
+        return records_size + keyframes_size + sum(bricksdict.nbytes for bricksdict in self._loaded.values())
+
+    def in_use(self):
+        """ checks if any decompressed bricksdict is referenced outside the cache (e.g. held by an operator editing it) """
+        return any(self._frame_in_use(frame) for frame in self._loaded)
+
+    def loaded_frames(self):
+        """ returns frames whose bricksdicts are currently decompressed """
+        return list(self._loaded)
+
+    def evict(self, frame=None):
+        """ compress bricksdict of frame (or of all loaded frames if None) and drop it from memory """
+        for f in list(self._loaded) if frame is None else [frame]:
+            self._compress(f)
+            del self._loaded[f]
+
+    def dumps(self):
+        """ returns bytes of compressed frame records for the deep cache (decompressed frames are kept loaded) """
+        for frame in list(self._loaded):
+            self._compress(frame)
+        # NOTE: packed by hand rather than marshalled so unchanged frames always produce the same bytes
+        chunks = []
+        for frame, (crc, length, compressed, keyframe) in self._records.items():
+            frame, keyframe = frame.encode(), keyframe.encode()
+            chunks += [_FRAME_RECORD_HEADER.pack(len(frame), len(keyframe), crc, length, len(compressed)), frame, keyframe, compressed]
+        return b"".join(chunks)
+
+    @staticmethod
+    def loads(data:bytes, version:int=None):
+        """ returns FrameCache from bytes returned by 'FrameCache.dumps' (of deep cache format 'version') """
+        # records of version 2 have no keyframe
+        record_header = _FRAME_RECORD_HEADER_V2 if version == 2 else _FRAME_RECORD_HEADER
+        records = {}
+        offset = 0
+        while offset < len(data):
+            if version == 2:
+                frame_len, crc, length, compressed_len = record_header.unpack_from(data, offset)
+                keyframe_len = 0
+            else:
+                frame_len, keyframe_len, crc, length, compressed_len = record_header.unpack_from(data, offset)
+            offset += record_header.size
+            frame = data[offset:offset + frame_len].decode()
+            offset += frame_len
+            keyframe = data[offset:offset + keyframe_len].decode()
+            offset += keyframe_len
+            records[frame] = (crc, length, data[offset:offset + compressed_len], keyframe)
+            offset += compressed_len
+        return FrameCache(records=records)
+
+    def _load(self, frame, bricksdict):
+        self._loaded[frame] = bricksdict
+        # evict least recently accessed frames not in use (the frame just loaded is last)
+        for f in list(self._loaded)[:-1]:
+            if len(self._loaded) <= self.max_loaded:
+                break
+            if not self._frame_in_use(f):
+                self.evict(f)
+
+    def _frame_in_use(self, frame):
+        # NOTE: the other reference counted is the temporary one passed to 'getrefcount'
+        return sys.getrefcount(self._loaded[frame]) > 2
+
+    def _compress(self, frame):
+        data = dumps_bricksdict(self._loaded[frame])
+        crc, length = zlib.crc32(data), len(data)
+        record = self._records[frame]
+        if record is not None and record[:2] == (crc, length):
+            return
+        # frames stored as changes from this frame must be decoded before it changes
+        self._store_dependents_whole(frame)
+        keyframe = self._keyframe(frame)
+        if keyframe:
+            if keyframe in self._loaded:
+                self._compress(keyframe)
+            data = marshal.dumps(bricksdict_delta(marshal.loads(data), self._keyframe_data(keyframe)))
+        self._records[frame] = (crc, length, zlib.compress(data, _DEEP_CACHE_COMPRESSION), keyframe)
+
+    def _decompress(self, frame):
+        """ returns marshalled bricksdict of frame from its record """
+        crc, length, compressed, keyframe = self._records[frame]
+        data = marshal.loads(zlib.decompress(compressed))
+        return apply_bricksdict_delta(data, self._keyframe_data(keyframe)) if keyframe else data
+
+    def _keyframe(self, frame):
+        """ returns keyframe to store frame as changes from ("" if frame is a keyframe) """
+        frame = int(frame)
+        # the first frame of the interval is the keyframe (so keyframes never have keyframes themselves)
+        for f in range(frame - frame % self.keyframe_interval, frame):
+            if str(f) in self._records:
+                return str(f)
+        return ""
+
+    def _keyframe_data(self, keyframe):
+        if keyframe in self._keyframes:
+            self._keyframes.move_to_end(keyframe)
+        else:
+            self._keyframes[keyframe] = self._decompress(keyframe)
+            while len(self._keyframes) > self.max_keyframes:
+                self._keyframes.popitem(last=False)
+        return self._keyframes[keyframe]
+
+    def _store_dependents_whole(self, keyframe):
+        """ store frames stored as changes from 'keyframe' whole (e.g. before 'keyframe' changes) """
+        for frame, record in self._records.items():
+            if record is not None and record[3] == keyframe:
+                data = dumps_bricksdict(self._decompress(frame))
+                self._records[frame] = (zlib.crc32(data), len(data), zlib.compress(data, _DEEP_CACHE_COMPRESSION), "")
+        self._keyframes.pop(keyframe, None)
+
+
+def deep_cache_data(obj):
+    """ returns bytes stored in the deep cache for bricksdict (or FrameCache/dict of animation frame bricksdicts) """
+    if isinstance(obj, (dict, FrameCache)):
+        return _as_frame_cache(obj).dumps()
+    return dumps_bricksdict(obj)
+
+
+def encode_deep_cache(obj, data:bytes=None):
+    """ returns text for 'cm.bfm_cache' storing bricksdict (or FrameCache/dict of animation frame bricksdicts) """
+    data = data or deep_cache_data(obj)
+    if isinstance(obj, (dict, FrameCache)):
+        kind, payload = _DEEP_CACHE_FRAMES, data
+    else:
+        kind, payload = _DEEP_CACHE_BRICKSDICT, zlib.compress(data, _DEEP_CACHE_COMPRESSION)
+    header = _DEEP_CACHE_HEADER.pack(_DEEP_CACHE_MAGIC, _DEEP_CACHE_VERSION, kind, zlib.crc32(data), len(data))
+    return base64.b64encode(header + payload).decode("ascii")
+
+
+def decode_deep_cache(string:str):
+    """ returns bricksdict (or FrameCache of animation frame bricksdicts) stored in text returned by 'encode_deep_cache'
+
+    NOTE: frames of a FrameCache are only decompressed when accessed
+    """
+    header = _read_deep_cache_header(string)
+    # deep caches of older versions were stored as hex strings of the marshalled bricksdict
+    if header is None:
+        return _as_frame_cache(loads_bricksdict(bytes.fromhex(string)))
+    kind = header[2]
+    payload = base64.b64decode(string)[_DEEP_CACHE_HEADER.size:]
+    data = zlib.decompress(payload) if kind == _DEEP_CACHE_BRICKSDICT else payload
+    if zlib.crc32(data) != header[3]:
+        raise ValueError("Bricker deep cache is corrupt (checksum mismatch)")
+    if kind == _DEEP_CACHE_BRICKSDICT:
+        # (deep caches of version 1 also stored dicts of animation frame bricksdicts this way)
+        return _as_frame_cache(loads_bricksdict(data))
+    return FrameCache.loads(data, version=header[1])
+
+
+def deep_cache_is_current(string:str, data:bytes):
+    """ checks if text returned by 'encode_deep_cache' already stores 'data' (bytes returned by 'deep_cache_data') """
+    header = _read_deep_cache_header(string)
+    return header is not None and header[3:] == (zlib.crc32(data), len(data))
+
+
+def _as_frame_cache(obj):
+    # store plain dicts of animation frame bricksdicts in a FrameCache (leave anything else as is)
+    return FrameCache(obj) if isinstance(obj, dict) else obj
+
+
+def _read_deep_cache_header(string:str):
+    if len(string) < _DEEP_CACHE_HEADER_LEN:
+        return None
+    try:
+        header = _DEEP_CACHE_HEADER.unpack(base64.b64decode(string[:_DEEP_CACHE_HEADER_LEN]))
+    except ValueError:
+        return None
+    if header[0] != _DEEP_CACHE_MAGIC:
+        return None
+    if header[1] > _DEEP_CACHE_VERSION:
+        raise ValueError("Bricker deep cache was written by a newer version of Bricker")
+    return header
@@ -32,9 +32,8 @@ def is_brick_exposed(bricksdict, zstep, key=None, loc=None):
     """ return top and bottom exposure of brick loc/key """
     assert key is not None or loc is not None
     # initialize vars
-    key = key or list_to_str(loc)
-    loc = loc or get_dict_loc(bricksdict, key)
-    keys_in_brick = get_keys_in_brick(bricksdict, bricksdict[key]["size"], zstep, loc=loc)
+    key = key or loc_to_key(loc)
+    keys_in_brick = get_keys_in_brick(bricksdict, bricksdict[key]["size"], zstep, key=key)
     top_exposed, bot_exposed = False, False
     # top or bottom exposed if even one location is exposed
     for k in keys_in_brick:
@@ -47,9 +46,8 @@ def set_all_brick_exposures(bricksdict, zstep, key=None, loc=None):
     """ updates top_exposed/bot_exposed for all bricks in bricksdict """
     assert key is not None or loc is not None
     # initialize vars
-    key = key or list_to_str(loc)
-    loc = loc or get_dict_loc(bricksdict, key)
-    keys_in_brick = get_keys_in_brick(bricksdict, bricksdict[key]["size"], zstep, loc=loc)
+    key = key or loc_to_key(loc)
+    keys_in_brick = get_keys_in_brick(bricksdict, bricksdict[key]["size"], zstep, key=key)
     top_exposed, bot_exposed = False, False
     # set brick exposures
     for k in keys_in_brick:
@@ -63,17 +61,15 @@ def set_brick_exposure(bricksdict, key=None, loc=None):
     """ set top and bottom exposure of brick loc/key """
     assert key is not None or loc is not None
     # initialize parameters unspecified
-    loc = loc or get_dict_loc(bricksdict, key)
-    key = key or list_to_str(loc)
+    key = key or loc_to_key(loc)
     # get size of brick and break conditions
     try:
         brick_d = bricksdict[key]
     except KeyError:
         return None, None
     # get keys above and below
-    x, y, z = loc
-    key_above = list_to_str((x, y, z + 1))
-    key_below = list_to_str((x, y, z - 1))
+    key_above = key + KEY_STEP[2]
+    key_below = key - KEY_STEP[2]
     # check if brick top or bottom is exposed
     top_exposed = check_exposure(bricksdict, key_above, obscuring_types=get_types_obscuring_below())
     bot_exposed = check_exposure(bricksdict, key_below, obscuring_types=get_types_obscuring_above())
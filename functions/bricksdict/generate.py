@@ -17,7 +17,11 @@
 
 # System imports
 import bmesh
+import importlib
 import math
+import multiprocessing
+import os
+import sys
 import time
 import numpy as np
 
@@ -25,6 +29,7 @@ import numpy as np
 import bpy
 from bpy.types import Object
 from mathutils import Matrix, Vector
+from mathutils.bvhtree import BVHTree
 
 # Module imports
 from ..common import *
@@ -34,13 +39,62 @@ from ..mat_utils import *
 from ..generate_lattice import generate_lattice
 from ..smoke_sim import *
 from ..brick import *
+from ..hash_object import hash_object
+from .columnar import *
+from .standalone.bricker_voxelize import *
+from ...lib.caches import bricker_bvh_cache, bricker_voxel_cache
 
 accs = [0, 0, 0, 0, 0]
 
 
-def cast_rays(obj_eval:Object, point:Vector, direction:Vector, mini_dist:float, round_type:str="CEILING", edge_len:int=0):
+def get_source_bvh(cm, source:Object):
+    """ return BVHTree and triangle arrays for source, rebuilding them only if source has changed since last call
+
+    returned:
+    - bvh      -- BVHTree of source polygons (returned indices are polygon indices)
+    - tris     -- dictionary with flat triangle soup of source mesh (fan triangulated polygons):
+        - 'coords' -- (num_tris, 3, 3) float32 array of triangle vertex coordinates
+        - 'faces'  -- int32 array of polygon index for each triangle
+
     """
-    obj_eval   -- source object to test intersections for
+    source_hash = hash_object(source)
+    cached = bricker_bvh_cache.get(cm.id)
+    if cached is not None and cached["hash"] == source_hash:
+        return cached["bvh"], cached["tris"]
+    # get evaluated mesh data
+    if b280():
+        depsgraph = bpy.context.view_layer.depsgraph
+        obj_eval = source.evaluated_get(depsgraph)
+    else:
+        obj_eval = source
+    mesh = obj_eval.data
+    # get flat arrays of mesh data
+    verts = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", verts)
+    verts = verts.reshape(-1, 3)
+    loop_starts = np.empty(len(mesh.polygons), dtype=np.int32)
+    loop_totals = np.empty(len(mesh.polygons), dtype=np.int32)
+    mesh.polygons.foreach_get("loop_start", loop_starts)
+    mesh.polygons.foreach_get("loop_total", loop_totals)
+    loop_verts = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loop_verts)
+    # fan triangulate polygons
+    tris_per_poly = np.maximum(loop_totals - 2, 0)
+    tri_faces = np.repeat(np.arange(len(loop_starts), dtype=np.int32), tris_per_poly)
+    tri_offsets = np.arange(len(tri_faces)) - np.repeat(np.cumsum(tris_per_poly) - tris_per_poly, tris_per_poly)
+    tri_starts = loop_starts[tri_faces]
+    tri_verts = loop_verts[np.stack((tri_starts, tri_starts + tri_offsets + 1, tri_starts + tri_offsets + 2), axis=1)]
+    tris = {"coords": verts[tri_verts], "faces": tri_faces}
+    # build BVHTree from polygons
+    polys = np.split(loop_verts, loop_starts[1:]) if len(loop_starts) > 0 else []
+    bvh = BVHTree.FromPolygons(verts.tolist(), [poly.tolist() for poly in polys])
+    bricker_bvh_cache[cm.id] = {"hash": source_hash, "bvh": bvh, "tris": tris}
+    return bvh, tris
+
+
+def cast_rays(bvh:BVHTree, point:Vector, direction:Vector, mini_dist:float, round_type:str="CEILING", edge_len:int=0):
+    """
+    bvh        -- BVHTree of source object to test intersections for
     point      -- starting point for ray casting
     direction  -- cast ray in this direction
     mini_dist  -- Vector with miniscule amount to add after intersection
@@ -58,8 +112,8 @@ def cast_rays(obj_eval:Object, point:Vector, direction:Vector, mini_dist:float,
     intersections = 0
     # cast rays until no more rays to cast
     while True:
-        _,location,normal,index = obj_eval.ray_cast(starting_point, direction)#distance=edge_len*1.00000000001)
-        if index == -1: break
+        location,normal,index,_ = bvh.ray_cast(starting_point, direction)#distance=edge_len*1.00000000001)
+        if index is None: break
         if intersections == 0:
             first_direction = direction.dot(normal)
         if edge_len != 0:
@@ -84,9 +138,10 @@ def cast_rays(obj_eval:Object, point:Vector, direction:Vector, mini_dist:float,
         return intersections, first_direction
 
 
-def ray_obj_intersections(scn, point, direction, mini_dist:Vector, edge_len, obj, use_normals, insideness_ray_cast_dir, brick_shell):
+def ray_obj_intersections(scn, point, direction, mini_dist:Vector, edge_len, bvh, use_normals, insideness_ray_cast_dir, brick_shell, point_inside:bool=None):
     """
-    cast ray(s) from point in direction to determine insideness and whether edge intersects obj within edge_len
+    cast ray(s) from point in direction to determine insideness and whether edge intersects source BVHTree 'bvh' within edge_len
+    (insideness ray casts are skipped if 'point_inside' was already calculated, e.g. by winding number)
 
     returned:
     - not outside        - 'point' is inside object 'obj'
@@ -101,19 +156,16 @@ def ray_obj_intersections(scn, point, direction, mini_dist:Vector, edge_len, obj
     # initialize variables
     intersections = 0
     outside_L = []
-    if b280():
-        depsgraph = bpy.context.view_layer.depsgraph
-        obj_eval = obj.evaluated_get(depsgraph)
-    else:
-        obj_eval = obj
     # set axis of direction
     axes = "XYZ" if direction[0] > 0 else ("YZX" if direction[1] > 0 else "ZXY")
     # run initial intersection check
-    intersections, first_direction, first_intersection, next_intersection_loc, last_intersection, edge_intersects = cast_rays(obj_eval, point, direction, mini_dist, edge_len=edge_len)
+    intersections, first_direction, first_intersection, next_intersection_loc, last_intersection, edge_intersects = cast_rays(bvh, point, direction, mini_dist, edge_len=edge_len)
 
     if brick_shell == "CONSISTENT" and edge_intersects:
         # skip insideness checks if brick shell doesn't take insideness into account
         outside = True
+    elif point_inside is not None:
+        outside = not point_inside
     else:
         # run initial insideness check(s)
         if insideness_ray_cast_dir == "HIGH EFFICIENCY" or axes[0] in insideness_ray_cast_dir:
@@ -123,7 +175,7 @@ def ray_obj_intersections(scn, point, direction, mini_dist:Vector, edge_len, obj
             else:
                 # double check vert is inside mesh
                 # NOTE: no longer optional because this is almost always necessary
-                count, first_direction = cast_rays(obj_eval, point, -direction, -mini_dist, round_type="FLOOR")
+                count, first_direction = cast_rays(bvh, point, -direction, -mini_dist, round_type="FLOOR")
                 if count%2 == 0 and not (use_normals and first_direction > 0):
                     outside_L[0] = 1
 
@@ -139,13 +191,13 @@ def ray_obj_intersections(scn, point, direction, mini_dist:Vector, edge_len, obj
                     outside_L.append(0)
                     direction = dirs[i][0]
                     mini_dist = dirs[i][1]
-                    count, first_direction = cast_rays(obj_eval, point, direction, mini_dist)
+                    count, first_direction = cast_rays(bvh, point, direction, mini_dist)
                     if count%2 == 0 and not (use_normals and first_direction > 0):
                         outside_L[len(outside_L) - 1] = 1
                     else:
                         # double check vert is inside mesh
                         # NOTE: no longer optional because this is almost always necessary
-                        count, first_direction = cast_rays(obj_eval, point, -direction, -mini_dist, round_type="FLOOR")
+                        count, first_direction = cast_rays(bvh, point, -direction, -mini_dist, round_type="FLOOR")
                         if count%2 == 0 and not (use_normals and first_direction > 0):
                             outside_L[len(outside_L) - 1] = 1
 
@@ -155,30 +207,69 @@ def ray_obj_intersections(scn, point, direction, mini_dist:Vector, edge_len, obj
     # return helpful information
     return not outside, edge_intersects, intersections, next_intersection_loc, first_intersection, last_intersection
 
-def update_bf_matrix(scn, x0, y0, z0, coord_matrix, ray, edge_len, face_idx_matrix, brick_freq_matrix, brick_shell, source, x1, y1, z1, mini_dist, use_normals, insideness_ray_cast_dir):
-    """ update brick_freq_matrix[x0][y0][z0] based on results from ray_obj_intersections """
-    point = coord_matrix[x0][y0][z0]
-    point_inside, edge_intersects, intersections, next_intersection_loc, first_intersection, last_intersection = ray_obj_intersections(scn, point, ray, mini_dist, edge_len, source, use_normals, insideness_ray_cast_dir, brick_shell)
+def new_face_matrix(shape:tuple, sparse:bool=False):
+    """ create arrays storing nearest face intersection for each lattice coordinate (sparse BlockMatrix arrays if 'sparse')
+
+    returned dictionary mirrors the dictionaries returned by 'cast_rays':
+    - idx    -- int32 array of nearest face indices (-1: no nearby face)
+    - dist   -- float32 array of distances to nearest face intersection
+    - loc    -- float32 array of nearest face intersection locations
+    - normal -- float32 array of nearest face intersection normals
 
-    if point_inside and brick_freq_matrix[x0][y0][z0] == 0:
+    """
+    shape = tuple(shape)
+    if sparse:
+        return {
+            "idx": BlockMatrix(shape, np.int32, -1),
+            "dist": BlockMatrix(shape, np.float32, np.inf),
+            "loc": BlockMatrix(shape, np.float32, 0, item_shape=(3,)),
+            "normal": BlockMatrix(shape, np.float32, 0, item_shape=(3,)),
+        }
+    return {
+        "idx": np.full(shape, -1, dtype=np.int32),
+        "dist": np.full(shape, np.inf, dtype=np.float32),
+        "loc": np.zeros(shape + (3,), dtype=np.float32),
+        "normal": np.zeros(shape + (3,), dtype=np.float32),
+    }
+
+
+def set_nearest_face(face_idx_matrix, loc:tuple, intersection:dict):
+    """ store 'intersection' at 'loc' in face_idx_matrix if it is nearer than the current entry """
+    if face_idx_matrix["dist"][loc] <= intersection["dist"]:
+        return
+    face_idx_matrix["idx"][loc] = intersection["idx"]
+    face_idx_matrix["dist"][loc] = intersection["dist"]
+    face_idx_matrix["loc"][loc] = intersection["loc"]
+    face_idx_matrix["normal"][loc] = intersection["normal"]
+
+
+def copy_nearest_face(face_idx_matrix, from_loc:tuple, to_loc:tuple):
+    """ copy nearest face intersection at 'from_loc' to 'to_loc' in face_idx_matrix """
+    for arr in face_idx_matrix.values():
+        arr[to_loc] = arr[from_loc]
+
+
+def update_bf_matrix(scn, x0, y0, z0, point, ray, edge_len, face_idx_matrix, brick_freq_matrix, brick_shell, bvh, x1, y1, z1, mini_dist, use_normals, insideness_ray_cast_dir, point_inside:bool=None):
+    """ update brick_freq_matrix[x0, y0, z0] based on results from ray_obj_intersections ('point' is the coordinate of lattice point [x0, y0, z0]) """
+    point_inside, edge_intersects, intersections, next_intersection_loc, first_intersection, last_intersection = ray_obj_intersections(scn, point, ray, mini_dist, edge_len, bvh, use_normals, insideness_ray_cast_dir, brick_shell, point_inside)
+
+    if point_inside and brick_freq_matrix[x0, y0, z0] == 0:
         # define brick as inside shell
-        brick_freq_matrix[x0][y0][z0] = -1
+        brick_freq_matrix[x0, y0, z0] = -1
     if edge_intersects:
         if (brick_shell in ("INSIDE", "CONSISTENT") and point_inside) or (brick_shell == "OUTSIDE" and not point_inside):
             # define brick as part of shell
-            brick_freq_matrix[x0][y0][z0] = 1
+            brick_freq_matrix[x0, y0, z0] = 1
             # set or update nearest face to brick
-            if type(face_idx_matrix[x0][y0][z0]) != dict or face_idx_matrix[x0][y0][z0]["dist"] > first_intersection["dist"]:
-                face_idx_matrix[x0][y0][z0] = first_intersection
+            set_nearest_face(face_idx_matrix, (x0, y0, z0), first_intersection)
         if (brick_shell in ("INSIDE", "CONSISTENT") and not point_inside) or (brick_shell == "OUTSIDE" and point_inside):
             try:
                 # define brick as part of shell
-                brick_freq_matrix[x1][y1][z1] = 1
+                brick_freq_matrix[x1, y1, z1] = 1
             except IndexError:
                 return -1, None, True
             # set or update nearest face to brick
-            if type(face_idx_matrix[x1][y1][z1]) != dict or face_idx_matrix[x1][y1][z1]["dist"] > last_intersection["dist"]:
-                face_idx_matrix[x1][y1][z1] = last_intersection
+            set_nearest_face(face_idx_matrix, (x1, y1, z1), last_intersection)
 
     return intersections, next_intersection_loc, edge_intersects
 
@@ -243,38 +334,42 @@ def update_internal(bricksdict, cm, keys="ALL", clear_existing=False):
     elif cm.internal_supports == "LATTICE":
         add_lattice_supports(bricksdict, keys, cm.lattice_step, cm.lattice_height, cm.alternate_xy)
 
-def get_brick_matrix(source, face_idx_matrix, coord_matrix, brick_shell, axes="xyz", print_status=True, cursor_status=False):
-    """ returns new brick_freq_matrix """
+def get_brick_matrix(bvh, face_idx_matrix, lattice_origin, lattice_dist, brick_shell, axes="xyz", tris=None, print_status=True, cursor_status=False, propagate_internals=True):
+    """ returns new brick_freq_matrix (ray casting against 'bvh', the BVHTree of the source object; 'tris' is required for winding number insideness) """
     scn, cm, _ = get_active_context_info()
-    brick_freq_matrix = deepcopy(face_idx_matrix)
+    brick_freq_matrix = np.zeros(face_idx_matrix["idx"].shape, dtype=np.float32)
     axes = axes.lower()
-    dist = coord_matrix[1][1][1] - coord_matrix[0][0][0]
+    dist = lattice_dist
     high_efficiency = cm.insideness_ray_cast_dir in ("HIGH EFFICIENCY", "XYZ")
     # runs update functions only once
     verify_exposure = cm.verify_exposure
     use_normals = cm.use_normals
     insideness_ray_cast_dir = cm.insideness_ray_cast_dir
     # initialize Matix sizes
-    x_L = len(brick_freq_matrix)
-    y_L = len(brick_freq_matrix[0])
-    z_L = len(brick_freq_matrix[0][0])
+    x_L, y_L, z_L = brick_freq_matrix.shape
+    # calculate insideness of every lattice point up front for winding numbers (no longer constant between intersections, so casts can't be skipped)
+    winding_inside = get_winding_insideness(tris, lattice_origin, lattice_dist, brick_freq_matrix.shape) if insideness_ray_cast_dir == "WINDING" else None
+    if winding_inside is not None:
+        high_efficiency = False
+    # get lattice coordinates along each axis
+    xs, ys, zs = ([lattice_origin[i] + j * lattice_dist[i] for j in range(n)] for i, n in enumerate(brick_freq_matrix.shape))
 
 
     # initialize values used for printing status
-    denom = (len(brick_freq_matrix[0][0]) + len(brick_freq_matrix[0]) + len(brick_freq_matrix))/100
+    denom = (x_L + y_L + z_L)/100
     if cursor_status:
         wm = bpy.context.window_manager
         wm.progress_begin(0, 100)
 
     def printCurStatus(percentStart, num0, denom0, lastPercent):
         # print status to terminal
-        percent = percentStart + (len(brick_freq_matrix)/denom * (num0/(denom0-1))) / 100
+        percent = percentStart + (x_L/denom * (num0/(denom0-1))) / 100
         update_progress_bars(print_status, cursor_status, percent, 0, "Shell")
         return percent
 
     percent0 = 0
     if "x" in axes:
-        x_ray = coord_matrix[1][0][0] - coord_matrix[0][0][0]
+        x_ray = Vector((lattice_dist.x, 0, 0))
         x_edge_len = x_ray.length
         x_mini_dist = Vector((0.00015, 0.0, 0.0))
         for z in range(z_L):
@@ -285,19 +380,23 @@ def get_brick_matrix(source, face_idx_matrix, coord_matrix, brick_shell, axes="x
                 i = 0
                 for x in range(x_L):
                     # skip current loc if casting ray is unnecessary (sets outside vals to last found val)
-                    if i == 2 and high_efficiency and next_intersection_loc is not None and coord_matrix[x][y][z].x + dist.x + x_mini_dist.x < next_intersection_loc.x:
-                        brick_freq_matrix[x][y][z] = val
+                    if i == 2 and high_efficiency and next_intersection_loc is not None and xs[x] + dist.x + x_mini_dist.x < next_intersection_loc.x:
+                        brick_freq_matrix[x, y, z] = val
                         continue
                     # cast rays and update brick_freq_matrix
-                    intersections, next_intersection_loc, edge_intersects = update_bf_matrix(scn, x, y, z, coord_matrix, x_ray, x_edge_len, face_idx_matrix, brick_freq_matrix, brick_shell, source, x+1, y, z, x_mini_dist, use_normals, insideness_ray_cast_dir)
+                    intersections, next_intersection_loc, edge_intersects = update_bf_matrix(scn, x, y, z, Vector((xs[x], ys[y], zs[z])), x_ray, x_edge_len, face_idx_matrix, brick_freq_matrix, brick_shell, bvh, x+1, y, z, x_mini_dist, use_normals, insideness_ray_cast_dir, None if winding_inside is None else winding_inside[x, y, z])
                     i = 0 if edge_intersects else (2 if i == 1 else 1)
-                    val = brick_freq_matrix[x][y][z]
+                    val = brick_freq_matrix[x, y, z]
                     if intersections == 0:
+                        # define remaining bricks in row as inside shell (points past the last intersection may still be inside by winding number)
+                        if winding_inside is not None:
+                            row = brick_freq_matrix[x+1:, y, z]
+                            row[winding_inside[x+1:, y, z] & (row == 0)] = -1
                         break
 
     percent1 = percent0
     if "y" in axes:
-        y_ray = coord_matrix[0][1][0] - coord_matrix[0][0][0]
+        y_ray = Vector((0, lattice_dist.y, 0))
         y_edge_len = y_ray.length
         y_mini_dist = Vector((0.0, 0.00015, 0.0))
         for z in range(z_L):
@@ -308,21 +407,25 @@ def get_brick_matrix(source, face_idx_matrix, coord_matrix, brick_shell, axes="x
                 i = 0
                 for y in range(y_L):
                     # skip current loc if casting ray is unnecessary (sets outside vals to last found val)
-                    if i == (3 if verify_exposure else 2) and high_efficiency and next_intersection_loc is not None and coord_matrix[x][y][z].y + dist.y + y_mini_dist.y < next_intersection_loc.y:
-                        if brick_freq_matrix[x][y][z] == 0:
-                            brick_freq_matrix[x][y][z] = val
-                        if brick_freq_matrix[x][y][z] == val:
+                    if i == (3 if verify_exposure else 2) and high_efficiency and next_intersection_loc is not None and ys[y] + dist.y + y_mini_dist.y < next_intersection_loc.y:
+                        if brick_freq_matrix[x, y, z] == 0:
+                            brick_freq_matrix[x, y, z] = val
+                        if brick_freq_matrix[x, y, z] == val:
                             continue
                     # cast rays and update brick_freq_matrix
-                    intersections, next_intersection_loc, edge_intersects = update_bf_matrix(scn, x, y, z, coord_matrix, y_ray, y_edge_len, face_idx_matrix, brick_freq_matrix, brick_shell, source, x, y+1, z, y_mini_dist, use_normals, insideness_ray_cast_dir)
+                    intersections, next_intersection_loc, edge_intersects = update_bf_matrix(scn, x, y, z, Vector((xs[x], ys[y], zs[z])), y_ray, y_edge_len, face_idx_matrix, brick_freq_matrix, brick_shell, bvh, x, y+1, z, y_mini_dist, use_normals, insideness_ray_cast_dir, None if winding_inside is None else winding_inside[x, y, z])
                     i = 0 if edge_intersects else (2 if i == 1 else 1)
-                    val = brick_freq_matrix[x][y][z]
+                    val = brick_freq_matrix[x, y, z]
                     if intersections == 0:
+                        # define remaining bricks in row as inside shell (points past the last intersection may still be inside by winding number)
+                        if winding_inside is not None:
+                            row = brick_freq_matrix[x, y+1:, z]
+                            row[winding_inside[x, y+1:, z] & (row == 0)] = -1
                         break
 
     percent2 = percent1
     if "z" in axes:
-        z_ray = coord_matrix[0][0][1] - coord_matrix[0][0][0]
+        z_ray = Vector((0, 0, lattice_dist.z))
         z_edge_len = z_ray.length
         z_mini_dist = Vector((0.0, 0.0, 0.00015))
         for x in range(x_L):
@@ -333,20 +436,136 @@ def get_brick_matrix(source, face_idx_matrix, coord_matrix, brick_shell, axes="x
                 i = 0
                 for z in range(z_L):
                     # skip current loc if casting ray is unnecessary (sets outside vals to last found val)
-                    if i == (3 if verify_exposure else 2) and high_efficiency and next_intersection_loc is not None and coord_matrix[x][y][z].z + dist.z + z_mini_dist.z < next_intersection_loc.z:
-                        if brick_freq_matrix[x][y][z] == 0:
-                            brick_freq_matrix[x][y][z] = val
-                        if brick_freq_matrix[x][y][z] == val:
+                    if i == (3 if verify_exposure else 2) and high_efficiency and next_intersection_loc is not None and zs[z] + dist.z + z_mini_dist.z < next_intersection_loc.z:
+                        if brick_freq_matrix[x, y, z] == 0:
+                            brick_freq_matrix[x, y, z] = val
+                        if brick_freq_matrix[x, y, z] == val:
                             continue
                     # cast rays and update brick_freq_matrix
-                    intersections, next_intersection_loc, edge_intersects = update_bf_matrix(scn, x, y, z, coord_matrix, z_ray, z_edge_len, face_idx_matrix, brick_freq_matrix, brick_shell, source, x, y, z+1, z_mini_dist, use_normals, insideness_ray_cast_dir)
+                    intersections, next_intersection_loc, edge_intersects = update_bf_matrix(scn, x, y, z, Vector((xs[x], ys[y], zs[z])), z_ray, z_edge_len, face_idx_matrix, brick_freq_matrix, brick_shell, bvh, x, y, z+1, z_mini_dist, use_normals, insideness_ray_cast_dir, None if winding_inside is None else winding_inside[x, y, z])
                     i = 0 if edge_intersects else (2 if i == 1 else 1)
-                    val = brick_freq_matrix[x][y][z]
+                    val = brick_freq_matrix[x, y, z]
                     if intersections == 0:
+                        # define remaining bricks in row as inside shell (points past the last intersection may still be inside by winding number)
+                        if winding_inside is not None:
+                            row = brick_freq_matrix[x, y, z+1:]
+                            row[winding_inside[x, y, z+1:] & (row == 0)] = -1
                         break
 
     # mark inside freqs as internal (-1) and outside next to outsides for removal
-    adjust_bfm(brick_freq_matrix, mat_shell_depth=cm.mat_shell_depth, calc_internals=cm.calc_internals, face_idx_matrix=face_idx_matrix, axes=axes)
+    adjust_bfm(brick_freq_matrix, mat_shell_depth=cm.mat_shell_depth, calc_internals=cm.calc_internals, face_idx_matrix=face_idx_matrix, axes=axes, tris=tris, lattice_origin=lattice_origin, lattice_dist=lattice_dist, propagate_internals=propagate_internals)
+
+    # print status to terminal
+    update_progress_bars(print_status, cursor_status, 1, 0, "Shell", end=True)
+
+    return brick_freq_matrix
+
+
+def get_winding_insideness(tris, lattice_origin, lattice_dist, shape:tuple):
+    """ returns bool array of lattice points inside the source by generalized winding number (tolerates holes in non-closed meshes) """
+    tree = build_winding_tree(tris["coords"])
+    winding_numbers = get_lattice_winding_numbers(tree, tris["coords"], lattice_origin, lattice_dist, shape)
+    # NOTE: winding numbers are negative for meshes with flipped normals
+    return np.abs(winding_numbers) >= 0.5
+
+
+def cast_column_rays(bvh:BVHTree, origin:Vector, direction:Vector, mini_dist:Vector):
+    """ cast a single ray from origin in direction through bvh, returning every intersection as (location, normal, index) """
+    hits = []
+    starting_point = origin
+    while True:
+        location,normal,index,_ = bvh.ray_cast(starting_point, direction)
+        if index is None: break
+        hits.append((location, normal, index))
+        starting_point = vec_round(location, precision=6, round_type="CEILING") + mini_dist
+    return hits
+
+
+def get_column_hits(bvh:BVHTree, lattice_origin:Vector, lattice_dist:Vector, shape:tuple, axis:int, print_status=True, cursor_status=False, percent_start=0, percent_range=1, col_mask=None, source_min:float=None):
+    """ cast one ray through every lattice column along 'axis' (or only columns set in 'col_mask') and return the intersections as flat arrays
+    (rays start before 'source_min', the minimum coordinate of the source along 'axis', if the source extends past the start of the lattice)
+
+    returned arrays are sorted by column, then by distance along the column:
+    - cols    -- (num_hits, 2) int array of column indices along the two other axes
+    - pos     -- float array of intersection location along 'axis'
+    - faces   -- int32 array of intersected face indices
+    - locs    -- float32 array of intersection locations
+    - normals -- float32 array of intersection normals
+
+    """
+    ax_u, ax_v = [i for i in range(3) if i != axis]
+    direction = Vector((0, 0, 0))
+    direction[axis] = 1
+    mini_dist = direction * 0.00015
+    cols, locs, normals, faces = [], [], [], []
+    old_percent = percent_start
+    for u in range(shape[ax_u]):
+        old_percent = update_progress_bars(print_status, cursor_status, percent_start + percent_range * u / shape[ax_u], old_percent, "Shell")
+        for v in range(shape[ax_v]):
+            if col_mask is not None and not col_mask[u, v]:
+                continue
+            # start ray one lattice step before the first point of the column
+            origin = lattice_origin.copy()
+            origin[ax_u] += u * lattice_dist[ax_u]
+            origin[ax_v] += v * lattice_dist[ax_v]
+            origin[axis] = min(origin[axis], source_min if source_min is not None else origin[axis]) - lattice_dist[axis]
+            for location, normal, index in cast_column_rays(bvh, origin, direction, mini_dist):
+                cols.append((u, v))
+                locs.append(location)
+                normals.append(normal)
+                faces.append(index)
+    locs = np.array(locs, dtype=np.float32).reshape(-1, 3)
+    return (np.array(cols, dtype=int).reshape(-1, 2),
+            locs[:, axis].astype(float),
+            np.array(faces, dtype=np.int32),
+            locs,
+            np.array(normals, dtype=np.float32).reshape(-1, 3))
+
+
+def get_brick_matrix_scanline(bvh, face_idx_matrix, lattice_origin, lattice_dist, brick_shell, axes="xyz", tris=None, print_status=True, cursor_status=False, propagate_internals=True):
+    """ returns new brick_freq_matrix (equivalent to 'get_brick_matrix', casting a single ray per lattice column) """
+    scn, cm, _ = get_active_context_info()
+    shape = face_idx_matrix["idx"].shape
+    brick_freq_matrix = np.zeros(shape, dtype=np.float32)
+    axes = axes.lower()
+    use_normals = cm.use_normals
+    insideness_ray_cast_dir = cm.insideness_ray_cast_dir
+
+    # get axes that need to be cast for the shell and for insideness calculations
+    if insideness_ray_cast_dir == "XYZ":
+        cast_axes = "xyz"
+    elif insideness_ray_cast_dir in ("HIGH EFFICIENCY", "WINDING"):
+        cast_axes = axes
+    else:
+        cast_axes = axes + insideness_ray_cast_dir.lower()
+    cast_axes = [i for i, axis_name in enumerate("xyz") if axis_name in cast_axes]
+
+    # cast rays through every lattice column
+    column_hits = {}
+    insideness = {}
+    for i, axis in enumerate(cast_axes):
+        positions = lattice_origin[axis] + np.arange(shape[axis]) * lattice_dist[axis]
+        source_min = float(tris["coords"][:, :, axis].min()) if tris is not None and len(tris["coords"]) > 0 else None
+        column_hits[axis] = get_column_hits(bvh, lattice_origin, lattice_dist, shape, axis, print_status, cursor_status, percent_start=i / len(cast_axes), percent_range=1 / len(cast_axes), source_min=source_min)
+        cols, pos, _, _, normals = column_hits[axis]
+        insideness[axis] = get_column_insideness(cols, pos, normals, positions, shape, axis, use_normals)
+    if insideness_ray_cast_dir == "XYZ":
+        point_inside_all = sum(insideness[axis].astype(int) for axis in range(3)) >= 2
+    elif insideness_ray_cast_dir == "WINDING":
+        point_inside_all = get_winding_insideness(tris, lattice_origin, lattice_dist, shape)
+    elif insideness_ray_cast_dir != "HIGH EFFICIENCY":
+        point_inside_all = insideness["XYZ".index(insideness_ray_cast_dir)]
+
+    # calculate shell along each axis from the intersections crossing lattice edges
+    for axis, axis_name in enumerate("xyz"):
+        if axis_name not in axes:
+            continue
+        point_inside = insideness[axis].copy() if insideness_ray_cast_dir == "HIGH EFFICIENCY" else point_inside_all.copy()
+        positions = lattice_origin[axis] + np.arange(shape[axis]) * lattice_dist[axis]
+        update_column_shell(brick_freq_matrix, face_idx_matrix, column_hits[axis], positions, lattice_dist[axis], point_inside, axis, brick_shell)
+
+    # mark inside freqs as internal (-1) and outside next to outsides for removal
+    adjust_bfm(brick_freq_matrix, mat_shell_depth=cm.mat_shell_depth, calc_internals=cm.calc_internals, face_idx_matrix=face_idx_matrix, axes=axes, tris=tris, lattice_origin=lattice_origin, lattice_dist=lattice_dist, propagate_internals=propagate_internals)
 
     # print status to terminal
     update_progress_bars(print_status, cursor_status, 1, 0, "Shell", end=True)
@@ -354,11 +573,321 @@ def get_brick_matrix(source, face_idx_matrix, coord_matrix, brick_shell, axes="x
     return brick_freq_matrix
 
 
+def get_brick_matrix_adaptive(bvh, tris, face_idx_matrix, lattice_origin, lattice_dist, brick_shell, axes="xyz", block_size=8, print_status=True, cursor_status=False, propagate_internals=True):
+    """ returns new brick_freq_matrix (equivalent to 'get_brick_matrix_scanline', casting rays only through blocks of the lattice touching the source surface)
+
+    blocks of block_size^3 lattice points not touching the surface are entirely inside or outside the source (assuming a closed mesh),
+    so their insideness is taken from a single lattice point per block, calculated by casting rays through a coarse lattice
+
+    """
+    scn, cm, _ = get_active_context_info()
+    shape = face_idx_matrix["idx"].shape
+    brick_freq_matrix = np.zeros(shape, dtype=np.float32)
+    axes = axes.lower()
+    use_normals = cm.use_normals
+    insideness_ray_cast_dir = cm.insideness_ray_cast_dir
+
+    # get axes that need to be cast for the shell and for insideness calculations
+    if insideness_ray_cast_dir == "XYZ":
+        cast_axes = "xyz"
+    elif insideness_ray_cast_dir in ("HIGH EFFICIENCY", "WINDING"):
+        cast_axes = axes
+    else:
+        cast_axes = axes + insideness_ray_cast_dir.lower()
+    cast_axes = [i for i, axis_name in enumerate("xyz") if axis_name in cast_axes]
+
+    # get blocks touching the source surface
+    surface_blocks = get_surface_blocks(tris["coords"], lattice_origin, lattice_dist, shape, block_size)
+    block_shape = surface_blocks.shape
+    coarse_dist = lattice_dist * block_size
+
+    column_hits = {}
+    insideness = {}
+    for i, axis in enumerate(cast_axes):
+        ax_u, ax_v = [j for j in range(3) if j != axis]
+        percent_start = i / len(cast_axes)
+        percent_range = 1 / len(cast_axes)
+        source_min = float(tris["coords"][:, :, axis].min()) if len(tris["coords"]) > 0 else None
+        # get insideness of first lattice point in every block from rays through the coarse lattice of these points
+        coarse_positions = lattice_origin[axis] + np.arange(block_shape[axis]) * coarse_dist[axis]
+        cols, pos, _, _, normals = get_column_hits(bvh, lattice_origin, coarse_dist, block_shape, axis, print_status, cursor_status, percent_start, percent_range * 0.1, source_min=source_min)
+        coarse_inside = get_column_insideness(cols, pos, normals, coarse_positions, block_shape, axis, use_normals)
+        for j in range(3):
+            coarse_inside = np.repeat(coarse_inside, block_size, axis=j)
+        coarse_inside = coarse_inside[:shape[0], :shape[1], :shape[2]]
+        # cast rays through full resolution lattice columns passing through blocks touching the surface
+        col_mask = np.repeat(np.repeat(surface_blocks.any(axis=axis), block_size, axis=0), block_size, axis=1)[:shape[ax_u], :shape[ax_v]]
+        positions = lattice_origin[axis] + np.arange(shape[axis]) * lattice_dist[axis]
+        column_hits[axis] = get_column_hits(bvh, lattice_origin, lattice_dist, shape, axis, print_status, cursor_status, percent_start + percent_range * 0.1, percent_range * 0.9, col_mask=col_mask, source_min=source_min)
+        cols, pos, _, _, normals = column_hits[axis]
+        fine_inside = get_column_insideness(cols, pos, normals, positions, shape, axis, use_normals)
+        insideness[axis] = np.where(np.expand_dims(col_mask, axis), fine_inside, coarse_inside)
+    if insideness_ray_cast_dir == "XYZ":
+        point_inside_all = sum(insideness[axis].astype(int) for axis in range(3)) >= 2
+    elif insideness_ray_cast_dir == "WINDING":
+        point_inside_all = get_winding_insideness(tris, lattice_origin, lattice_dist, shape)
+    elif insideness_ray_cast_dir != "HIGH EFFICIENCY":
+        point_inside_all = insideness["XYZ".index(insideness_ray_cast_dir)]
+
+    # calculate shell along each axis from the intersections crossing lattice edges
+    for axis, axis_name in enumerate("xyz"):
+        if axis_name not in axes:
+            continue
+        point_inside = insideness[axis].copy() if insideness_ray_cast_dir == "HIGH EFFICIENCY" else point_inside_all.copy()
+        positions = lattice_origin[axis] + np.arange(shape[axis]) * lattice_dist[axis]
+        update_column_shell(brick_freq_matrix, face_idx_matrix, column_hits[axis], positions, lattice_dist[axis], point_inside, axis, brick_shell)
+
+    # mark inside freqs as internal (-1) and outside next to outsides for removal
+    adjust_bfm(brick_freq_matrix, mat_shell_depth=cm.mat_shell_depth, calc_internals=cm.calc_internals, face_idx_matrix=face_idx_matrix, axes=axes, tris=tris, lattice_origin=lattice_origin, lattice_dist=lattice_dist, propagate_internals=propagate_internals)
+
+    # print status to terminal
+    update_progress_bars(print_status, cursor_status, 1, 0, "Shell", end=True)
+
+    return brick_freq_matrix
+
+
+def get_brick_matrix_surface(tris, face_idx_matrix, lattice_origin, lattice_dist, brick_shell, axes="xyz", print_status=True, cursor_status=False, propagate_internals=True):
+    """ returns new brick_freq_matrix (shell from the lattice cells overlapped by each source triangle, interior filled by column parity)
+
+    unlike the ray casting voxelizers, every cell touching the source surface is found (so thin features between lattice edges are never missed),
+    and cost scales with the surface area of the source rather than the volume of the lattice
+
+    if face_idx_matrix is sparse (see 'new_face_matrix'), a sparse brick_freq_matrix of the shell values is returned (internals aren't calculated)
+
+    """
+    scn, cm, _ = get_active_context_info()
+    shape = face_idx_matrix["idx"].shape
+    sparse = isinstance(face_idx_matrix["idx"], BlockMatrix)
+    axes = axes.lower()
+    lattice_origin = np.array(lattice_origin)
+    lattice_dist = np.array(lattice_dist)
+
+    # get cells overlapped by the source surface
+    cells, dists, faces, locs, normals = get_triangle_cells(tris["coords"], tris["faces"], lattice_origin, lattice_dist, shape)
+    update_progress_bars(print_status, cursor_status, 0.5, 0, "Shell")
+    # calculate insideness of every lattice point (or only of the overlapped cells and their neighbors if sparse)
+    if sparse:
+        point_inside = None
+    else:
+        point_inside = get_surface_insideness(cm, tris, lattice_origin, lattice_dist, shape)
+    # keep cells on the side of the surface set by brick_shell, along with cells whose neighbors are all on the same side (thin features)
+    if brick_shell != "CONSISTENT":
+        unique_cells, cell_idxs = np.unique(cells, axis=0, return_inverse=True)
+        neighbors = (unique_cells[:, np.newaxis] + np.array(((0, 0, 0), (1, 0, 0), (-1, 0, 0), (0, 1, 0), (0, -1, 0), (0, 0, 1), (0, 0, -1)))).reshape(-1, 3)
+        in_lattice = np.all((neighbors >= 0) & (neighbors < shape), axis=1)
+        neighbors_inside = np.zeros(len(neighbors), dtype=bool)
+        if sparse:
+            neighbors_inside[in_lattice] = get_surface_insideness(cm, tris, lattice_origin, lattice_dist, shape, cells=neighbors[in_lattice])
+        else:
+            neighbors_inside[in_lattice] = point_inside[tuple(neighbors[in_lattice].T)]
+        neighbors_inside = neighbors_inside.reshape(-1, 7)
+        neighbors_match = np.all(neighbors_inside[:, 1:] == neighbors_inside[:, :1], axis=1)
+        keep = (neighbors_inside[:, 0] if brick_shell == "INSIDE" else ~neighbors_inside[:, 0]) | neighbors_match
+        kept = keep[cell_idxs.ravel()]
+        cells, dists, faces, locs, normals = cells[kept], dists[kept], faces[kept], locs[kept], normals[kept]
+    # define bricks as inside shell, then define bricks overlapped by the surface as part of shell
+    if sparse:
+        brick_freq_matrix = BlockMatrix(shape, np.float32, np.nan)
+    else:
+        brick_freq_matrix = np.zeros(shape, dtype=np.float32)
+        brick_freq_matrix[point_inside] = -1
+    brick_freq_matrix[tuple(cells.T)] = 1
+    set_nearest_faces(face_idx_matrix, cells, dists, faces, locs, normals)
+
+    # mark inside freqs as internal (-1) and outside next to outsides for removal
+    # NOTE: sparse brick_freq_matrix only stores shell values, which 'adjust_bfm' leaves unchanged when internals aren't calculated
+    if not sparse:
+        adjust_bfm(brick_freq_matrix, mat_shell_depth=cm.mat_shell_depth, calc_internals=cm.calc_internals, face_idx_matrix=face_idx_matrix, axes=axes, tris=tris, lattice_origin=lattice_origin, lattice_dist=lattice_dist, propagate_internals=propagate_internals)
+
+    # print status to terminal
+    update_progress_bars(print_status, cursor_status, 1, 0, "Shell", end=True)
+
+    return brick_freq_matrix
+
+
+def get_surface_insideness(cm, tris, lattice_origin, lattice_dist, shape:tuple, cells=None):
+    """ returns bool array of insideness of every lattice point (or of the lattice points 'cells', an (n, 3) array of lattice indices) for 'get_brick_matrix_surface' """
+    if cm.insideness_ray_cast_dir == "WINDING":
+        if cells is None:
+            return get_winding_insideness(tris, lattice_origin, lattice_dist, shape)
+        winding_numbers = get_winding_numbers(build_winding_tree(tris["coords"]), lattice_origin + cells * lattice_dist)
+        return np.abs(winding_numbers) >= 0.5
+    # calculate insideness by intersection parity along lattice columns
+    # NOTE: shell doesn't depend on insideness of neighboring points along each axis, so 'HIGH EFFICIENCY' only casts along z
+    cast_axes = "xyz" if cm.insideness_ray_cast_dir == "XYZ" else ("z" if cm.insideness_ray_cast_dir == "HIGH EFFICIENCY" else cm.insideness_ray_cast_dir.lower())
+    insideness = []
+    for axis_name in cast_axes:
+        axis = "xyz".index(axis_name)
+        positions = lattice_origin[axis] + np.arange(shape[axis]) * lattice_dist[axis]
+        column_hits = get_triangle_column_hits(tris["coords"], tris["faces"], axis, lattice_origin, lattice_dist, shape)
+        if cells is None:
+            cols, pos, _, _, normals = column_hits
+            insideness.append(get_column_insideness(cols, pos, normals, positions, shape, axis, cm.use_normals))
+        else:
+            insideness.append(get_point_insideness(column_hits, cells, positions, shape, axis, cm.use_normals))
+    return sum(inside.astype(int) for inside in insideness) >= 2 if len(insideness) == 3 else insideness[0]
+
+
+def get_slabs(length:int, num_slabs:int):
+    """ split range(length) into 'num_slabs' (or fewer) contiguous (start, stop) ranges """
+    step = max(1, math.ceil(length / max(1, num_slabs)))
+    return [(i, min(i + step, length)) for i in range(0, length, step)]
+
+
+def merge_boxes(lo, hi):
+    """ returns list of (lo, hi) of disjoint boxes covering the boxes of lattice points from (N, 3) arrays 'lo' (inclusive) to 'hi' (exclusive) """
+    boxes = np.unique(np.hstack((lo, hi)), axis=0)
+    boxes = list(boxes[np.all(boxes[:, 3:] > boxes[:, :3], axis=1)])
+    merged = True
+    while merged:
+        merged = False
+        disjoint = []
+        for box in boxes:
+            for i, other in enumerate(disjoint):
+                if np.all(box[:3] < other[3:]) and np.all(other[:3] < box[3:]):
+                    disjoint[i] = np.concatenate((np.minimum(box[:3], other[:3]), np.maximum(box[3:], other[3:])))
+                    merged = True
+                    break
+            else:
+                disjoint.append(box)
+        boxes = disjoint
+    return [(box[:3], box[3:]) for box in boxes]
+
+
+def import_standalone_module(name:str):
+    """ import module from the 'standalone' directory by its top-level name, so worker processes can import it without bpy """
+    standalone_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "standalone")
+    if standalone_dir not in sys.path:
+        sys.path.append(standalone_dir)
+    return importlib.import_module(name)
+
+
+def get_brick_matrix_parallel(tris, face_idx_matrix, lattice_origin, lattice_dist, brick_shell, axes="xyz", print_status=True, cursor_status=False, propagate_internals=True):
+    """ returns new brick_freq_matrix (equivalent to 'get_brick_matrix_scanline', voxelizing slabs of the lattice in a pool of worker processes) """
+    scn, cm, _ = get_active_context_info()
+    shape = face_idx_matrix["idx"].shape
+    axes = axes.lower()
+    lattice_origin = np.array(lattice_origin)
+    lattice_dist = np.array(lattice_dist)
+    insideness_ray_cast_dir = cm.insideness_ray_cast_dir
+    num_processes = get_addon_preferences().voxelizer_processes or os.cpu_count() or 1
+
+    # set up arrays to be shared with worker processes
+    templates = {
+        "tri_coords": tris["coords"],
+        "tri_faces": tris["faces"],
+        "brick_freq_matrix": np.zeros(shape, dtype=np.float32),
+        "face_idx": face_idx_matrix["idx"],
+        "face_dist": face_idx_matrix["dist"],
+        "face_loc": face_idx_matrix["loc"],
+        "face_normal": face_idx_matrix["normal"],
+    }
+    if insideness_ray_cast_dir == "WINDING":
+        templates["point_inside"] = get_winding_insideness(tris, lattice_origin, lattice_dist, shape)
+    elif insideness_ray_cast_dir != "HIGH EFFICIENCY":
+        inside_axes = "xyz" if insideness_ray_cast_dir == "XYZ" else insideness_ray_cast_dir.lower()
+        for axis_name in inside_axes:
+            templates["inside_" + axis_name] = np.zeros(shape, dtype=bool)
+        templates["point_inside"] = np.zeros(shape, dtype=bool)
+
+    # get tasks for each stage (x and y columns are split into z slabs, z columns are split into x slabs)
+    num_slabs = num_processes * 4
+    def get_tasks(stage, stage_axes, point_inside=None):
+        tasks = []
+        for slab_axis, slab_axes in ((2, [a for a in (0, 1) if a in stage_axes]), (0, [2] if 2 in stage_axes else [])):
+            if not slab_axes:
+                continue
+            for slab in get_slabs(shape[slab_axis], num_slabs):
+                tasks.append({
+                    "stage": stage,
+                    "axes": slab_axes,
+                    "slab_axis": slab_axis,
+                    "slab": slab,
+                    "lattice_origin": lattice_origin,
+                    "lattice_dist": lattice_dist,
+                    "brick_shell": brick_shell,
+                    "use_normals": cm.use_normals,
+                    "point_inside": point_inside,
+                })
+        return tasks
+    # NOTE: z slabs and x slabs overlap, so shell stages for x/y columns and z columns must run separately
+    shell_axes = [i for i, axis_name in enumerate("xyz") if axis_name in axes]
+    point_inside = None if insideness_ray_cast_dir == "HIGH EFFICIENCY" else "point_inside"
+    stages = [get_tasks("SHELL", [axis for axis in shell_axes if axis in stage_axes], point_inside) for stage_axes in ((0, 1), (2,))]
+    if insideness_ray_cast_dir not in ("HIGH EFFICIENCY", "WINDING"):
+        inside_axes = [i for i, axis_name in enumerate("xyz") if axis_name in inside_axes]
+        stages.insert(0, get_tasks("INSIDENESS", inside_axes))
+    num_tasks = sum(len(tasks) for tasks in stages)
+    old_percent = 0
+    completed = 0
+
+    pool = None
+    try:
+        if num_processes > 1:
+            # copy arrays to shared memory and start worker processes
+            ctx = multiprocessing.get_context("spawn")
+            ctx.set_executable(getattr(bpy.app, "binary_path_python", None) or sys.executable)
+            shared = {}
+            arrays = {}
+            for name, arr in templates.items():
+                raw = ctx.RawArray("b", max(arr.nbytes, 1))
+                arrays[name] = np.frombuffer(raw, dtype=arr.dtype, count=arr.size).reshape(arr.shape)
+                arrays[name][...] = arr
+                shared[name] = (raw, arr.dtype.str, arr.shape)
+            voxelizer = import_standalone_module("bricker_voxelize")
+            pool = ctx.Pool(min(num_processes, max(1, max(len(tasks) for tasks in stages))), initializer=voxelizer.init_worker, initargs=(shared,))
+        else:
+            arrays = templates
+        # run each stage of tasks
+        for i, tasks in enumerate(stages):
+            if i == 1 and insideness_ray_cast_dir not in ("HIGH EFFICIENCY", "WINDING"):
+                # combine insideness calculations
+                if insideness_ray_cast_dir == "XYZ":
+                    arrays["point_inside"][...] = (arrays["inside_x"].astype(int) + arrays["inside_y"] + arrays["inside_z"]) >= 2
+                else:
+                    arrays["point_inside"][...] = arrays["inside_" + insideness_ray_cast_dir.lower()]
+            task_results = pool.imap_unordered(voxelizer.voxelize_slab, tasks) if pool else (run_slab_task(task, arrays) for task in tasks)
+            for _ in task_results:
+                completed += 1
+                old_percent = update_progress_bars(print_status, cursor_status, completed / num_tasks, old_percent, "Shell")
+        # copy results from shared memory
+        brick_freq_matrix = arrays["brick_freq_matrix"].copy()
+        for key, name in (("idx", "face_idx"), ("dist", "face_dist"), ("loc", "face_loc"), ("normal", "face_normal")):
+            if arrays[name] is not face_idx_matrix[key]:
+                face_idx_matrix[key][...] = arrays[name]
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    # mark inside freqs as internal (-1) and outside next to outsides for removal
+    adjust_bfm(brick_freq_matrix, mat_shell_depth=cm.mat_shell_depth, calc_internals=cm.calc_internals, face_idx_matrix=face_idx_matrix, axes=axes, tris=tris, lattice_origin=lattice_origin, lattice_dist=lattice_dist, propagate_internals=propagate_internals)
+
+    # print status to terminal
+    update_progress_bars(print_status, cursor_status, 1, 0, "Shell", end=True)
+
+    return brick_freq_matrix
+
+
+def get_smoke_samples(cell_offsets, voxels_per_cell:float, quality:float):
+    """ returns indices of the smoke domain voxels sampled for each brick along one axis, concatenated, with the start and number of samples per brick """
+    # NOTE: first brick of an adaptive domain may start before the domain, so its samples are clamped to the domain
+    lo = np.maximum(np.trunc(voxels_per_cell * cell_offsets).astype(int), 0)
+    hi = np.trunc(voxels_per_cell * (cell_offsets + 1)).astype(int)
+    hi[hi == lo] += 1
+    steps = np.ceil((hi - lo) / quality).astype(int)
+    counts = (hi - lo + steps - 1) // steps
+    starts = np.cumsum(counts) - counts
+    idxs = np.repeat(lo, counts) + (np.arange(counts.sum()) - np.repeat(starts, counts)) * np.repeat(steps, counts)
+    return idxs, starts, counts
+
+
 def get_brick_matrix_smoke(cm, source, face_idx_matrix, brick_shell, source_details, print_status=True, cursor_status=False):
     # source = cm.source_obj
     density_grid, flame_grid, color_grid, domain_res, max_res, adapt, adapt_min, adapt_max = get_smoke_info(source)
-    brick_freq_matrix = deepcopy(face_idx_matrix)
-    color_matrix = deepcopy(face_idx_matrix)
+    shape = face_idx_matrix["idx"].shape
+    brick_freq_matrix = np.zeros(shape, dtype=np.float32)
+    color_matrix = np.zeros(shape + (4,), dtype=np.float32)
     old_percent = 0
     brightness = Vector([(cm.smoke_brightness - 1) / 5]*3)
     sat_mat = get_saturation_matrix(cm.smoke_saturation)
@@ -376,11 +905,11 @@ def get_brick_matrix_smoke(cm, source, face_idx_matrix, brick_shell, source_deta
             return brick_freq_matrix, color_matrix
         start_percent = vec_div(adapt_min - full_min, full_dist)
         end_percent   = vec_div(adapt_max - full_min, full_dist)
-        s_idx = (len(face_idx_matrix) * start_percent.x, len(face_idx_matrix[0]) * start_percent.y, len(face_idx_matrix[0][0]) * start_percent.z)
-        e_idx = (len(face_idx_matrix) * end_percent.x,   len(face_idx_matrix[0]) * end_percent.y,   len(face_idx_matrix[0][0]) * end_percent.z)
+        s_idx = (shape[0] * start_percent.x, shape[1] * start_percent.y, shape[2] * start_percent.z)
+        e_idx = (shape[0] * end_percent.x,   shape[1] * end_percent.y,   shape[2] * end_percent.z)
     else:
         s_idx = (0, 0, 0)
-        e_idx = (len(face_idx_matrix), len(face_idx_matrix[0]), len(face_idx_matrix[0][0]))
+        e_idx = shape
 
     # get number of iterations from s_idx to e_idx for x, y, z
     d = Vector((e_idx[0] - s_idx[0], e_idx[1] - s_idx[1], e_idx[2] - s_idx[2]))
@@ -388,60 +917,50 @@ def get_brick_matrix_smoke(cm, source, face_idx_matrix, brick_shell, source_deta
     if 0 in d:
         return brick_freq_matrix, color_matrix
 
-    # get x/y/z distances
-    xn0 = domain_res[0] / d.x
-    yn0 = domain_res[1] / d.y
-    zn0 = domain_res[2] / d.z
-    denom = d.x
+    # get smoke grids indexed by [x, y, z]
+    grid_shape = tuple(domain_res[::-1])
+    density_grid = np.asarray(density_grid, dtype=np.float64).reshape(grid_shape).transpose()
+    flame_grid = np.asarray(flame_grid, dtype=np.float64).reshape(grid_shape).transpose()
+    color_grid = np.asarray(color_grid, dtype=np.float64).reshape(grid_shape + (4,)).transpose(2, 1, 0, 3)
+
+    # get domain voxels sampled for each brick along x, y, z
+    cell_slices, sample_idxs, sample_starts, sample_counts = [], [], [], []
+    for axis in range(3):
+        cells = np.arange(int(s_idx[axis]), int(e_idx[axis]))
+        cell_slices.append(slice(int(s_idx[axis]), int(e_idx[axis])))
+        idxs, starts, counts = get_smoke_samples(cells - s_idx[axis], domain_res[axis] / d[axis], quality)
+        sample_idxs.append(idxs)
+        sample_starts.append(starts)
+        sample_counts.append(counts)
+    cell_slices = tuple(cell_slices)
+    if 0 in brick_freq_matrix[cell_slices].shape:
+        return brick_freq_matrix, color_matrix
 
-    # set up brick_freq_matrix values
-    for x in range(int(s_idx[0]), int(e_idx[0])):
-        # print status to terminal
-        old_percent = update_progress_bars(print_status, cursor_status, x / denom, old_percent, "Shell")
-        for y in range(int(s_idx[1]), int(e_idx[1])):
-            for z in range(int(s_idx[2]), int(e_idx[2])):
-                d_acc = 0
-                f_acc = 0
-                cs_acc = Vector((0, 0, 0))
-                cf_acc = Vector((0, 0, 0))
-                # get indices for
-                x0 = x - s_idx[0]
-                y0 = y - s_idx[1]
-                z0 = z - s_idx[2]
-                xn = [int(xn0 * x0), int(xn0 * (x0 + 1))]
-                yn = [int(yn0 * y0), int(yn0 * (y0 + 1))]
-                zn = [int(zn0 * z0), int(zn0 * (z0 + 1))]
-                xn[1] += 1 if xn[1] == xn[0] else 0
-                yn[1] += 1 if yn[1] == yn[0] else 0
-                zn[1] += 1 if zn[1] == zn[0] else 0
-                step_x = math.ceil((xn[1] - xn[0]) / quality)
-                step_y = math.ceil((yn[1] - yn[0]) / quality)
-                step_z = math.ceil((zn[1] - zn[0]) / quality)
-                ave_denom = 0
-                for x1 in range(xn[0], xn[1], step_x):
-                    for y1 in range(yn[0], yn[1], step_y):
-                        for z1 in range(zn[0], zn[1], step_z):
-                            cur_idx = (z1 * domain_res[1] + y1) * domain_res[0] + x1
-                            _d = density_grid[cur_idx]
-                            f = flame_grid[cur_idx]
-                            d_acc += _d
-                            f_acc += f
-                            cur_idx_ext = cur_idx * 4
-                            cs_acc += _d * Vector((color_grid[cur_idx_ext], color_grid[cur_idx_ext + 1], color_grid[cur_idx_ext + 2]))
-                            cf_acc += Vector(f * flame_intensity * f * flame_color)
-                            ave_denom += 1
-                d_ave = d_acc / ave_denom
-                f_ave = f_acc / ave_denom
-                alpha = d_ave + f_ave
-                cs_ave = cs_acc / (ave_denom * (d_ave if d_ave != 0 else 1))
-                cf_ave = cf_acc / (ave_denom * (f_ave if f_ave != 0 else 1))
-                c_ave = (cs_ave + cf_ave)
-                # add brightness
-                c_ave += brightness
-                # add saturation
-                c_ave = mathutils_mult(c_ave, sat_mat)
-                brick_freq_matrix[x][y][z] = 0 if alpha < (1 - smoke_density) else 1
-                color_matrix[x][y][z] = list(c_ave) + [alpha]
+    # sum sampled voxels for each brick
+    def get_block_sums(grid):
+        for axis in range(3):
+            grid = np.add.reduceat(np.take(grid, sample_idxs[axis], axis=axis), sample_starts[axis], axis=axis)
+        return grid
+    d_acc = get_block_sums(density_grid)
+    old_percent = update_progress_bars(print_status, cursor_status, 0.2, old_percent, "Shell")
+    f_acc = get_block_sums(flame_grid)
+    old_percent = update_progress_bars(print_status, cursor_status, 0.4, old_percent, "Shell")
+    f2_acc = get_block_sums(flame_grid * flame_grid)
+    old_percent = update_progress_bars(print_status, cursor_status, 0.6, old_percent, "Shell")
+    cs_acc = np.stack([get_block_sums(density_grid * color_grid[:, :, :, i]) for i in range(3)], axis=3)
+    old_percent = update_progress_bars(print_status, cursor_status, 0.8, old_percent, "Shell")
+
+    # get average density, flame and color for each brick
+    ave_denom = sample_counts[0][:, None, None] * sample_counts[1][None, :, None] * sample_counts[2][None, None, :]
+    d_ave = d_acc / ave_denom
+    f_ave = f_acc / ave_denom
+    alpha = d_ave + f_ave
+    cs_ave = cs_acc / (ave_denom * np.where(d_ave != 0, d_ave, 1))[:, :, :, None]
+    cf_ave = (f2_acc * flame_intensity)[:, :, :, None] * np.array(flame_color) / (ave_denom * np.where(f_ave != 0, f_ave, 1))[:, :, :, None]
+    # add brightness and saturation
+    c_ave = (cs_ave + cf_ave + np.array(brightness)) @ np.array(sat_mat)
+    brick_freq_matrix[cell_slices] = np.where(alpha < (1 - smoke_density), 0, 1)
+    color_matrix[cell_slices] = np.concatenate((c_ave, alpha[:, :, :, None]), axis=3)
 
     # mark inside freqs as internal (-1) and outside next to outsides for removal
     adjust_bfm(brick_freq_matrix, mat_shell_depth=cm.mat_shell_depth, calc_internals=cm.calc_internals, axes=False)
@@ -452,120 +971,116 @@ def get_brick_matrix_smoke(cm, source, face_idx_matrix, brick_shell, source_deta
     return brick_freq_matrix, color_matrix
 
 
-def adjust_bfm(brick_freq_matrix, mat_shell_depth, calc_internals, face_idx_matrix=None, axes=""):
-    """ adjust brick_freq_matrix values """
-    shell_vals = []
-    x_L = len(brick_freq_matrix)
-    y_L = len(brick_freq_matrix[0])
-    z_L = len(brick_freq_matrix[0][0])
+def shift_array(arr, offset:int, axis:int, fill_value):
+    """ return copy of 'arr' where result[i] == arr[i + offset] along 'axis' (out of bounds set to 'fill_value') """
+    result = np.full_like(arr, fill_value)
+    src = [slice(None)] * arr.ndim
+    dst = [slice(None)] * arr.ndim
+    if offset > 0:
+        src[axis] = slice(offset, None)
+        dst[axis] = slice(None, -offset)
+    elif offset < 0:
+        src[axis] = slice(None, offset)
+        dst[axis] = slice(-offset, None)
+    result[tuple(dst)] = arr[tuple(src)]
+    return result
+
+
+def adjust_bfm(brick_freq_matrix, mat_shell_depth, calc_internals, face_idx_matrix=None, axes="", tris=None, lattice_origin=None, lattice_dist=None, propagate_internals=True):
+    """ adjust brick_freq_matrix values (outside and unused inside values are set to NaN)
+
+    if 'tris' is given, shell values added for calculation axes other than 'xyz' are attributed to their nearest face
+    if not 'propagate_internals', inside values are left at -1 (see 'update_internal_values')
 
+    """
     # if generating shell outside mesh with less than three axes
     if axes != "xyz":
-        for x in range(x_L):
-            for y in range(y_L):
-                for z in range(z_L):
-                    # if current location is inside (-1) and adjacent location is out of bounds, current location is shell (1)
-                    if (brick_freq_matrix[x][y][z] == -1 and
-                        (("z" not in axes and
-                          (z in (0, z_L-1) or
-                           brick_freq_matrix[x][y][z+1] == 0 or
-                           brick_freq_matrix[x][y][z-1] == 0)) or
-                         ("y" not in axes and
-                          (y in (0, y_L-1) or
-                           brick_freq_matrix[x][y+1][z] == 0 or
-                           brick_freq_matrix[x][y-1][z] == 0)) or
-                         ("x" not in axes and
-                          (x in (0, x_L-1) or
-                           brick_freq_matrix[x+1][y][z] == 0 or
-                           brick_freq_matrix[x-1][y][z] == 0))
-                      )):
-                        brick_freq_matrix[x][y][z] = 1
-                        # TODO: set face_idx_matrix value to nearest shell value using some sort of built in nearest poly to point function
-
-    # # iterate through all values except boundaries
-    # for x in range(1, x_L - 1):
-    #     for y in range(1, y_L - 1):
-    #         for z in range(1, z_L - 1):
-    #             # If inside location (-1) intersects outside location (0), make it ouside (0)
-    #             if (brick_freq_matrix[x][y][z] == -1 and
-    #                 (brick_freq_matrix[x+1][y][z] == 0 or
-    #                  brick_freq_matrix[x-1][y][z] == 0 or
-    #                  brick_freq_matrix[x][y+1][z] == 0 or
-    #                  brick_freq_matrix[x][y-1][z] == 0 or
-    #                  brick_freq_matrix[x][y][z+1] == 0 or
-    #                  brick_freq_matrix[x][y][z-1] == 0)):
-    #                 brick_freq_matrix[x][y][z] = 0
-
-    trash_vals = [0] if calc_internals else [0, -1]
-    all_shell_vals = []
-    # iterate through all values
-    for x in range(x_L):
-        for y in range(y_L):
-            for z in range(z_L):
-                # mark outside and unused inside brick_freq_matrix values for removal
-                if brick_freq_matrix[x][y][z] in trash_vals:
-                    brick_freq_matrix[x][y][z] = None
-                # get shell values for next calc
-                elif calc_internals and brick_freq_matrix[x][y][z] == 1:
-                    if x == 0 or y == 0 or z == 0:
-                        continue
-                    if x == x_L - 1 or y == y_L - 1 or z == z_L - 1:
-                        continue
-                    all_shell_vals.append((x, y, z))
+        inside = brick_freq_matrix == -1
+        outside = brick_freq_matrix == 0
+        new_shell = np.zeros_like(inside)
+        for axis, axis_name in enumerate("xyz"):
+            if axes and axis_name in axes:
+                continue
+            # if current location is inside (-1) and adjacent location is outside or out of bounds, current location is shell (1)
+            new_shell |= shift_array(outside, 1, axis, True) | shift_array(outside, -1, axis, True)
+        new_shell &= inside
+        brick_freq_matrix[new_shell] = 1
+        # set face_idx_matrix values of new shell values without an intersected face to their nearest face
+        if tris is not None and face_idx_matrix is not None:
+            cells = np.argwhere(new_shell & (face_idx_matrix["idx"] == -1))
+            if len(cells) > 0:
+                set_nearest_faces(face_idx_matrix, *get_nearest_faces(tris["coords"], tris["faces"], cells, lattice_origin, lattice_dist, brick_freq_matrix.shape))
+
+    # mark outside and unused inside brick_freq_matrix values for removal
+    trash = brick_freq_matrix == 0
+    if not calc_internals:
+        trash |= brick_freq_matrix == -1
+    brick_freq_matrix[trash] = np.nan
 
     if not calc_internals:
         return
 
-    # iterate through all shell values
-    for x, y, z in all_shell_vals:
-        # If shell location (1) does not intersect outside/trashed location (0, None), make it inside (-1)
-        if brick_freq_matrix[x][y][z] == 1:
-            if all((brick_freq_matrix[x+1][y][z],
-                    brick_freq_matrix[x-1][y][z],
-                    brick_freq_matrix[x][y+1][z],
-                    brick_freq_matrix[x][y-1][z],
-                    brick_freq_matrix[x][y][z+1],
-                    brick_freq_matrix[x][y][z-1])):
-                brick_freq_matrix[x][y][z] = -1
-            else:
-                shell_vals.append((x, y, z))
+    # get shell values (excluding boundaries) for next calc
+    shell = brick_freq_matrix == 1
+    shell[[0, -1], :, :] = False
+    shell[:, [0, -1], :] = False
+    shell[:, :, [0, -1]] = False
+    # If shell location (1) does not intersect outside/trashed location (NaN), make it inside (-1)
+    kept = ~trash
+    enclosed = shell.copy()
+    for axis in range(3):
+        enclosed &= shift_array(kept, 1, axis, False) & shift_array(kept, -1, axis, False)
+    brick_freq_matrix[enclosed] = -1
+
+    if propagate_internals:
+        propagate_internal_values(brick_freq_matrix, np.flatnonzero(shell & ~enclosed), mat_shell_depth, face_idx_matrix)
+
 
+def propagate_internal_values(brick_freq_matrix, layer, mat_shell_depth, face_idx_matrix=None):
+    """ set inside (-1) brick_freq_matrix values up to 50 lattice points from the shell to their distance from it (0.99, 0.98...)
 
-    # Update internals
+    layer           -- flat indices of shell values to propagate from, in visit order
+    face_idx_matrix -- dict of arrays the size of brick_freq_matrix; values within 'mat_shell_depth' of the shell take
+                       their values in each array from the first adjacent value visited
+
+    """
+    # one 6-neighbour layer of inside values per step, starting from the shell values
+    shape = brick_freq_matrix.shape
+    inside = brick_freq_matrix == -1
+    strides = np.array([shape[1] * shape[2], shape[2], 1])
     j = 1
     set_nf = True
     for i in range(50):
         j = round(j-0.01, 2)
-        got_one = False
-        new_shell_vals = []
         if set_nf:
             set_nf = (1 - j) * 100 < mat_shell_depth
-        for x, y, z in shell_vals:
-            idxs_to_check = (
-                (x+1, y, z),
-                (x-1, y, z),
-                (x, y+1, z),
-                (x, y-1, z),
-                (x, y, z+1),
-                (x, y, z-1))
-            # print("*** " + str((x, y, z)) + " ***")
-            for idx in idxs_to_check:
-                # print("*"*25)
-                # print(str(idx))
-                # print(str(len(brick_freq_matrix)), str(len(brick_freq_matrix[0])), str(len(brick_freq_matrix[0][0])))
-                # print("*"*25)
-                try:
-                    cur_val = brick_freq_matrix[idx[0]][idx[1]][idx[2]]
-                except IndexError:
-                    continue
-                if cur_val == -1:
-                    new_shell_vals.append(idx)
-                    brick_freq_matrix[idx[0]][idx[1]][idx[2]] = j
-                    if face_idx_matrix and set_nf: face_idx_matrix[idx[0]][idx[1]][idx[2]] = face_idx_matrix[x][y][z]
-                    got_one = True
-        if not got_one:
+        # get adjacent values in order of (visit order, neighbour offset)
+        layer_loc = np.unravel_index(layer, shape)
+        adjacent, visit_keys = [], []
+        for k, (axis, offset) in enumerate(((0, 1), (0, -1), (1, 1), (1, -1), (2, 1), (2, -1))):
+            in_bounds = np.nonzero((layer_loc[axis] + offset >= 0) & (layer_loc[axis] + offset < shape[axis]))[0]
+            adjacent.append(layer[in_bounds] + offset * strides[axis])
+            visit_keys.append(in_bounds * 6 + k)
+        adjacent = np.concatenate(adjacent)
+        visit_keys = np.concatenate(visit_keys)
+        order = np.argsort(visit_keys)
+        adjacent, visit_keys = adjacent[order], visit_keys[order]
+        # keep first visit of each adjacent inside value
+        new_layer_loc = np.unravel_index(adjacent, shape)
+        is_new = inside[new_layer_loc]
+        adjacent, visit_keys = adjacent[is_new], visit_keys[is_new]
+        first = np.sort(np.unique(adjacent, return_index=True)[1])
+        if len(first) == 0:
             break
-        shell_vals = new_shell_vals
+        new_layer = adjacent[first]
+        new_layer_loc = np.unravel_index(new_layer, shape)
+        brick_freq_matrix[new_layer_loc] = j
+        inside[new_layer_loc] = False
+        if face_idx_matrix and set_nf:
+            source_loc = np.unravel_index(layer[visit_keys[first] // 6], shape)
+            for arr in face_idx_matrix.values():
+                arr[new_layer_loc] = arr[source_loc]
+        layer = new_layer
 
 
 def getThreshold(cm):
@@ -573,13 +1088,12 @@ def getThreshold(cm):
     return 1.01 - (cm.shell_thickness / 100)
 
 
-def create_bricksdict_entry(name:str, loc:list, val:float=0, draw:bool=False, co:tuple=(0, 0, 0), near_face:int=None, near_intersection:str=None, near_normal:tuple=None, rgba:tuple=None, mat_name:str="", custom_mat_name:bool=False, parent:str=None, size:list=None, attempted_merge:bool=False, top_exposed:bool=None, bot_exposed:bool=None, obscures:list=[False]*6, b_type:str=None, flipped:bool=False, rotated:bool=False, created_from:str=None):
+def create_bricksdict_entry(loc:list, val:float=0, draw:bool=False, co:tuple=(0, 0, 0), near_face:int=None, near_intersection:str=None, near_normal:tuple=None, rgba:tuple=None, mat_name:str="", custom_mat_name:bool=False, parent:str=None, size:list=None, attempted_merge:bool=False, top_exposed:bool=None, bot_exposed:bool=None, obscures:list=None, b_type:str=None, flipped:bool=False, rotated:bool=False, created_from:str=None):
     """
     create an entry in the dictionary of brick locations
 
     Keyword Arguments:
-    name              -- name of the brick object
-    loc               -- str_to_list(key)
+    loc               -- key_to_loc(key)
     val               -- location of brick in model (0: outside of model, 0.00-1.00: number of bricks away from shell / 100, 1: on shell)
     draw              -- draw the brick in 3D space
     co                -- 1x1 brick centered at this location
@@ -594,15 +1108,16 @@ def create_bricksdict_entry(name:str, loc:list, val:float=0, draw:bool=False, co
     attempted_merge   -- attempt has been made in make_bricks function to merge this brick with nearby bricks
     top_exposed       -- top of brick is visible to camera
     bot_exposed       -- bottom of brick is visible to camera
-    obscures          -- obscures neighboring locations [+z, -z, +x, -x, +y, -y]
+    obscures          -- obscures neighboring locations [+z, -z, +x, -x, +y, -y] (none if None)
     type              -- type of brick
     flipped           -- brick is flipped over non-mirrored axis
     rotated           -- brick is rotated 90 degrees about the Z axis
     created_from      -- key of brick this brick was created from in draw_adjacent
 
     """
-    return {"name": name,
-            "loc": loc,
+    if obscures is None:
+        obscures = [False] * 6
+    return {"loc": loc,
             "val": val,
             "draw": draw,
             "co": co,
@@ -635,82 +1150,37 @@ def make_bricksdict(source, source_details, brick_scale, cursor_status=False):
     scn, cm, n = get_active_context_info()
     # get lattice bmesh
     print("\ngenerating blueprint...")
-    l_scale = source_details.dist
-    offset = source_details.mid
-    if source.parent:
-        offset -= source.parent.location
-        # shift offset to ensure lattice surrounds object
-        offset -= vec_remainder(offset, brick_scale)
-    # get coordinate list from intersections of edges with faces
-    coord_matrix = generate_lattice(brick_scale, l_scale, offset, extra_res=1)
-    if len(coord_matrix) == 0:
-        coord_matrix.append(source_details.mid)
+    lattice_origin, lattice_dist, lattice_shape, offset = get_source_lattice(source, source_details, brick_scale)
     # set calculation_axes
     calculation_axes = cm.calculation_axes if cm.brick_shell == "OUTSIDE" else "XYZ"
-    # set up face_idx_matrix and brick_freq_matrix
-    face_idx_matrix = np.zeros((len(coord_matrix), len(coord_matrix[0]), len(coord_matrix[0][0])), dtype=int).tolist()
+    use_sparse = cm.voxelizer == "SURFACE" and not cm.calc_internals and not cm.is_smoke
+    # voxelize tall lattices a limited number of z layers at a time
+    max_layers = get_addon_preferences().blueprint_layers
+    use_layers = max_layers > 0 and lattice_shape[2] > max_layers and not cm.is_smoke
+    # initialize active keys
+    cm.active_key = (-1, -1, -1)
+    # create bricks dictionary
+    bricksdict = BricksDict()
     if cm.is_smoke:
+        face_idx_matrix = new_face_matrix(lattice_shape)
         brick_freq_matrix, smoke_colors = get_brick_matrix_smoke(cm, source, face_idx_matrix, cm.brick_shell, source_details, cursor_status=cursor_status)
+        bricker_voxel_cache[cm.id] = None
+        locs = np.nonzero(~np.isnan(brick_freq_matrix))
+        drawn_keys = add_bricksdict_entries(bricksdict, source, source_details, brick_freq_matrix, face_idx_matrix, locs, lattice_origin, lattice_dist, offset, smoke_colors=smoke_colors)
     else:
-        brick_freq_matrix = get_brick_matrix(source, face_idx_matrix, coord_matrix, cm.brick_shell, axes=calculation_axes, cursor_status=cursor_status)
-        smoke_colors = None
-    # initialize active keys
-    cm.active_key = (-1, -1, -1)
-
-    # create bricks dictionary with brick_freq_matrix values
-    bricksdict = {}
-    threshold = getThreshold(cm)
-    brick_type = cm.brick_type  # prevents cm.brick_type update function from running over and over in for loop
-    uv_image = cm.uv_image
-    build_is_dirty = cm.build_is_dirty
-    drawn_keys = []
-    source_mats = cm.material_type == "SOURCE"
-    noOffset = vec_round(offset, precision=5) == Vector((0, 0, 0))
-    for x in range(len(coord_matrix)):
-        for y in range(len(coord_matrix[0])):
-            for z in range(len(coord_matrix[0][0])):
-                # skip brick_freq_matrix values set to None
-                if brick_freq_matrix[x][y][z] is None:
-                    continue
-
-                # initialize variables
-                b_key = list_to_str((x, y, z))
-
-                co = coord_matrix[x][y][z].to_tuple() if noOffset else (coord_matrix[x][y][z] - source_details.mid).to_tuple()
-
-                # get material from nearest face intersection point
-                nf = face_idx_matrix[x][y][z]["idx"] if type(face_idx_matrix[x][y][z]) == dict else None
-                ni = face_idx_matrix[x][y][z]["loc"].to_tuple() if type(face_idx_matrix[x][y][z]) == dict else None
-                nn = face_idx_matrix[x][y][z]["normal"] if type(face_idx_matrix[x][y][z]) == dict else None
-                norm_dir = get_normal_direction(nn, slopes=True)
-                b_type = get_brick_type(brick_type)
-                flipped, rotated = get_flip_rot("" if norm_dir is None else norm_dir[1:])
-                if smoke_colors:
-                    rgba = smoke_colors[x][y][z]
-                elif source_mats:
-                    rgba = get_uv_pixel_color(scn, source, nf, ni if ni is None else Vector(ni), uv_image)
-                else:
-                    rgba = (0, 0, 0, 1)
-                draw = brick_freq_matrix[x][y][z] >= threshold
-                # create bricksdict entry for current brick
-                bricksdict[b_key] = create_bricksdict_entry(
-                    name= "Bricker_%(n)s__%(b_key)s" % locals(),
-                    loc= [x, y, z],
-                    val= brick_freq_matrix[x][y][z],
-                    draw= draw,
-                    co= co,
-                    near_face= nf,
-                    near_intersection= ni,
-                    near_normal= norm_dir,
-                    rgba= rgba,
-                    # mat_name= "",  # defined in 'update_materials' function
-                    # obscures= [brick_freq_matrix[x][y][z] != 0]*6,
-                    b_type= b_type,
-                    flipped= flipped,
-                    rotated= rotated,
-                )
-                if build_is_dirty and draw:
-                    drawn_keys.append(b_key)
+        # build BVHTree for ray casting once per blueprint (reused if source is unchanged)
+        bvh, tris = get_source_bvh(cm, source)
+        if use_layers:
+            drawn_keys = add_bricksdict_layers(bricksdict, source, source_details, bvh, tris, lattice_origin, lattice_dist, lattice_shape, offset, calculation_axes, max_layers, sparse=use_sparse, cursor_status=cursor_status)
+        else:
+            # set up face_idx_matrix and brick_freq_matrix (only the blocks of the lattice touching the shell are stored for hollow models from the surface voxelizer)
+            face_idx_matrix = new_face_matrix(lattice_shape, sparse=use_sparse)
+            brick_freq_matrix = get_brick_matrix_for_source(cm, bvh, tris, face_idx_matrix, lattice_origin, lattice_dist, calculation_axes, cursor_status=cursor_status)
+            # get brick_freq_matrix values not set to NaN (in x, y, z order)
+            locs = brick_freq_matrix.get_set_indices() if use_sparse else np.nonzero(~np.isnan(brick_freq_matrix))
+            drawn_keys = add_bricksdict_entries(bricksdict, source, source_details, brick_freq_matrix, face_idx_matrix, locs, lattice_origin, lattice_dist, offset)
+        # store voxelized triangles for incremental updates (see 'update_bricksdict_region')
+        bricker_voxel_cache[cm.id] = {"lattice": (lattice_origin, lattice_dist, lattice_shape, offset), "tris": tris, "settings": get_matrix_settings(cm), "source_hash": None}
 
     # if build_is_dirty, this is done in draw_brick
     if not cm.build_is_dirty:
@@ -720,3 +1190,281 @@ def make_bricksdict(source, source_details, brick_scale, cursor_status=False):
 
     # return list of created Brick objects
     return bricksdict
+
+
+def get_source_lattice(source, source_details, brick_scale):
+    """ returns origin, spacing and shape of the lattice surrounding source, and the offset of the lattice """
+    l_scale = source_details.dist
+    offset = source_details.mid
+    if source.parent:
+        offset -= source.parent.location
+        # shift offset to ensure lattice surrounds object
+        offset -= vec_remainder(offset, brick_scale)
+    # get lattice surrounding source (coordinates are calculated from lattice_origin and lattice_dist)
+    lattice_origin, lattice_dist, lattice_shape = generate_lattice(brick_scale, l_scale, offset, extra_res=1)
+    return lattice_origin, lattice_dist, lattice_shape, offset
+
+
+def get_brick_matrix_for_source(cm, bvh, tris, face_idx_matrix, lattice_origin, lattice_dist, calculation_axes, cursor_status=False, propagate_internals=True):
+    """ returns new brick_freq_matrix for the lattice of face_idx_matrix, using the voxelizer set in cm """
+    if cm.voxelizer == "ADAPTIVE":
+        return get_brick_matrix_adaptive(bvh, tris, face_idx_matrix, lattice_origin, lattice_dist, cm.brick_shell, axes=calculation_axes, cursor_status=cursor_status, propagate_internals=propagate_internals)
+    elif cm.voxelizer == "PARALLEL":
+        return get_brick_matrix_parallel(tris, face_idx_matrix, lattice_origin, lattice_dist, cm.brick_shell, axes=calculation_axes, cursor_status=cursor_status, propagate_internals=propagate_internals)
+    elif cm.voxelizer == "SURFACE":
+        return get_brick_matrix_surface(tris, face_idx_matrix, lattice_origin, lattice_dist, cm.brick_shell, axes=calculation_axes, cursor_status=cursor_status, propagate_internals=propagate_internals)
+    elif cm.voxelizer == "SCANLINE":
+        return get_brick_matrix_scanline(bvh, face_idx_matrix, lattice_origin, lattice_dist, cm.brick_shell, axes=calculation_axes, tris=tris, cursor_status=cursor_status, propagate_internals=propagate_internals)
+    else:
+        return get_brick_matrix(bvh, face_idx_matrix, lattice_origin, lattice_dist, cm.brick_shell, axes=calculation_axes, tris=tris, cursor_status=cursor_status, propagate_internals=propagate_internals)
+
+
+def add_bricksdict_layers(bricksdict, source, source_details, bvh, tris, lattice_origin, lattice_dist, lattice_shape, offset, calculation_axes, max_layers:int, sparse=False, cursor_status=False):
+    """ voxelize lattice and create its bricksdict entries in slabs of up to 'max_layers' z layers, so scratch matrices are only held for one slab at a time
+
+    returns keys of entries to be drawn
+
+    """
+    scn, cm, n = get_active_context_info()
+    # pad each slab so shell values in it are unaffected by the boundary of the padded lattice (internal values are set once
+    # all slabs are voxelized, as 'adjust_bfm' would propagate them up to 50 lattice points into the padding of each slab)
+    margin = 2
+    z_L = lattice_shape[2]
+    drawn_keys = []
+    slabs = []
+    for z_lo in range(0, z_L, max_layers):
+        z_hi = min(z_lo + max_layers, z_L)
+        pad_lo, pad_hi = max(z_lo - margin, 0), min(z_hi + margin, z_L)
+        face_idx_matrix = new_face_matrix((lattice_shape[0], lattice_shape[1], pad_hi - pad_lo), sparse=sparse)
+        slab_origin = lattice_origin + Vector((0, 0, pad_lo * lattice_dist[2]))
+        brick_freq_matrix = get_brick_matrix_for_source(cm, bvh, tris, face_idx_matrix, slab_origin, lattice_dist, calculation_axes, cursor_status=cursor_status, propagate_internals=False)
+        # add entries for values in slab (excluding padding)
+        locs = brick_freq_matrix.get_set_indices() if sparse else np.nonzero(~np.isnan(brick_freq_matrix))
+        in_slab = (locs[2] >= z_lo - pad_lo) & (locs[2] < z_hi - pad_lo)
+        locs = tuple(idxs[in_slab] for idxs in locs)
+        drawn_keys += add_bricksdict_entries(bricksdict, source, source_details, brick_freq_matrix, face_idx_matrix, locs, lattice_origin, lattice_dist, offset, loc_offset=(0, 0, pad_lo))
+        slabs.append((np.array((0, 0, z_lo)), np.array((lattice_shape[0], lattice_shape[1], z_hi))))
+        # free scratch matrices before voxelizing next slab
+        del face_idx_matrix, brick_freq_matrix, locs
+    # set internal values of each slab from the finished bricksdict
+    if cm.calc_internals:
+        changed_rows, _ = update_internal_values(bricksdict, lattice_shape, slabs, cm.mat_shell_depth, getThreshold(cm))
+        if cm.build_is_dirty:
+            drawn_keys += bricksdict.keys_at(changed_rows[bricksdict.column("draw")[changed_rows]])
+    return drawn_keys
+
+
+def update_internal_values(bricksdict, lattice_shape, bands:list, mat_shell_depth:int, threshold:float):
+    """ set internal values of bricksdict entries in 'bands' (list of disjoint (lo, hi) boxes of lattice indices) from the
+    shell values around them, as 'adjust_bfm' does for a voxelizer run with 'propagate_internals'
+
+    internal values are propagated up to 50 lattice points, so only entries within 50 lattice points of each band are read
+
+    returns rows of entries whose values or nearest faces changed, and rows of entries whose nearest face was taken from
+    an adjacent value but no longer is (their own nearest face must be voxelized again, see 'update_bricksdict_region')
+
+    """
+    face_fields = ("near_face", "near_intersection", "near_normal", "rgba", "flipped", "rotated")
+    shape = np.array(lattice_shape)
+    rows = bricksdict.rows()
+    locs = bricksdict.locs(rows)
+    vals = bricksdict.column("val")[rows]
+    near_faces = bricksdict.column("near_face")
+    near_intersections = bricksdict.column("near_intersection")
+    changed_rows, stale_rows = [], []
+    for band_lo, band_hi in bands:
+        win_lo, win_hi = np.maximum(band_lo - 50, 0), np.minimum(band_hi + 50, shape)
+        in_win = np.all((locs >= win_lo) & (locs < win_hi), axis=1)
+        win_rows, win_vals = rows[in_win], vals[in_win]
+        win_locs = tuple((locs[in_win] - win_lo).T)
+        in_band = np.all((locs[in_win] >= band_lo) & (locs[in_win] < band_hi), axis=1)
+        # get matrix of shell (1), inside (-1) and outside (0) values in window (shell values on the boundary of the lattice are not propagated)
+        brick_freq_matrix = np.zeros(tuple(win_hi - win_lo))
+        brick_freq_matrix[win_locs] = np.where(win_vals == 1, 1, -1)
+        on_boundary = np.zeros(brick_freq_matrix.shape, dtype=bool)
+        for axis in range(3):
+            idx = [slice(None)] * 3
+            for i in (0, shape[axis] - 1):
+                if win_lo[axis] <= i < win_hi[axis]:
+                    idx[axis] = i - win_lo[axis]
+                    on_boundary[tuple(idx)] = True
+        # propagate rows of entries to take nearest faces from along with internal values
+        face_rows = np.full(brick_freq_matrix.shape, -1, dtype=np.int64)
+        face_rows[win_locs] = win_rows
+        propagate_internal_values(brick_freq_matrix, np.flatnonzero((brick_freq_matrix == 1) & ~on_boundary), mat_shell_depth, {"row": face_rows})
+        new_vals = brick_freq_matrix[win_locs][in_band]
+        src_rows = face_rows[win_locs][in_band]
+        win_rows, win_vals = win_rows[in_band], win_vals[in_band]
+        # copy nearest faces taken from adjacent values
+        copied = src_rows != win_rows
+        face_changed = copied & ((near_faces[src_rows] != near_faces[win_rows]) | np.any((near_intersections[src_rows] != near_intersections[win_rows]) & ~(np.isnan(near_intersections[src_rows]) & np.isnan(near_intersections[win_rows])), axis=1))
+        bricksdict.copy_rows(src_rows[face_changed], win_rows[face_changed], face_fields)
+        # set changed internal values
+        val_changed = new_vals != win_vals
+        bricksdict.column("val")[win_rows[val_changed]] = new_vals[val_changed]
+        bricksdict.fill(win_rows[val_changed], "draw", new_vals[val_changed] >= threshold, encoded=True)
+        changed_rows.append(win_rows[val_changed | face_changed])
+        # get entries that took their nearest face from an adjacent value before, but no longer do
+        was_copied = (win_vals > 0) & (win_vals < 1) & ((1 - win_vals) * 100 < mat_shell_depth)
+        stale_rows.append(win_rows[was_copied & ~copied])
+    return np.concatenate(changed_rows or [np.empty(0, dtype=np.int64)]), np.concatenate(stale_rows or [np.empty(0, dtype=np.int64)])
+
+
+def add_bricksdict_entries(bricksdict, source, source_details, brick_freq_matrix, face_idx_matrix, locs:tuple, lattice_origin, lattice_dist, offset, loc_offset=(0, 0, 0), smoke_colors=None):
+    """ create bricksdict entries at lattice indices 'locs' (tuple of index arrays into brick_freq_matrix, which starts at lattice index 'loc_offset')
+
+    returns keys of entries to be drawn
+
+    """
+    scn, cm, n = get_active_context_info()
+    threshold = getThreshold(cm)
+    b_type = get_brick_type(cm.brick_type)  # prevents cm.brick_type update function from running over and over in for loop
+    uv_image = cm.uv_image
+    source_mats = cm.material_type == "SOURCE"
+    noOffset = vec_round(offset, precision=5) == Vector((0, 0, 0))
+    # get lattice indices, coordinates and values of each entry
+    lattice_locs = np.column_stack(locs) + np.array(loc_offset, dtype=int)
+    keys = locs_to_keys(lattice_locs).tolist()
+    cos = lattice_locs * np.array(lattice_dist) + np.array(lattice_origin if noOffset else lattice_origin - source_details.mid)
+    vals = np.array([round(val, 2) for val in np.asarray(brick_freq_matrix[locs], dtype=float).tolist()])
+    draw = vals >= threshold
+    # get nearest face intersection of each entry
+    near_faces = np.asarray(face_idx_matrix["idx"][locs], dtype=np.int32)
+    has_face = near_faces != -1
+    near_intersections = np.where(has_face[:, np.newaxis], face_idx_matrix["loc"][locs], np.nan)
+    near_normals = [None] * len(keys)
+    flipped = np.zeros(len(keys), dtype=bool)
+    rotated = np.zeros(len(keys), dtype=bool)
+    if smoke_colors is not None:
+        rgbas = smoke_colors[locs]
+    elif source_mats:
+        rgbas = np.full((len(keys), 4), np.nan)
+    else:
+        rgbas = np.tile((0, 0, 0, 1), (len(keys), 1))
+    normals = face_idx_matrix["normal"][locs]
+    for i in np.flatnonzero(has_face).tolist():
+        norm_dir = get_normal_direction(Vector(normals[i]), slopes=True)
+        near_normals[i] = norm_dir
+        flipped[i], rotated[i] = get_flip_rot("" if norm_dir is None else norm_dir[1:])
+        # get material from nearest face intersection point
+        if smoke_colors is None and source_mats:
+            rgba = get_uv_pixel_color(scn, source, int(near_faces[i]), Vector(near_intersections[i]), uv_image)
+            if rgba is not None:
+                rgbas[i] = rgba
+    # create bricksdict entries
+    bricksdict.add_entries(
+        keys,
+        loc= lattice_locs,
+        val= vals,
+        draw= draw,
+        co= cos,
+        near_face= near_faces,
+        near_intersection= near_intersections,
+        near_normal= near_normals,
+        rgba= rgbas,
+        # mat_name= "",  # defined in 'update_materials' function
+        type= [b_type] * len(keys),
+        flipped= flipped,
+        rotated= rotated,
+    )
+    return [key for key, d in zip(keys, draw.tolist()) if d] if cm.build_is_dirty else []
+
+
+def source_was_edited(cm, source):
+    """ check if source was edited since its blueprint was last generated (see 'store_source_hash') """
+    cached = bricker_voxel_cache.get(cm.id)
+    return cached is not None and cached["source_hash"] is not None and cached["source_hash"] != hash_object(source)
+
+
+def store_source_hash(cm, source):
+    """ store hash of source the current blueprint was generated from """
+    cached = bricker_voxel_cache.get(cm.id)
+    if cached is not None:
+        cached["source_hash"] = hash_object(source)
+
+
+def update_bricksdict_region(bricksdict, source, source_details, brick_scale, cursor_status=False):
+    """ patch bricksdict for edits to the source since it was generated, re-voxelizing only the lattice around each changed face
+
+    returns keys of bricks to re-merge and redraw (entries changed by the patch and bricks overlapping them), or None if the
+    bricksdict must be regenerated (changes to the lattice, matrix settings, or mesh topology)
+
+    """
+    scn, cm, n = get_active_context_info()
+    cached = bricker_voxel_cache.get(cm.id)
+    if cached is None or cached["settings"] != get_matrix_settings(cm):
+        return None
+    lattice_origin, lattice_dist, lattice_shape, offset = get_source_lattice(source, source_details, brick_scale)
+    old_origin, old_dist, old_shape, old_offset = cached["lattice"]
+    if tuple(lattice_shape) != tuple(old_shape) or vec_round(lattice_origin - old_origin, precision=5) != Vector((0, 0, 0)) or vec_round(lattice_dist - old_dist, precision=5) != Vector((0, 0, 0)) or vec_round(offset - old_offset, precision=5) != Vector((0, 0, 0)):
+        return None
+    # get faces changed since the blueprint was generated
+    bvh, tris = get_source_bvh(cm, source)
+    old_tris = cached["tris"]
+    if not np.array_equal(tris["faces"], old_tris["faces"]):
+        return None
+    changed = np.any(tris["coords"] != old_tris["coords"], axis=(1, 2))
+    cached["tris"] = tris
+    if not changed.any():
+        return []
+    # get box of lattice points around each changed face (before and after the edit), as a face only affects the lattice columns
+    # crossing it where they cross it, expanded by the neighboring points 'adjust_bfm' sets shell values of
+    changed_tris = np.concatenate((tris["coords"][changed], old_tris["coords"][changed]))
+    shape = np.array(lattice_shape)
+    lo = np.floor((changed_tris.min(axis=1) - np.array(lattice_origin)) / np.array(lattice_dist)).astype(int) - 1
+    hi = np.ceil((changed_tris.max(axis=1) - np.array(lattice_origin)) / np.array(lattice_dist)).astype(int) + 2
+    boxes = merge_boxes(np.clip(lo, 0, shape), np.clip(hi, 0, shape))
+    if len(boxes) == 0:
+        return []
+    # remove old entries in boxes, getting bricks overlapping them
+    rows = bricksdict.rows()
+    row_locs = bricksdict.locs(rows)
+    in_boxes = np.zeros(len(rows), dtype=bool)
+    for box_lo, box_hi in boxes:
+        in_boxes |= np.all((row_locs >= box_lo) & (row_locs < box_hi), axis=1)
+    overlapping_bricks = bricksdict.bricks_at(rows[in_boxes])
+    bricksdict.remove_rows(rows[in_boxes])
+    # re-voxelize each box (internal values are set below)
+    calculation_axes = cm.calculation_axes if cm.brick_shell == "OUTSIDE" else "XYZ"
+    update_keys = set()
+    for box_lo, box_hi in boxes:
+        box_bfm, box_faces = voxelize_lattice_box(cm, bvh, tris, lattice_origin, lattice_dist, lattice_shape, box_lo, box_hi, calculation_axes, cursor_status=cursor_status)
+        locs = np.nonzero(~np.isnan(box_bfm))
+        add_bricksdict_entries(bricksdict, source, source_details, box_bfm, box_faces, locs, lattice_origin, lattice_dist, offset, loc_offset=box_lo)
+        update_keys.update(locs_to_keys(np.column_stack(locs) + box_lo).tolist())
+    if cm.calc_internals:
+        # set internal values up to 50 lattice points from the boxes, as 'adjust_bfm' propagates them up to 50 lattice points from the shell
+        box_los, box_his = np.array([box[0] for box in boxes]), np.array([box[1] for box in boxes])
+        bands = merge_boxes(np.maximum(box_los - 50, 0), np.minimum(box_his + 50, shape))
+        changed_rows, stale_rows = update_internal_values(bricksdict, lattice_shape, bands, cm.mat_shell_depth, getThreshold(cm))
+        overlapping_bricks.update(bricksdict.bricks_at(np.concatenate((changed_rows, stale_rows))))
+        update_keys.update(bricksdict.keys_at(changed_rows))
+        if len(stale_rows) > 0:
+            # re-voxelize entries that no longer take their nearest face from an adjacent value, keeping their new values
+            stale_locs = bricksdict.locs(stale_rows)
+            stale_vals = bricksdict.column("val")[stale_rows]
+            bricksdict.remove_rows(stale_rows)
+            for box_lo, box_hi in merge_boxes(np.maximum(stale_locs - 1, 0), np.minimum(stale_locs + 2, shape)):
+                box_bfm, box_faces = voxelize_lattice_box(cm, bvh, tris, lattice_origin, lattice_dist, lattice_shape, box_lo, box_hi, calculation_axes, cursor_status=cursor_status)
+                in_box = np.all((stale_locs >= box_lo) & (stale_locs < box_hi), axis=1)
+                locs = tuple((stale_locs[in_box] - box_lo).T)
+                box_bfm[locs] = stale_vals[in_box]
+                add_bricksdict_entries(bricksdict, source, source_details, box_bfm, box_faces, locs, lattice_origin, lattice_dist, offset, loc_offset=box_lo)
+            update_keys.update(locs_to_keys(stale_locs).tolist())
+    # get keys of bricks overlapping the changed entries
+    for loc, size in overlapping_bricks.values():
+        update_keys.update(key for key in get_keys_in_brick(bricksdict, size, cm.zstep, loc=loc) if key in bricksdict)
+    return list(update_keys)
+
+
+def voxelize_lattice_box(cm, bvh, tris, lattice_origin, lattice_dist, lattice_shape, box_lo, box_hi, calculation_axes, cursor_status=False):
+    """ returns brick_freq_matrix and face_idx_matrix of the lattice from index 'box_lo' to 'box_hi' (without propagating internal values)
+
+    the box is voxelized with 2 lattice points of padding, so values in it are unaffected by the boundary of the padded lattice
+
+    """
+    pad_lo, pad_hi = np.maximum(box_lo - 2, 0), np.minimum(box_hi + 2, lattice_shape)
+    face_idx_matrix = new_face_matrix(pad_hi - pad_lo)
+    brick_freq_matrix = get_brick_matrix_for_source(cm, bvh, tris, face_idx_matrix, lattice_origin + Vector([pad_lo[i] * lattice_dist[i] for i in range(3)]), lattice_dist, calculation_axes, cursor_status=cursor_status, propagate_internals=False)
+    box_slice = tuple(slice(box_lo[i] - pad_lo[i], box_hi[i] - pad_lo[i]) for i in range(3))
+    return brick_freq_matrix[box_slice], {key: arr[box_slice] for key, arr in face_idx_matrix.items()}
@@ -112,7 +112,7 @@ def update_brick_sizes(bricksdict, key, available_keys, loc, brick_sizes, zstep,
             # break case 1
             if j >= new_max1: break
             # break case 2
-            key1 = list_to_str((loc[0] + i, loc[1] + j, loc[2]))
+            key1 = key + i * KEY_STEP[0] + j * KEY_STEP[1]
             if not brick_avail(bricksdict, key, key1, merge_internals_h, material_type, merge_inconsistent_mats) or key1 not in available_keys:
                 if j == 0: break_outer2 = True
                 else:      new_max1 = j
@@ -122,7 +122,7 @@ def update_brick_sizes(bricksdict, key, available_keys, loc, brick_sizes, zstep,
                 # break case 1
                 if k >= new_max2: break
                 # break case 2
-                key2 = list_to_str((loc[0] + i, loc[1] + j, loc[2] + k))
+                key2 = key1 + k * KEY_STEP[2]
                 if not brick_avail(bricksdict, key, key2, merge_internals_v, material_type, merge_inconsistent_mats) or key2 not in available_keys:
                     if k == 0: break_outer1 = True
                     else:      new_max2 = k
@@ -186,7 +186,7 @@ def get_num_aligned_edges(bricksdict, size, key, loc, bricks_and_plates=False):
     for l in locs:
         # # factor in height of brick (encourages)
         # if bricks_and_plates:
-        #     k0 = list_to_str(l)
+        #     k0 = loc_to_key(l)
         #     try:
         #         p_brick0 = bricksdict[k0]["parent"]
         #     except KeyError:
@@ -199,7 +199,7 @@ def get_num_aligned_edges(bricksdict, size, key, loc, bricks_and_plates=False):
         #     num_aligned_edges -= p_brick_sz0[2] / 3
         # check number of aligned edges
         l[2] -= 1
-        k = list_to_str(l)
+        k = loc_to_key(l)
         try:
             p_brick_key = bricksdict[k]["parent"]
         except KeyError:
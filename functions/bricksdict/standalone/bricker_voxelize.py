@@ -0,0 +1,781 @@
+# Copyright (C) 2019 Christopher Gearhart
+# chris@bblanimation.com
+# http://bblanimation.com/
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+NumPy voxelization routines shared by Bricker's blueprint generators
+
+NOTE: This module must not import bpy (or anything from the Bricker package) so it
+can be imported by name in the worker processes spawned by the 'PARALLEL' voxelizer
+"""
+
+# System imports
+import numpy as np
+
+
+#################### COLUMN INTERSECTIONS ####################
+
+
+def get_triangle_column_hits(tri_coords, tri_faces, axis:int, lattice_origin, lattice_dist, shape:tuple, col_ranges:tuple=None, max_pairs:int=2000000):
+    """ intersect every lattice column along 'axis' with a triangle soup (equivalent to casting one ray per column)
+
+    Keyword Arguments:
+    tri_coords     -- (num_tris, 3, 3) array of triangle vertex coordinates
+    tri_faces      -- face index of each triangle
+    axis           -- axis of the lattice columns (0: x, 1: y, 2: z)
+    lattice_origin -- coordinate of lattice point (0, 0, 0)
+    lattice_dist   -- distance between lattice points along x, y, z
+    shape          -- number of lattice points along x, y, z
+    col_ranges     -- ((start, stop), (start, stop)) range of column indices along the two other axes (defaults to all)
+    max_pairs      -- max number of candidate triangle/column pairs to test at once
+
+    returns intersections in the format of 'get_column_hits' (column indices relative to 'col_ranges')
+
+    """
+    ax_u, ax_v = [i for i in range(3) if i != axis]
+    col_ranges = col_ranges or ((0, shape[ax_u]), (0, shape[ax_v]))
+    tri_coords = np.asarray(tri_coords, dtype=float)
+    lattice_origin = np.asarray(lattice_origin, dtype=float)
+    lattice_dist = np.asarray(lattice_dist, dtype=float)
+    # get range of column indices within bounds of each triangle
+    tri_uv = tri_coords[:, :, (ax_u, ax_v)]
+    uv_origin = lattice_origin[[ax_u, ax_v]]
+    uv_dist = lattice_dist[[ax_u, ax_v]]
+    col_min = np.ceil((tri_uv.min(axis=1) - uv_origin) / uv_dist).astype(int)
+    col_max = np.floor((tri_uv.max(axis=1) - uv_origin) / uv_dist).astype(int)
+    for i in range(2):
+        col_min[:, i] = np.maximum(col_min[:, i], col_ranges[i][0])
+        col_max[:, i] = np.minimum(col_max[:, i], col_ranges[i][1] - 1)
+    num_cols = np.maximum(col_max - col_min + 1, 0)
+    pair_counts = num_cols[:, 0] * num_cols[:, 1]
+    # test candidate triangle/column pairs in chunks
+    results = []
+    tri_idxs = np.nonzero(pair_counts)[0]
+    cum_pairs = np.cumsum(pair_counts[tri_idxs])
+    chunk_start = 0
+    while chunk_start < len(tri_idxs):
+        pairs_before = cum_pairs[chunk_start - 1] if chunk_start > 0 else 0
+        chunk_end = max(np.searchsorted(cum_pairs, pairs_before + max_pairs, side="right"), chunk_start + 1)
+        chunk = tri_idxs[chunk_start:chunk_end]
+        chunk_start = chunk_end
+        results.append(_intersect_columns(tri_coords[chunk], tri_faces[chunk], col_min[chunk], num_cols[chunk], pair_counts[chunk], axis, ax_u, ax_v, uv_origin, uv_dist))
+    if not results:
+        return (np.zeros((0, 2), dtype=int), np.zeros(0), np.zeros(0, dtype=np.int32), np.zeros((0, 3), dtype=np.float32), np.zeros((0, 3), dtype=np.float32))
+    cols, pos, faces, locs, normals = [np.concatenate(arrs) for arrs in zip(*results)]
+    cols -= (col_ranges[0][0], col_ranges[1][0])
+    # sort intersections by column, then by distance along column
+    order = np.lexsort((pos, cols[:, 1], cols[:, 0]))
+    return cols[order], pos[order], faces[order], locs[order].astype(np.float32), normals[order].astype(np.float32)
+
+
+def _intersect_columns(tri_coords, tri_faces, col_min, num_cols, pair_counts, axis, ax_u, ax_v, uv_origin, uv_dist):
+    """ intersect triangles with the columns in their bounds (see 'get_triangle_column_hits') """
+    # get triangle/column pairs
+    pair_tris = np.repeat(np.arange(len(tri_coords)), pair_counts)
+    pair_offsets = np.arange(len(pair_tris)) - np.repeat(np.cumsum(pair_counts) - pair_counts, pair_counts)
+    cols = col_min[pair_tris] + np.stack((pair_offsets // num_cols[pair_tris, 1], pair_offsets % num_cols[pair_tris, 1]), axis=1)
+    q = uv_origin + cols * uv_dist
+    # get face normals
+    normals = np.cross(tri_coords[:, 1] - tri_coords[:, 0], tri_coords[:, 2] - tri_coords[:, 0])
+    lengths = np.linalg.norm(normals, axis=1)
+    normals /= np.where(lengths == 0, 1, lengths)[:, np.newaxis]
+    # make projected triangles counter-clockwise
+    p = tri_coords[:, :, (ax_u, ax_v)]
+    area = (p[:, 1, 0] - p[:, 0, 0]) * (p[:, 2, 1] - p[:, 0, 1]) - (p[:, 1, 1] - p[:, 0, 1]) * (p[:, 2, 0] - p[:, 0, 0])
+    flip = area < 0
+    p[flip] = p[flip][:, (0, 2, 1)]
+    depths = tri_coords[:, :, axis].copy()
+    depths[flip] = depths[flip][:, (0, 2, 1)]
+    area = np.abs(area)
+    # get barycentric weights of each column (weight 'i' is opposite vertex 'i')
+    weights = []
+    inside = area[pair_tris] > 0
+    for i in range(3):
+        a = p[pair_tris, (i + 1) % 3]
+        b = p[pair_tris, (i + 2) % 3]
+        edge = b - a
+        w = edge[:, 0] * (q[:, 1] - a[:, 1]) - edge[:, 1] * (q[:, 0] - a[:, 0])
+        # top-left fill rule so columns through shared edges intersect exactly one triangle
+        top_left = (edge[:, 1] < 0) | ((edge[:, 1] == 0) & (edge[:, 0] < 0))
+        inside &= (w > 0) | ((w == 0) & top_left)
+        weights.append(w)
+    pair_tris, cols, q = pair_tris[inside], cols[inside], q[inside]
+    weights = np.stack(weights, axis=1)[inside] / area[pair_tris, np.newaxis]
+    pos = (weights * depths[pair_tris]).sum(axis=1)
+    locs = np.empty((len(pos), 3))
+    locs[:, ax_u], locs[:, ax_v], locs[:, axis] = q[:, 0], q[:, 1], pos
+    return cols, pos, tri_faces[pair_tris], locs, normals[pair_tris]
+
+
+#################### SURFACE BLOCKS ####################
+
+
+def get_surface_blocks(tri_coords, lattice_origin, lattice_dist, shape:tuple, block_size:int, max_pairs:int=2000000):
+    """ mark blocks of the lattice that may touch the surface of a triangle soup
+
+    Keyword Arguments:
+    tri_coords     -- (num_tris, 3, 3) array of triangle vertex coordinates
+    lattice_origin -- coordinate of lattice point (0, 0, 0)
+    lattice_dist   -- distance between lattice points along x, y, z
+    shape          -- number of lattice points along x, y, z
+    block_size     -- number of lattice points along each side of a block
+    max_pairs      -- max number of candidate triangle/block pairs to test at once
+
+    returns bool array with one value per block (block [i, j, k] contains lattice points [i * block_size, j * block_size, k * block_size] to [(i + 1) * block_size - 1, ...])
+    NOTE: blocks are expanded by one lattice point in every direction, so every lattice point at either end of a lattice edge crossed by the surface lies in a marked block
+
+    """
+    lattice_origin = np.asarray(lattice_origin, dtype=float)
+    lattice_dist = np.asarray(lattice_dist, dtype=float)
+    shape = np.asarray(shape)
+    block_shape = -(-shape // block_size)
+    surface_blocks = np.zeros(tuple(block_shape), dtype=bool)
+    if len(tri_coords) == 0:
+        return surface_blocks
+    tri_coords = np.asarray(tri_coords, dtype=float)
+    # get range of blocks within bounds of each triangle
+    lo = np.floor((tri_coords.min(axis=1) - lattice_origin) / lattice_dist).astype(int) - 1
+    hi = np.ceil((tri_coords.max(axis=1) - lattice_origin) / lattice_dist).astype(int) + 1
+    in_lattice = np.all((hi >= 0) & (lo < shape), axis=1)
+    lo = np.clip(lo[in_lattice], 0, shape - 1) // block_size
+    hi = np.clip(hi[in_lattice], 0, shape - 1) // block_size
+    tri_coords = tri_coords[in_lattice]
+    num_blocks = hi - lo + 1
+    pair_counts = num_blocks.prod(axis=1)
+    # get triangle planes
+    normals = np.cross(tri_coords[:, 1] - tri_coords[:, 0], tri_coords[:, 2] - tri_coords[:, 0])
+    plane_dists = (normals * tri_coords[:, 0]).sum(axis=1)
+    # half size of expanded blocks
+    half_size = (block_size + 1) * lattice_dist / 2
+    # test candidate triangle/block pairs in chunks
+    tri_idxs = np.arange(len(tri_coords))
+    cum_pairs = np.cumsum(pair_counts)
+    chunk_start = 0
+    while chunk_start < len(tri_idxs):
+        pairs_before = cum_pairs[chunk_start - 1] if chunk_start > 0 else 0
+        chunk_end = max(np.searchsorted(cum_pairs, pairs_before + max_pairs, side="right"), chunk_start + 1)
+        chunk = tri_idxs[chunk_start:chunk_end]
+        chunk_start = chunk_end
+        pair_tris = np.repeat(chunk, pair_counts[chunk])
+        pair_offsets = np.arange(len(pair_tris)) - np.repeat(np.cumsum(pair_counts[chunk]) - pair_counts[chunk], pair_counts[chunk])
+        dims = num_blocks[pair_tris]
+        blocks = lo[pair_tris] + np.stack((pair_offsets // (dims[:, 1] * dims[:, 2]), pair_offsets // dims[:, 2] % dims[:, 1], pair_offsets % dims[:, 2]), axis=1)
+        # keep blocks intersecting the triangle plane
+        centers = lattice_origin + (blocks * block_size + (block_size - 1) / 2) * lattice_dist
+        radii = (np.abs(normals[pair_tris]) * half_size).sum(axis=1)
+        touching = np.abs((normals[pair_tris] * centers).sum(axis=1) - plane_dists[pair_tris]) <= radii * (1 + 1e-6)
+        blocks = blocks[touching]
+        surface_blocks[blocks[:, 0], blocks[:, 1], blocks[:, 2]] = True
+    return surface_blocks
+
+
+#################### SURFACE CELLS ####################
+
+
+def get_triangle_cells(tri_coords, tri_faces, lattice_origin, lattice_dist, shape:tuple, max_pairs:int=2000000):
+    """ find every lattice cell overlapped by a triangle soup (exact triangle/box separating axis test)
+
+    Keyword Arguments:
+    tri_coords     -- (num_tris, 3, 3) array of triangle vertex coordinates
+    tri_faces      -- face index of each triangle
+    lattice_origin -- coordinate of lattice point (0, 0, 0)
+    lattice_dist   -- distance between lattice points along x, y, z
+    shape          -- number of lattice points along x, y, z
+    max_pairs      -- max number of candidate triangle/cell pairs to test at once
+
+    returns one entry per overlapping triangle/cell pair, in the format of 'set_nearest_faces':
+    - cells   -- (n, 3) int array of lattice indices (cell [i, j, k] is the box of size lattice_dist centered on lattice point [i, j, k])
+    - dists   -- float array of distances from the lattice point to the nearest point on the triangle
+    - faces   -- int32 array of face indices
+    - locs    -- float32 array of nearest points on the triangles
+    - normals -- float32 array of triangle normals
+
+    """
+    lattice_origin = np.asarray(lattice_origin, dtype=float)
+    lattice_dist = np.asarray(lattice_dist, dtype=float)
+    shape = np.asarray(shape)
+    tri_coords = np.asarray(tri_coords, dtype=float).reshape(-1, 3, 3)
+    # get range of cells within bounds of each triangle
+    lo = np.ceil((tri_coords.min(axis=1) - lattice_origin) / lattice_dist - 0.5).astype(int)
+    hi = np.floor((tri_coords.max(axis=1) - lattice_origin) / lattice_dist + 0.5).astype(int)
+    lo = np.maximum(lo, 0)
+    hi = np.minimum(hi, shape - 1)
+    num_cells = np.maximum(hi - lo + 1, 0)
+    pair_counts = num_cells.prod(axis=1)
+    # test candidate triangle/cell pairs in chunks
+    results = []
+    tri_idxs = np.nonzero(pair_counts)[0]
+    cum_pairs = np.cumsum(pair_counts[tri_idxs])
+    chunk_start = 0
+    while chunk_start < len(tri_idxs):
+        pairs_before = cum_pairs[chunk_start - 1] if chunk_start > 0 else 0
+        chunk_end = max(np.searchsorted(cum_pairs, pairs_before + max_pairs, side="right"), chunk_start + 1)
+        chunk = tri_idxs[chunk_start:chunk_end]
+        chunk_start = chunk_end
+        results.append(_overlap_cells(tri_coords[chunk], tri_faces[chunk], lo[chunk], num_cells[chunk], pair_counts[chunk], lattice_origin, lattice_dist))
+    if not results:
+        return (np.zeros((0, 3), dtype=int), np.zeros(0), np.zeros(0, dtype=np.int32), np.zeros((0, 3), dtype=np.float32), np.zeros((0, 3), dtype=np.float32))
+    return tuple(np.concatenate(arrs) for arrs in zip(*results))
+
+
+def _overlap_cells(tri_coords, tri_faces, lo, num_cells, pair_counts, lattice_origin, lattice_dist):
+    """ test triangles against the cells in their bounds (see 'get_triangle_cells') """
+    # get triangle/cell pairs
+    pair_tris = np.repeat(np.arange(len(tri_coords)), pair_counts)
+    pair_offsets = np.arange(len(pair_tris)) - np.repeat(np.cumsum(pair_counts) - pair_counts, pair_counts)
+    dims = num_cells[pair_tris]
+    cells = lo[pair_tris] + np.stack((pair_offsets // (dims[:, 1] * dims[:, 2]), pair_offsets // dims[:, 2] % dims[:, 1], pair_offsets % dims[:, 2]), axis=1)
+    centers = lattice_origin + cells * lattice_dist
+    half_size = lattice_dist / 2
+    # get separating axes to test: triangle normal and cross products of triangle edges with the box axes
+    # NOTE: boxes overlapping the triangle bounds were already selected, so the box axes don't need to be tested
+    normals = np.cross(tri_coords[:, 1] - tri_coords[:, 0], tri_coords[:, 2] - tri_coords[:, 0])
+    test_axes = [normals]
+    for i in range(3):
+        edge = tri_coords[:, (i + 1) % 3] - tri_coords[:, i]
+        test_axes += [np.cross(box_axis, edge) for box_axis in np.eye(3)]
+    # triangle and box are separated if their projections onto any axis don't overlap
+    overlapping = np.ones(len(pair_tris), dtype=bool)
+    for test_axis in test_axes:
+        projections = (tri_coords * test_axis[:, np.newaxis]).sum(axis=2)
+        radii = (np.abs(test_axis) * half_size).sum(axis=1) * (1 + 1e-6)
+        tri_min = projections.min(axis=1) - radii
+        tri_max = projections.max(axis=1) + radii
+        center_projections = (centers * test_axis[pair_tris]).sum(axis=1)
+        overlapping &= (tri_min[pair_tris] <= center_projections) & (center_projections <= tri_max[pair_tris])
+    pair_tris, cells, centers = pair_tris[overlapping], cells[overlapping], centers[overlapping]
+    # get nearest point on each triangle to its lattice points
+    locs = get_closest_points(tri_coords[pair_tris], centers)
+    lengths = np.linalg.norm(normals, axis=1)
+    normals /= np.where(lengths == 0, 1, lengths)[:, np.newaxis]
+    return cells, np.linalg.norm(locs - centers, axis=1), tri_faces[pair_tris], locs.astype(np.float32), normals[pair_tris].astype(np.float32)
+
+
+#################### CLOSEST POINTS ####################
+
+
+def get_closest_points(tri_coords, points):
+    """ returns nearest point on each triangle to the corresponding point (see 'Real-Time Collision Detection', Ericson, 5.1.5) """
+    a, b, c = tri_coords[:, 0], tri_coords[:, 1], tri_coords[:, 2]
+    ab, ac = b - a, c - a
+    dot = lambda u, v: (u * v).sum(axis=1)
+    d1, d2 = dot(ab, points - a), dot(ac, points - a)
+    d3, d4 = dot(ab, points - b), dot(ac, points - b)
+    d5, d6 = dot(ab, points - c), dot(ac, points - c)
+    va, vb, vc = d3 * d6 - d5 * d4, d5 * d2 - d1 * d6, d1 * d4 - d3 * d2
+    safe_div = lambda n, d: np.divide(n, d, out=np.zeros_like(n), where=d != 0)
+    # nearest point is in the face region unless one of the vertex or edge regions below applies
+    denom = va + vb + vc
+    closest = a + ab * safe_div(vb, denom)[:, np.newaxis] + ac * safe_div(vc, denom)[:, np.newaxis]
+    regions = (
+        (va <= 0) & (d4 - d3 >= 0) & (d5 - d6 >= 0), b + (c - b) * safe_div(d4 - d3, (d4 - d3) + (d5 - d6))[:, np.newaxis],
+        (vb <= 0) & (d2 >= 0) & (d6 <= 0), a + ac * safe_div(d2, d2 - d6)[:, np.newaxis],
+        (d6 >= 0) & (d5 <= d6), c,
+        (vc <= 0) & (d1 >= 0) & (d3 <= 0), a + ab * safe_div(d1, d1 - d3)[:, np.newaxis],
+        (d3 >= 0) & (d4 <= d3), b,
+        (d1 <= 0) & (d2 <= 0), a,
+    )
+    # apply regions in reverse order of precedence
+    for i in range(0, len(regions), 2):
+        closest = np.where(regions[i][:, np.newaxis], regions[i + 1], closest)
+    return closest
+
+
+def get_nearest_faces(tri_coords, tri_faces, cells, lattice_origin, lattice_dist, shape:tuple, radius:int=1, max_pairs:int=2000000):
+    """ find the nearest triangle of a triangle soup to each lattice point in 'cells' ((n, 3) array of lattice indices)
+
+    only triangles within 'radius' lattice points of each point are tested, doubling the radius for points where no
+    triangle is found within it (cells next to the surface are usually resolved in a single pass)
+
+    returns nearest triangle for each point found, in the format of 'get_triangle_cells'
+
+    """
+    lattice_origin = np.asarray(lattice_origin, dtype=float)
+    lattice_dist = np.asarray(lattice_dist, dtype=float)
+    shape = np.asarray(shape)
+    tri_coords = np.asarray(tri_coords, dtype=float).reshape(-1, 3, 3)
+    normals = np.cross(tri_coords[:, 1] - tri_coords[:, 0], tri_coords[:, 2] - tri_coords[:, 0])
+    lengths = np.linalg.norm(normals, axis=1)
+    normals /= np.where(lengths == 0, 1, lengths)[:, np.newaxis]
+    tri_min = np.floor((tri_coords.min(axis=1) - lattice_origin) / lattice_dist).astype(int)
+    tri_max = np.ceil((tri_coords.max(axis=1) - lattice_origin) / lattice_dist).astype(int)
+    results = []
+    remaining = np.asarray(cells, dtype=int).reshape(-1, 3)
+    while len(remaining) > 0 and len(tri_coords) > 0:
+        # get range of cells within radius of the bounds of each triangle
+        is_remaining = np.zeros(tuple(shape), dtype=bool)
+        is_remaining[tuple(remaining.T)] = True
+        lo = np.maximum(tri_min - radius, 0)
+        hi = np.minimum(tri_max + radius, shape - 1)
+        num_cells = np.maximum(hi - lo + 1, 0)
+        pair_counts = num_cells.prod(axis=1)
+        # test candidate triangle/cell pairs in chunks, keeping nearest triangle to each cell
+        nearest_dists = np.full(tuple(shape), np.inf)
+        found = []
+        tri_idxs = np.nonzero(pair_counts)[0]
+        cum_pairs = np.cumsum(pair_counts[tri_idxs])
+        chunk_start = 0
+        while chunk_start < len(tri_idxs):
+            pairs_before = cum_pairs[chunk_start - 1] if chunk_start > 0 else 0
+            chunk_end = max(np.searchsorted(cum_pairs, pairs_before + max_pairs, side="right"), chunk_start + 1)
+            chunk = tri_idxs[chunk_start:chunk_end]
+            chunk_start = chunk_end
+            pair_tris = np.repeat(chunk, pair_counts[chunk])
+            pair_offsets = np.arange(len(pair_tris)) - np.repeat(np.cumsum(pair_counts[chunk]) - pair_counts[chunk], pair_counts[chunk])
+            dims = num_cells[pair_tris]
+            pair_cells = lo[pair_tris] + np.stack((pair_offsets // (dims[:, 1] * dims[:, 2]), pair_offsets // dims[:, 2] % dims[:, 1], pair_offsets % dims[:, 2]), axis=1)
+            keep = is_remaining[tuple(pair_cells.T)]
+            pair_tris, pair_cells = pair_tris[keep], pair_cells[keep]
+            points = lattice_origin + pair_cells * lattice_dist
+            locs = get_closest_points(tri_coords[pair_tris], points)
+            dists = np.linalg.norm(locs - points, axis=1)
+            # drop pairs further than the nearest triangle already found for their cell
+            nearer = dists < nearest_dists[tuple(pair_cells.T)]
+            np.minimum.at(nearest_dists, tuple(pair_cells[nearer].T), dists[nearer])
+            found.append((pair_cells[nearer], dists[nearer], tri_faces[pair_tris[nearer]], locs[nearer].astype(np.float32), normals[pair_tris[nearer]].astype(np.float32)))
+        # a triangle outside the radius may only be nearer if the nearest triangle found is further than the radius
+        cell_dists = nearest_dists[tuple(remaining.T)]
+        resolved = (cell_dists <= radius * lattice_dist.min()) | (radius >= shape.max())
+        resolved_mask = np.zeros(tuple(shape), dtype=bool)
+        resolved_mask[tuple(remaining[resolved].T)] = True
+        for pair_cells, dists, faces, locs, pair_normals in found:
+            keep = np.nonzero(resolved_mask[tuple(pair_cells.T)] & (dists == nearest_dists[tuple(pair_cells.T)]))[0]
+            # only keep one triangle for each cell where triangles tie
+            keep = keep[np.unique(np.ravel_multi_index(tuple(pair_cells[keep].T), tuple(shape)), return_index=True)[1]]
+            resolved_mask[tuple(pair_cells[keep].T)] = False
+            results.append((pair_cells[keep], dists[keep], faces[keep], locs[keep], pair_normals[keep]))
+        remaining = remaining[~resolved]
+        radius *= 2
+    if not results:
+        return (np.zeros((0, 3), dtype=int), np.zeros(0), np.zeros(0, dtype=np.int32), np.zeros((0, 3), dtype=np.float32), np.zeros((0, 3), dtype=np.float32))
+    return tuple(np.concatenate(arrs) for arrs in zip(*results))
+
+
+#################### COLUMN PARITY ####################
+
+
+def get_column_insideness(cols, pos, normals, positions, shape:tuple, axis:int, use_normals:bool):
+    """ calculate insideness of every lattice point from the sorted intersections of its column (see 'get_column_hits') """
+    ax_u, ax_v = [i for i in range(3) if i != axis]
+    n_u, n_v, n_a = shape[ax_u], shape[ax_v], shape[axis]
+    # count intersections in each span between lattice points along each column
+    spans = np.searchsorted(positions, pos, side="left")
+    span_counts = np.zeros((n_u, n_v, n_a + 1), dtype=int)
+    np.add.at(span_counts, (cols[:, 0], cols[:, 1], spans), 1)
+    # number of intersections behind and in front of each lattice point
+    num_behind = np.cumsum(span_counts, axis=2)[:, :, :n_a]
+    num_total = span_counts.sum(axis=2)[:, :, np.newaxis]
+    num_ahead = num_total - num_behind
+    inside_ahead = num_ahead % 2 == 1
+    inside_behind = num_behind % 2 == 1
+    if use_normals and len(pos) > 0:
+        # first intersection in front of/behind each point, indexed into the flat intersection arrays
+        col_starts = np.cumsum(num_total) - num_total.ravel()
+        first_ahead = col_starts.reshape(n_u, n_v, 1) + num_behind
+        directions = normals[:, axis]
+        inside_ahead |= (num_ahead > 0) & (directions[np.minimum(first_ahead, len(pos) - 1)] > 0)
+        inside_behind |= (num_behind > 0) & (directions[np.maximum(first_ahead - 1, 0)] < 0)
+    inside = inside_ahead & inside_behind
+    # reorder from (u, v, axis) to (x, y, z)
+    return np.moveaxis(inside, 2, axis)
+
+
+def get_point_insideness(column_hits:tuple, cells, positions, shape:tuple, axis:int, use_normals:bool):
+    """ calculate insideness of the lattice points 'cells' ((n, 3) array of lattice indices) from the sorted intersections of their columns
+
+    equivalent to indexing the result of 'get_column_insideness' with 'cells', without allocating the full lattice
+
+    """
+    ax_u, ax_v = [i for i in range(3) if i != axis]
+    cols, pos, _, _, normals = column_hits
+    n_a = shape[axis]
+    # sort key of each intersection and of each point (intersections in the same span between lattice points share a key)
+    spans = np.searchsorted(positions, pos, side="left")
+    hit_keys = (cols[:, 0] * shape[ax_v] + cols[:, 1]) * (n_a + 1) + spans
+    col_keys = (cells[:, ax_u] * shape[ax_v] + cells[:, ax_v]) * (n_a + 1)
+    # number of intersections behind and in front of each lattice point
+    col_starts = np.searchsorted(hit_keys, col_keys, side="left")
+    first_ahead = np.searchsorted(hit_keys, col_keys + cells[:, axis], side="right")
+    num_behind = first_ahead - col_starts
+    num_ahead = np.searchsorted(hit_keys, col_keys + n_a, side="right") - first_ahead
+    inside_ahead = num_ahead % 2 == 1
+    inside_behind = num_behind % 2 == 1
+    if use_normals and len(pos) > 0:
+        directions = normals[:, axis]
+        inside_ahead |= (num_ahead > 0) & (directions[np.minimum(first_ahead, len(pos) - 1)] > 0)
+        inside_behind |= (num_behind > 0) & (directions[np.maximum(first_ahead - 1, 0)] < 0)
+    return inside_ahead & inside_behind
+
+
+def update_column_shell(brick_freq_matrix, face_idx_matrix, column_hits:tuple, positions, lattice_step:float, point_inside, axis:int, brick_shell:str):
+    """ update brick_freq_matrix and face_idx_matrix from the intersections crossing lattice edges along 'axis'
+
+    Keyword Arguments:
+    brick_freq_matrix -- brick_freq_matrix to update with inside (-1) and shell (1) values
+    face_idx_matrix   -- face_idx_matrix to update with nearest face intersections of shell values
+    column_hits       -- sorted column intersections (see 'get_column_hits')
+    positions         -- location of the lattice points along 'axis'
+    lattice_step      -- distance between lattice points along 'axis'
+    point_inside      -- insideness of each lattice point (modified in place)
+    axis              -- axis of the lattice columns (0: x, 1: y, 2: z)
+    brick_shell       -- cm.brick_shell
+
+    """
+    shape = brick_freq_matrix.shape
+    ax_u, ax_v = [i for i in range(3) if i != axis]
+    cols, pos, faces, locs, normals = column_hits
+    # get intersections within lattice edges (edge 'i' connects lattice points 'i' and 'i+1')
+    edges = np.searchsorted(positions, pos, side="left") - 1
+    on_edge = (edges >= 0) & (edges < shape[axis] - 1)
+    hit_idxs = np.nonzero(on_edge)[0]
+    hit_edge_ids = np.ravel_multi_index((cols[hit_idxs, 0], cols[hit_idxs, 1], edges[hit_idxs]), (shape[ax_u], shape[ax_v], shape[axis]))
+    # get first and last intersection along each edge (intersections are sorted along each column)
+    edge_ids, first = np.unique(hit_edge_ids, return_index=True)
+    last = len(hit_idxs) - 1 - np.unique(hit_edge_ids[::-1], return_index=True)[1]
+    first, last = hit_idxs[first], hit_idxs[last]
+    # get lattice locations at start of each intersected edge
+    start_cells = np.zeros((len(edge_ids), 3), dtype=int)
+    start_cells[:, ax_u], start_cells[:, ax_v], start_cells[:, axis] = np.unravel_index(edge_ids, (shape[ax_u], shape[ax_v], shape[axis]))
+    end_cells = start_cells.copy()
+    end_cells[:, axis] += 1
+    # insideness is not calculated for intersected edges when brick shell is consistent
+    if brick_shell == "CONSISTENT":
+        point_inside[tuple(start_cells.T)] = False
+        start_inside = np.zeros(len(edge_ids), dtype=bool)
+    else:
+        start_inside = point_inside[tuple(start_cells.T)]
+    # define bricks as inside shell
+    brick_freq_matrix[point_inside & (brick_freq_matrix == 0)] = -1
+    # define bricks at start or end of intersected edges as part of shell
+    use_start = start_inside if brick_shell in ("INSIDE", "CONSISTENT") else ~start_inside
+    edge_starts = positions[start_cells[:, axis]]
+    shell_cells = np.concatenate((start_cells[use_start], end_cells[~use_start]))
+    hits = np.concatenate((first[use_start], last[~use_start]))
+    dists = np.concatenate((pos[first[use_start]] - edge_starts[use_start], edge_starts[~use_start] + lattice_step - pos[last[~use_start]]))
+    brick_freq_matrix[tuple(shell_cells.T)] = 1
+    set_nearest_faces(face_idx_matrix, shell_cells, dists, faces[hits], locs[hits], normals[hits])
+
+
+def set_nearest_faces(face_idx_matrix, cells, dists, faces, locs, normals):
+    """ batched version of 'set_nearest_face' ('cells' is an (n, 3) array of lattice indices) """
+    if len(cells) == 0:
+        return
+    # keep the nearest intersection for each cell
+    shape = face_idx_matrix["idx"].shape
+    cell_ids = np.ravel_multi_index(cells.T, shape)
+    order = np.lexsort((dists, cell_ids))
+    cell_ids, first = np.unique(cell_ids[order], return_index=True)
+    order = order[first]
+    # only replace existing entries that are further away
+    loc = np.unravel_index(cell_ids, shape)
+    nearer = dists[order] < face_idx_matrix["dist"][loc]
+    loc, order = tuple(idxs[nearer] for idxs in loc), order[nearer]
+    face_idx_matrix["idx"][loc] = faces[order]
+    face_idx_matrix["dist"][loc] = dists[order]
+    face_idx_matrix["loc"][loc] = locs[order]
+    face_idx_matrix["normal"][loc] = normals[order]
+
+
+#################### SPARSE BLOCK MATRIX ####################
+
+
+class BlockMatrix:
+    """ sparse 3D array storing only the blocks of block_size^3 values that have been written to (other values read as 'fill_value')
+
+    supports indexing with a tuple of three ints or three int arrays (like NumPy's integer array indexing), so it can stand in for the
+    brick_freq_matrix and face_idx_matrix arrays of hollow models, where memory scales with the surface area instead of the volume of the lattice
+
+    """
+
+    def __init__(self, shape:tuple, dtype, fill_value=0, block_size:int=8, item_shape:tuple=()):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.fill_value = fill_value
+        self.block_size = block_size
+        self.item_shape = tuple(item_shape)
+        self.block_shape = tuple(-(-n // block_size) for n in self.shape)
+        self.blocks = {}
+
+    @property
+    def nbytes(self):
+        return sum(block.nbytes for block in self.blocks.values())
+
+    def __getitem__(self, idx:tuple):
+        block_ids, offsets, idx_shape = self._locate(idx)
+        values = np.full((block_ids.size,) + self.item_shape, self.fill_value, dtype=self.dtype)
+        for block_id, group in self._group(block_ids):
+            block = self.blocks.get(block_id)
+            if block is not None:
+                values[group] = block[offsets[group]]
+        return values.reshape(idx_shape + self.item_shape) if idx_shape else values[0]
+
+    def __setitem__(self, idx:tuple, values):
+        block_ids, offsets, idx_shape = self._locate(idx)
+        values = np.broadcast_to(np.asarray(values, dtype=self.dtype), idx_shape + self.item_shape).reshape((block_ids.size,) + self.item_shape)
+        for block_id, group in self._group(block_ids):
+            block = self.blocks.get(block_id)
+            if block is None:
+                block = self.blocks[block_id] = np.full((self.block_size ** 3,) + self.item_shape, self.fill_value, dtype=self.dtype)
+            block[offsets[group]] = values[group]
+
+    def get_set_indices(self):
+        """ returns tuple of index arrays of values not equal to fill_value (in x, y, z order, like 'np.nonzero') """
+        b = self.block_size
+        ids = []
+        for block_id, block in self.blocks.items():
+            is_set = ~np.isnan(block) if self.fill_value != self.fill_value else block != self.fill_value
+            offsets = np.nonzero(is_set.reshape(len(block), -1).any(axis=1))[0]
+            block_loc = np.array(np.unravel_index(block_id, self.block_shape))[:, np.newaxis] * b
+            ids.append(block_loc + np.array(np.unravel_index(offsets, (b, b, b))))
+        locs = np.concatenate(ids, axis=1) if ids else np.zeros((3, 0), dtype=int)
+        order = np.argsort(np.ravel_multi_index(tuple(locs), self.shape))
+        return tuple(locs[:, order])
+
+    def _locate(self, idx:tuple):
+        """ returns flat block id and flat offset within the block of each index in 'idx', and the shape of the indices """
+        idx = np.broadcast_arrays(*(np.asarray(i, dtype=int) for i in idx))
+        idx_shape = idx[0].shape
+        idx = [i.ravel() for i in idx]
+        b = self.block_size
+        block_ids = np.ravel_multi_index(tuple(i // b for i in idx), self.block_shape)
+        offsets = np.ravel_multi_index(tuple(i % b for i in idx), (b, b, b))
+        return block_ids, offsets, idx_shape
+
+    def _group(self, block_ids):
+        """ yields each block id in 'block_ids' with the positions where it occurs """
+        if block_ids.size == 1:
+            yield int(block_ids[0]), slice(None)
+            return
+        order = np.argsort(block_ids, kind="stable")
+        unique_ids, starts = np.unique(block_ids[order], return_index=True)
+        for block_id, group in zip(unique_ids.tolist(), np.split(order, starts[1:])):
+            yield block_id, group
+
+
+#################### WINDING NUMBERS ####################
+
+
+def build_winding_tree(tri_coords, leaf_size:int=8, max_depth:int=10):
+    """ build octree over a triangle soup for 'get_winding_numbers'
+
+    triangles are sorted by the Morton code of their centroids, so each node covers a contiguous range of sorted triangles
+    and the children of each node are a contiguous range of nodes in the next level
+
+    returns dictionary with:
+    - tri_coords -- (num_tris, 3, 3) array of triangle vertex coordinates in tree order
+    - levels     -- list of dictionaries for each level of nodes:
+        - starts, ends             -- range of triangles in each node
+        - child_starts, child_ends -- range of child nodes in the next level (empty for the last level)
+        - center                   -- area weighted centroid of each node
+        - radius                   -- max distance from center to the triangles of each node
+        - normal                   -- sum of area weighted triangle normals of each node (dipole used for far away points)
+
+    """
+    tri_coords = np.asarray(tri_coords, dtype=float)
+    num_tris = len(tri_coords)
+    if num_tris == 0:
+        return {"tri_coords": tri_coords, "levels": []}
+    # sort triangles by Morton code of centroids
+    centroids = tri_coords.mean(axis=1)
+    bounds_min = centroids.min(axis=0)
+    bounds_size = np.maximum(centroids.max(axis=0) - bounds_min, 1e-12).max()
+    quantized = np.minimum(((centroids - bounds_min) / bounds_size * 2 ** max_depth).astype(np.int64), 2 ** max_depth - 1)
+    morton = np.zeros(num_tris, dtype=np.int64)
+    for bit in range(max_depth):
+        for axis in range(3):
+            morton |= ((quantized[:, axis] >> bit) & 1) << (3 * bit + axis)
+    order = np.argsort(morton, kind="stable")
+    tri_coords = tri_coords[order]
+    morton = morton[order]
+    # get area weighted normals and centroids of triangles
+    normals = np.cross(tri_coords[:, 1] - tri_coords[:, 0], tri_coords[:, 2] - tri_coords[:, 0]) / 2
+    areas = np.linalg.norm(normals, axis=1)
+    centroids = tri_coords.mean(axis=1)
+    cum_normals = np.concatenate((np.zeros((1, 3)), np.cumsum(normals, axis=0)))
+    cum_areas = np.concatenate(([0], np.cumsum(areas)))
+    cum_centroids = np.concatenate((np.zeros((1, 3)), np.cumsum(centroids * areas[:, np.newaxis], axis=0)))
+    tri_min = tri_coords.min(axis=1)
+    tri_max = tri_coords.max(axis=1)
+    # build levels of octree (nodes are the distinct Morton code prefixes of each level)
+    levels = []
+    prefixes = None
+    for depth in range(max_depth + 1):
+        level_prefixes, starts = np.unique(morton >> (3 * (max_depth - depth)), return_index=True)
+        ends = np.append(starts[1:], num_tris)
+        if levels:
+            # get children of previous level
+            parents = level_prefixes >> 3
+            levels[-1]["child_starts"] = np.searchsorted(parents, prefixes, side="left")
+            levels[-1]["child_ends"] = np.searchsorted(parents, prefixes, side="right")
+        prefixes = level_prefixes
+        area = cum_areas[ends] - cum_areas[starts]
+        node_min = np.minimum.reduceat(tri_min, starts, axis=0)
+        node_max = np.maximum.reduceat(tri_max, starts, axis=0)
+        center = np.where((area > 0)[:, np.newaxis], (cum_centroids[ends] - cum_centroids[starts]) / np.maximum(area, 1e-300)[:, np.newaxis], (node_min + node_max) / 2)
+        radius = np.linalg.norm(np.maximum(node_max - center, center - node_min), axis=1)
+        levels.append({"starts": starts, "ends": ends, "center": center, "radius": radius, "normal": cum_normals[ends] - cum_normals[starts]})
+        if (ends - starts).max() <= leaf_size:
+            break
+    levels[-1]["child_starts"] = levels[-1]["child_ends"] = np.zeros(len(levels[-1]["starts"]), dtype=int)
+    return {"tri_coords": tri_coords, "levels": levels}
+
+
+def get_winding_numbers(tree:dict, points, beta:float=2.0, leaf_size:int=8, chunk_size:int=4096):
+    """ returns generalized winding number of the triangle soup in 'tree' (see 'build_winding_tree') at each point
+
+    nodes further than beta times their radius from a point are approximated by their dipole (Barnes-Hut),
+    and triangles in nearby nodes with no more than leaf_size triangles are summed exactly by their solid angle
+
+    """
+    points = np.asarray(points, dtype=float)
+    winding_numbers = np.zeros(len(points))
+    levels = tree["levels"]
+    if not levels:
+        return winding_numbers
+    tri_coords = tree["tri_coords"]
+    # pack node data for a single lookup per level: center, squared far distance, dipole
+    node_data = [np.column_stack((level["center"], (beta * level["radius"]) ** 2, level["normal"])) for level in levels]
+    for chunk_start in range(0, len(points), chunk_size):
+        q = points[chunk_start:chunk_start + chunk_size]
+        solid_angles = np.zeros(len(q))
+        # traverse tree with (point, node) pairs, starting at the root
+        pair_points = np.arange(len(q))
+        pair_nodes = np.zeros(len(q), dtype=int)
+        for i, level in enumerate(levels):
+            data = node_data[i][pair_nodes]
+            offsets = data[:, :3] - q[pair_points]
+            sq_dists = np.einsum("ij,ij->i", offsets, offsets)
+            far = sq_dists > data[:, 3]
+            # add dipole approximation of far nodes
+            far_angles = np.einsum("ij,ij->i", data[far, 4:], offsets[far]) / sq_dists[far] ** 1.5
+            solid_angles += np.bincount(pair_points[far], weights=far_angles, minlength=len(q))
+            # add exact solid angles of triangles in small nearby nodes
+            counts = level["ends"][pair_nodes] - level["starts"][pair_nodes]
+            leaf = ~far & ((counts <= leaf_size) | (i == len(levels) - 1))
+            counts = counts[leaf]
+            tri_points = np.repeat(pair_points[leaf], counts)
+            tris = np.repeat(level["starts"][pair_nodes[leaf]] - (np.cumsum(counts) - counts), counts) + np.arange(counts.sum())
+            solid_angles += np.bincount(tri_points, weights=get_solid_angles(tri_coords[tris], q[tri_points]), minlength=len(q))
+            # open other nearby nodes
+            opened = ~far & ~leaf
+            pair_points, pair_nodes = pair_points[opened], pair_nodes[opened]
+            num_children = level["child_ends"][pair_nodes] - level["child_starts"][pair_nodes]
+            pair_points = np.repeat(pair_points, num_children)
+            pair_nodes = np.repeat(level["child_starts"][pair_nodes] - (np.cumsum(num_children) - num_children), num_children) + np.arange(num_children.sum())
+        winding_numbers[chunk_start:chunk_start + len(q)] = solid_angles / (4 * np.pi)
+    return winding_numbers
+
+
+def get_lattice_winding_numbers(tree:dict, tri_coords, lattice_origin, lattice_dist, shape:tuple, block_size:int=4):
+    """ returns generalized winding number at every lattice point
+
+    winding numbers are smooth away from the surface, so they are only calculated for lattice points in blocks touching
+    the surface (see 'get_surface_blocks'), and interpolated from the corners of the other blocks
+
+    """
+    lattice_origin = np.asarray(lattice_origin, dtype=float)
+    lattice_dist = np.asarray(lattice_dist, dtype=float)
+    surface_blocks = get_surface_blocks(tri_coords, lattice_origin, lattice_dist, shape, block_size)
+    # get winding numbers at block corners
+    corner_shape = tuple(np.array(surface_blocks.shape) + 1)
+    corners = np.moveaxis(np.mgrid[0:corner_shape[0], 0:corner_shape[1], 0:corner_shape[2]], 0, -1).reshape(-1, 3)
+    winding_numbers = get_winding_numbers(tree, lattice_origin + corners * block_size * lattice_dist).reshape(corner_shape)
+    # interpolate lattice points between corners (trilinear, one axis at a time)
+    for axis in range(3):
+        idxs = np.arange(shape[axis])
+        t = np.expand_dims(idxs % block_size / block_size, tuple(i for i in range(3) if i != axis))
+        blocks = idxs // block_size
+        winding_numbers = np.take(winding_numbers, blocks, axis=axis) * (1 - t) + np.take(winding_numbers, blocks + 1, axis=axis) * t
+    # calculate winding numbers of lattice points in blocks touching the surface
+    for axis in range(3):
+        surface_blocks = np.repeat(surface_blocks, block_size, axis=axis)
+    points = np.nonzero(surface_blocks[:shape[0], :shape[1], :shape[2]])
+    winding_numbers[points] = get_winding_numbers(tree, lattice_origin + np.column_stack(points) * lattice_dist)
+    return winding_numbers
+
+
+def get_solid_angles(tri_coords, points):
+    """ returns signed solid angle of each triangle seen from the corresponding point (Van Oosterom and Strackee) """
+    a, b, c = (tri_coords[:, i] - points for i in range(3))
+    la, lb, lc = (np.linalg.norm(v, axis=1) for v in (a, b, c))
+    numerator = (a * np.cross(b, c)).sum(axis=1)
+    denominator = la * lb * lc + (a * b).sum(axis=1) * lc + (a * c).sum(axis=1) * lb + (b * c).sum(axis=1) * la
+    return 2 * np.arctan2(numerator, denominator)
+
+
+#################### SLAB WORKERS ####################
+
+
+# arrays shared with the parent process (set by 'init_worker')
+_shared_arrays = None
+
+
+def init_worker(shared:dict):
+    """ initialize worker process with NumPy views of the shared arrays ('shared' maps names to (raw_array, dtype, shape)) """
+    global _shared_arrays
+    _shared_arrays = {name: np.frombuffer(raw, dtype=dtype, count=int(np.prod(shape))).reshape(shape) for name, (raw, dtype, shape) in shared.items()}
+
+
+def voxelize_slab(task:dict):
+    """ worker process entry point (see 'run_slab_task') """
+    run_slab_task(task, _shared_arrays)
+    return task["slab"][1] - task["slab"][0]
+
+
+def run_slab_task(task:dict, arrays:dict):
+    """ voxelize one slab of the lattice, writing results to the slab of the shared arrays
+
+    Keyword Arguments:
+    task   -- dictionary with the following keys:
+        - stage          -- "INSIDENESS" to calculate insideness of each axis in 'axes', or "SHELL" to update the shell along each axis in 'axes'
+        - axes           -- axes of the lattice columns to cast (0: x, 1: y, 2: z)
+        - slab_axis      -- axis the lattice was split along
+        - slab           -- (start, stop) range of lattice indices in this slab along slab_axis
+        - lattice_origin -- coordinate of lattice point (0, 0, 0)
+        - lattice_dist   -- distance between lattice points along x, y, z
+        - brick_shell    -- cm.brick_shell
+        - use_normals    -- cm.use_normals
+        - point_inside   -- name of the shared insideness array to use for the shell (None: calculate from the same columns)
+    arrays -- dictionary of shared arrays: 'tri_coords', 'tri_faces', 'brick_freq_matrix', 'face_idx', 'face_dist',
+              'face_loc', 'face_normal', and 'inside_x', 'inside_y', 'inside_z', 'point_inside' if needed
+
+    """
+    slab_axis = task["slab_axis"]
+    slab = task["slab"]
+    shape = arrays["brick_freq_matrix"].shape
+    slab_slice = tuple(slice(*slab) if i == slab_axis else slice(None) for i in range(3))
+    brick_freq_matrix = arrays["brick_freq_matrix"][slab_slice]
+    face_idx_matrix = {
+        "idx": arrays["face_idx"][slab_slice],
+        "dist": arrays["face_dist"][slab_slice],
+        "loc": arrays["face_loc"][slab_slice],
+        "normal": arrays["face_normal"][slab_slice],
+    }
+    for axis in task["axes"]:
+        # cast columns along axis through this slab
+        ax_u, ax_v = [i for i in range(3) if i != axis]
+        col_ranges = tuple(slab if i == slab_axis else (0, shape[i]) for i in (ax_u, ax_v))
+        column_hits = get_triangle_column_hits(arrays["tri_coords"], arrays["tri_faces"], axis, task["lattice_origin"], task["lattice_dist"], shape, col_ranges)
+        positions = task["lattice_origin"][axis] + np.arange(shape[axis]) * task["lattice_dist"][axis]
+        if task["stage"] == "INSIDENESS" or task["point_inside"] is None:
+            cols, pos, _, _, normals = column_hits
+            point_inside = get_column_insideness(cols, pos, normals, positions, brick_freq_matrix.shape, axis, task["use_normals"])
+        else:
+            point_inside = arrays[task["point_inside"]][slab_slice].copy()
+        if task["stage"] == "INSIDENESS":
+            arrays["inside_" + "xyz"[axis]][slab_slice] = point_inside
+        else:
+            update_column_shell(brick_freq_matrix, face_idx_matrix, column_hits, positions, task["lattice_dist"][axis], point_inside, axis, task["brick_shell"])
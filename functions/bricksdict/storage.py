@@ -16,16 +16,18 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 # System imports
-import marshal
+import time
 
 # Blender imports
 import bpy
 
 # Module imports
+from .columnar import *
+from .deep_cache import *
 from .generate import *
 from .modify import *
 from .exposure import *
-from ...lib.caches import bricker_bfm_cache, cache_exists
+from ...lib.caches import bricker_bfm_cache, bricker_deep_cache_costs, bricker_deep_cache_sizes, bricker_deep_cache_stats, cache_exists
 
 
 def get_bricksdict(cm, d_type="MODEL", cur_frame=None):
@@ -33,8 +35,12 @@ def get_bricksdict(cm, d_type="MODEL", cur_frame=None):
     scn = bpy.context.scene
     # if bricksdict can be pulled from cache
     if not matrix_really_is_dirty(cm) and cache_exists(cm) and not (cm.anim_is_dirty and "ANIM" in d_type):
-        # try getting bricksdict from light cache, then deep cache
-        bricksdict = bricker_bfm_cache.get(cm.id) or marshal.loads(bytes.fromhex(cm.bfm_cache))
+        # try getting bricksdict from light cache, then deep cache (animation frames are only decompressed when accessed)
+        bricksdict = bricker_bfm_cache.get(cm.id)
+        if bricksdict is None:
+            bfm_cache = cm.bfm_cache
+            bricksdict = bricker_bfm_cache[cm.id] = decode_deep_cache(bfm_cache)
+            bricker_deep_cache_sizes[cm.id] = len(bfm_cache)
         # if animated, index into that dict
         if "ANIM" in d_type:
             adjusted_frame_current = get_anim_adjusted_frame(cur_frame, cm.last_start_frame, cm.last_stop_frame)
@@ -53,8 +59,29 @@ def light_to_deep_cache(bricker_bfm_cache):
         cm = get_item_by_id(scn.cmlist, cm_id)
         if not cm:
             continue
-        # save last cache to cm.bfm_cache
-        cm.bfm_cache = marshal.dumps(bricker_bfm_cache[cm_id]).hex()
+        # save last cache to cm.bfm_cache (unless it hasn't changed since the last save)
+        start_time = time.time()
+        last_bfm_cache = cm.bfm_cache
+        # (bricksdicts spilled to disk are stored as deep cache text, so they needn't be loaded and encoded again)
+        spilled = bricker_bfm_cache.get_spilled(cm_id)
+        if spilled is not None:
+            bfm_cache = spilled.decode()
+            is_current = last_bfm_cache == bfm_cache
+        else:
+            data = deep_cache_data(bricker_bfm_cache[cm_id])
+            is_current = deep_cache_is_current(last_bfm_cache, data)
+        if is_current:
+            bricker_deep_cache_stats.hit(max(0.0, bricker_deep_cache_costs.get(cm_id, 0.0) - (time.time() - start_time)))
+            bricker_deep_cache_sizes[cm_id] = len(last_bfm_cache)
+            continue
+        if spilled is None:
+            bfm_cache = encode_deep_cache(bricker_bfm_cache[cm_id], data=data)
+        cm.bfm_cache = bfm_cache
+        bricker_deep_cache_sizes[cm_id] = len(bfm_cache)
+        time_spent = time.time() - start_time
+        bricker_deep_cache_stats.miss(time_spent)
+        if spilled is None:
+            bricker_deep_cache_costs[cm_id] = time_spent
         num_pushed_ids += 1
     if num_pushed_ids > 0:
         print("[Bricker] pushed {num_keys} {pluralized_dicts} from light cache to deep cache".format(num_keys=num_pushed_ids, pluralized_dicts="dict" if num_pushed_ids == 1 else "dicts"))
@@ -63,14 +90,18 @@ def light_to_deep_cache(bricker_bfm_cache):
 def deep_to_light_cache(bricker_bfm_cache, cm):
     """ send bricksdict from python cache to blender cache for saving to file """
     # make sure there is something to store to light cache
-    if cm.bfm_cache == "":
+    bfm_cache = cm.bfm_cache
+    if bfm_cache == "":
         return
     try:
-        bricksdict = marshal.loads(bytes.fromhex(cm.bfm_cache))
+        bricksdict = decode_deep_cache(bfm_cache)
         bricker_bfm_cache[cm.id] = bricksdict
+        bricker_deep_cache_sizes[cm.id] = len(bfm_cache)
     except Exception as e:
         print("ERROR in deep_to_light_cache:", e)
-    cm.bfm_cache = ""
+        cm.bfm_cache = ""
+        bricker_deep_cache_sizes.pop(cm.id, None)
+    # NOTE: deep cache is kept so it is only rewritten on save if the bricksdict changes (see 'light_to_deep_cache')
 
 
 def cache_bricks_dict(action, cm, bricksdict, cur_frame=None):
@@ -80,6 +111,6 @@ def cache_bricks_dict(action, cm, bricksdict, cur_frame=None):
         bricker_bfm_cache[cm.id] = bricksdict
     elif action in ("ANIMATE", "UPDATE_ANIM"):
         if (cm.id not in bricker_bfm_cache.keys() or
-           type(bricker_bfm_cache[cm.id]) != dict):
-            bricker_bfm_cache[cm.id] = {}
+           not isinstance(bricker_bfm_cache[cm.id], FrameCache)):
+            bricker_bfm_cache[cm.id] = FrameCache()
         bricker_bfm_cache[cm.id][str(cur_frame)] = bricksdict
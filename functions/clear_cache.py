@@ -34,9 +34,12 @@ def clear_cache(cm, brick_mesh=True, light_matrix=True, deep_matrix=True, rgba_v
     # clear light matrix cache
     if light_matrix:
         bricker_bfm_cache[cm.id] = None
+        bricker_bvh_cache[cm.id] = None
+        bricker_voxel_cache[cm.id] = None
     # clear deep matrix cache
     if deep_matrix:
         cm.bfm_cache = ""
+        bricker_deep_cache_sizes.pop(cm.id, None)
     # clear rgba vals cache
     if rgba_vals:
         bricker_rgba_vals_cache[cm.id] = None
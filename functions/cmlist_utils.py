@@ -121,6 +121,7 @@ def get_cm_props():
             "use_normals",
             "verify_exposure",
             "insideness_ray_cast_dir",
+            "voxelizer",
             "start_frame",
             "stop_frame",
             "use_animation",
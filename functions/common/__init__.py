@@ -18,6 +18,7 @@
 from .blender import *
 from .bmesh_generators import *
 from .bmesh_utils import *
+from .caches import *
 # try:
 #     from .color_effects import *
 #     from .color_effects_cuda import *
@@ -0,0 +1,301 @@
+# Copyright (C) 2020 Christopher Gearhart
+# chris@bblanimation.com
+# http://bblanimation.com/
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# System imports
+import atexit
+import itertools
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+# Blender imports
+# NONE!
+
+# Module imports
+# NONE!
+
+
+# caches whose entries share the memory budget (see 'set_cache_memory_budget')
+bounded_caches = []
+_cache_memory_budget = {"max_bytes": None}
+_cache_spill_dir = {"path": None}
+_cache_clock = itertools.count()
+# statistics of all caches (see 'get_cache_stats')
+all_cache_stats = []
+# most keys a bounded cache remembers misses of until the missing values are stored
+_max_pending_misses = 1024
+
+
+class CacheStats:
+    """ hit/miss/eviction counters of a cache, time spent creating values after misses, and time hits saved """
+
+    def __init__(self):
+        self.reset()
+        all_cache_stats.append(self)
+
+    def reset(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.time_spent = 0.0
+        self.time_saved = 0.0
+
+    def hit(self, time_saved:float=0.0):
+        self.hits += 1
+        self.time_saved += time_saved
+
+    def miss(self, time_spent:float=0.0):
+        self.misses += 1
+        self.time_spent += time_spent
+
+    def as_dict(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "time_spent": self.time_spent,
+            "time_saved": self.time_saved,
+        }
+
+
+class BoundedCache(MutableMapping):
+    """ dict whose entries count toward the memory budget shared by all bounded caches
+
+    when the estimated size of all bounded caches exceeds the budget, their least recently used entries are evicted;
+    if the cache has a 'spill' (functions converting values to and from bytes), evicted values are written to disk
+    and read back the next time they are accessed. Values referenced outside the cache (e.g. a bricksdict an operator
+    is editing in place) are in use and never evicted, so a spilled copy never misses later changes
+
+    a value stored after its key missed is timed from the miss, and each later hit of that value counts the
+    time toward 'stats.time_saved' (less the time spent reading it back from disk if it was spilled)
+
+    NOTE: values are measured when stored; values modified in place are measured again by 'enforce_cache_memory_budget'
+
+    """
+
+    def __init__(self, name:str, size_of=None, spill=None):
+        self.name = name
+        self.size_of = size_of or estimate_size
+        self.spill = spill
+        self.nbytes = 0
+        self._values = {}
+        self._sizes = {}
+        self._last_used = OrderedDict()  # time each key in memory was last used, oldest first
+        self._spilled = {}  # path of the file each spilled value was written to
+        self._costs = {}  # seconds spent creating each value (if it was stored after a miss)
+        self._pending_misses = OrderedDict()  # time each missing key was last looked up
+        self.stats = CacheStats()
+        bounded_caches.append(self)
+
+    def __getitem__(self, key):
+        if key in self._values:
+            self._last_used[key] = next(_cache_clock)
+            self._last_used.move_to_end(key)
+            self.stats.hit(self._costs.get(key, 0.0))
+            return self._values[key]
+        if key in self._spilled:
+            start_time = time.time()
+            path = self._spilled.pop(key)
+            with open(path, "rb") as f:
+                value = self.spill[1](f.read())
+            os.remove(path)
+            self._store(key, value)
+            self.stats.hit(max(0.0, self._costs.get(key, 0.0) - (time.time() - start_time)))
+            return value
+        self.stats.miss()
+        self._pending_misses[key] = time.time()
+        self._pending_misses.move_to_end(key)
+        if len(self._pending_misses) > _max_pending_misses:
+            self._pending_misses.popitem(last=False)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        self._discard(key)
+        self._costs.pop(key, None)
+        miss_time = self._pending_misses.pop(key, None)
+        if miss_time is not None:
+            self._costs[key] = time.time() - miss_time
+            self.stats.time_spent += self._costs[key]
+        self._store(key, value)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._discard(key)
+        self._costs.pop(key, None)
+
+    def __contains__(self, key):
+        return key in self._values or key in self._spilled
+
+    def __iter__(self):
+        return iter(list(self._values) + list(self._spilled))
+
+    def __len__(self):
+        return len(self._values) + len(self._spilled)
+
+    def __repr__(self):
+        return "BoundedCache(%r, %d entries, %d bytes)" % (self.name, len(self), self.nbytes)
+
+    def clear(self):
+        for key in list(self):
+            self._discard(key)
+        self._costs.clear()
+        self._pending_misses.clear()
+
+    def evict(self, key):
+        """ drop value at 'key' from memory (writing it to disk if the cache has a spill) """
+        value = self._values[key]
+        self._discard(key)
+        self.stats.evictions += 1
+        if self.spill is not None and value is not None:
+            fd, path = tempfile.mkstemp(dir=_get_cache_spill_dir())
+            with os.fdopen(fd, "wb") as f:
+                f.write(self.spill[0](value))
+            self._spilled[key] = path
+        else:
+            self._costs.pop(key, None)
+
+    def has_value(self, key):
+        """ checks if there is a value other than None at 'key', without loading spilled values or counting a hit or miss """
+        # (None values are never spilled, see 'evict')
+        return self._values.get(key) is not None or key in self._spilled
+
+    def get_spilled(self, key):
+        """ returns bytes the value at 'key' was written to disk as (or None if it wasn't spilled), without loading the value """
+        path = self._spilled.get(key)
+        if path is None:
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+
+    def get_stats(self):
+        """ returns dict of number of entries, estimated bytes in memory, and hit/miss/eviction statistics """
+        stats = {"name": self.name, "entries": len(self), "spilled": len(self._spilled), "bytes": self.nbytes}
+        stats.update(self.stats.as_dict())
+        return stats
+
+    def in_use(self, key):
+        """ checks if value at 'key' is referenced outside the cache (or its 'in_use' method says it is) """
+        # NOTE: the other reference counted is the temporary one passed to 'getrefcount'
+        if sys.getrefcount(self._values[key]) > 2:
+            return True
+        value_in_use = getattr(self._values[key], "in_use", None)
+        return callable(value_in_use) and value_in_use()
+
+    def _store(self, key, value):
+        self._values[key] = value
+        self._sizes[key] = 0
+        self._last_used[key] = next(_cache_clock)
+        self._last_used.move_to_end(key)
+        self._measure(key)
+        enforce_cache_memory_budget(keep=(self, key), measure=False)
+
+    def _measure(self, key):
+        value = self._values[key]
+        size = 0 if value is None else self.size_of(value)
+        self.nbytes += size - self._sizes[key]
+        self._sizes[key] = size
+
+    def _discard(self, key):
+        if key in self._values:
+            del self._values[key]
+            del self._last_used[key]
+            self.nbytes -= self._sizes.pop(key)
+        path = self._spilled.pop(key, None)
+        if path is not None:
+            os.remove(path)
+
+
+def set_cache_memory_budget(max_bytes:int):
+    """ set number of bytes bounded caches may use together (None for no limit) """
+    _cache_memory_budget["max_bytes"] = max_bytes
+    enforce_cache_memory_budget()
+
+
+def get_cache_memory_usage():
+    """ returns estimated number of bytes used by all bounded caches """
+    return sum(cache.nbytes for cache in bounded_caches)
+
+
+def enforce_cache_memory_budget(keep:tuple=None, measure:bool=True):
+    """ evict least recently used entries of bounded caches until they fit in the memory budget
+
+    keep    -- (cache, key) pair not to evict
+    measure -- measure all values again first (for values modified in place; call at safe points, e.g. on save)
+
+    NOTE: entries in use (see 'BoundedCache.in_use') are never evicted
+    """
+    if measure:
+        for cache in bounded_caches:
+            for key in cache._values:
+                cache._measure(key)
+    max_bytes = _cache_memory_budget["max_bytes"]
+    if max_bytes is None:
+        return
+    total = get_cache_memory_usage()
+    while total > max_bytes:
+        oldest = None
+        for cache in bounded_caches:
+            for key, last_used in cache._last_used.items():
+                if (keep is not None and cache is keep[0] and key == keep[1]) or cache.in_use(key):
+                    continue
+                if oldest is None or last_used < oldest[0]:
+                    oldest = (last_used, cache, key)
+                break
+        if oldest is None:
+            break
+        last_used, cache, key = oldest
+        total -= cache._sizes[key]
+        cache.evict(key)
+
+
+def get_cache_stats():
+    """ returns list of statistics of each bounded cache (see 'BoundedCache.get_stats') """
+    return [cache.get_stats() for cache in bounded_caches]
+
+
+def reset_cache_stats():
+    """ reset hit/miss/eviction counters and timings of all caches """
+    for stats in all_cache_stats:
+        stats.reset()
+
+
+def estimate_size(value, max_samples:int=16):
+    """ returns estimated number of bytes used by 'value' (from a sample of the items of large containers) """
+    if value is None:
+        return 0
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)) and len(value) > 0:
+        samples = list(itertools.islice(value, max_samples))
+        size += sum(estimate_size(item) for item in samples) * len(value) // len(samples)
+    return size
+
+
+def _get_cache_spill_dir():
+    if _cache_spill_dir["path"] is None:
+        _cache_spill_dir["path"] = tempfile.mkdtemp(prefix="spilled_cache_")
+        atexit.register(shutil.rmtree, _cache_spill_dir["path"], True)
+    return _cache_spill_dir["path"]
@@ -26,10 +26,11 @@ from mathutils.interpolate import poly_3d_calc
 
 # Module imports
 from .reporting import b280
+from .caches import BoundedCache
 from .maths import *
 from .colors import *
 
-common_pixel_cache = dict()
+common_pixel_cache = BoundedCache("Image Pixels")
 
 
 def get_pixels(image, frame_offset=0):
@@ -38,18 +39,19 @@ def get_pixels(image, frame_offset=0):
     frame = scn.frame_current + frame_offset
     image_key = image.name if image.source == "FILE" else ("{im_name}_f_{frame}".format(im_name=image.name, frame=frame))
 
-    if image_key not in common_pixel_cache or not common_pixel_cache[image_key]:
+    pixels = common_pixel_cache.get(image_key)
+    if not pixels:
         pixels = image.pixels[:] if image.source in ("FILE", "GENERATED") else get_pixels_at_frame(image, frame)
         common_pixel_cache[image_key] = pixels
-    return common_pixel_cache[image_key]
+    return pixels
 
 
 def clear_pixel_cache(image_name=None):
     """ clear the pixel cache """
     if image_name is None:
-        common_pixel_cache = dict()
+        common_pixel_cache.clear()
     else:
-        for key in common_pixel_cache.keys():
+        for key in list(common_pixel_cache.keys()):
             if key.startswith(image_name):
                 common_pixel_cache.pop(key)
 
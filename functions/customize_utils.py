@@ -63,7 +63,7 @@ def verify_all_brick_exposures(scn, zstep, orig_loc, bricksdict, decriment=0, z_
         dlocs.append((orig_loc[0], orig_loc[1], orig_loc[2] - 1))
     # double check exposure of bricks above/below new adjacent brick
     for dloc in dlocs:
-        k = list_to_str(dloc)
+        k = loc_to_key(dloc)
         try:
             brick_d = bricksdict[k]
         except KeyError:
@@ -116,7 +116,7 @@ def get_available_types(by="SELECTION", include_sizes=[]):
     return items if len(items) > 0 else [("NULL", "Null", "")]
 
 
-def update_brick_size_and_dict(dimensions, source_name, bricksdict, brick_size, key, loc, dec=0, cur_height=None, cur_type=None, target_height=None, target_type=None, created_from=None):
+def update_brick_size_and_dict(dimensions, bricksdict, brick_size, key, loc, dec=0, cur_height=None, cur_type=None, target_height=None, target_type=None, created_from=None):
     brick_d = bricksdict[key]
     assert target_height is not None or target_type is not None
     target_height = target_height or (1 if target_type in get_brick_types(height=1) else 3)
@@ -129,7 +129,7 @@ def update_brick_size_and_dict(dimensions, source_name, bricksdict, brick_size,
             for y in range(brick_size[1]):
                 for z in range(1, cur_height):
                     new_loc = [loc[0] + x, loc[1] + y, loc[2] + z - dec]
-                    new_key = list_to_str(new_loc)
+                    new_key = loc_to_key(new_loc)
                     bricksdict[new_key]["parent"] = None
                     bricksdict[new_key]["draw"] = False
                     set_cur_brick_val(bricksdict, new_loc, new_key, action="REMOVE")
@@ -142,10 +142,10 @@ def update_brick_size_and_dict(dimensions, source_name, bricksdict, brick_size,
             for y in range(brick_size[1]):
                 for z in range(1, target_height):
                     new_loc = [loc[0] + x, loc[1] + y, loc[2] + z]
-                    new_key = list_to_str(new_loc)
+                    new_key = loc_to_key(new_loc)
                     # create new bricksdict entry if it doesn't exist
                     if new_key not in bricksdict:
-                        bricksdict = create_addl_bricksdict_entry(source_name, bricksdict, key, new_key, full_d, x, y, z)
+                        bricksdict = create_addl_bricksdict_entry(bricksdict, key, new_key, full_d, x, y, z)
                     # update bricksdict entry to point to new brick
                     bricksdict[new_key]["parent"] = key
                     bricksdict[new_key]["created_from"] = created_from
@@ -158,13 +158,11 @@ def update_brick_size_and_dict(dimensions, source_name, bricksdict, brick_size,
     return brick_size
 
 
-def create_addl_bricksdict_entry(source_name, bricksdict, source_key, key, full_d, x, y, z):
+def create_addl_bricksdict_entry(bricksdict, source_key, key, full_d, x, y, z):
     brick_d = bricksdict[source_key]
-    new_name = "Bricker_%(source_name)s__%(key)s" % locals()
     new_co = (Vector(brick_d["co"]) + vec_mult(Vector((x, y, z)), full_d)).to_tuple()
     bricksdict[key] = create_bricksdict_entry(
-        name=              new_name,
-        loc=               str_to_list(key),
+        loc=               key_to_loc(key),
         co=                new_co,
         near_face=         brick_d["near_face"],
         near_intersection= tuple(brick_d["near_intersection"]),
@@ -188,7 +186,7 @@ def get_bricksdicts_from_objs(obj_names):
 
 
 def set_cur_brick_val(bricksdict, loc, key=None, action="ADD"):
-    key = key or list_to_str(loc)
+    key = key or loc_to_key(loc)
     adj_brick_vals = get_adj_keys_and_brick_vals(bricksdict, loc=loc)[1]
     if action == "ADD" and (0 in adj_brick_vals or len(adj_brick_vals) < 6 or min(adj_brick_vals) == 1):
         new_val = 1
@@ -201,13 +199,14 @@ def set_cur_brick_val(bricksdict, loc, key=None, action="ADD"):
 
 def get_adj_keys_and_brick_vals(bricksdict, loc=None, key=None):
     assert loc or key
-    x, y, z = loc or get_dict_loc(bricksdict, key)
-    adj_keys = [list_to_str((x+1, y, z)),
-               list_to_str((x-1, y, z)),
-               list_to_str((x, y+1, z)),
-               list_to_str((x, y-1, z)),
-               list_to_str((x, y, z+1)),
-               list_to_str((x, y, z-1))]
+    key = key or loc_to_key(loc)
+    step_x, step_y, step_z = KEY_STEP
+    adj_keys = [key + step_x,
+                key - step_x,
+                key + step_y,
+                key - step_y,
+                key + step_z,
+                key - step_z]
     adj_brick_vals = []
     for k in adj_keys.copy():
         try:
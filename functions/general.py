@@ -130,7 +130,9 @@ def get_matrix_settings(cm=None):
         round(cm.flame_color[2], 6),
         round(cm.flame_intensity, 6),
     ] if cm.last_is_smoke else []
-    return list_to_str(regularSettings + smokeSettings)
+    # NOTE: added last, and only if not the default, so settings stored before voxelizers were added still match
+    voxelizerSettings = [cm.voxelizer] if cm.voxelizer != "LATTICE" else []
+    return list_to_str(regularSettings + smokeSettings + voxelizerSettings)
 
 
 def matrix_really_is_dirty(cm, include_lost_matrix=True):
@@ -169,6 +171,47 @@ def str_to_tuple(string, item_type=int, split_on=","):
     return tuple(str_to_list(string, item_type, split_on))
 
 
+# bricksdict keys pack the (x, y, z) loc of a cell into one int of KEY_BITS bits per axis (offset by KEY_BIAS so
+# locs of cells added outside the lattice may be negative), so keys sort by x, y, z and neighbors are a KEY_STEP away
+KEY_BITS = 21
+KEY_BIAS = 1 << (KEY_BITS - 1)
+KEY_MASK = (1 << KEY_BITS) - 1
+KEY_STEP = (1 << (2 * KEY_BITS), 1 << KEY_BITS, 1)
+
+
+def loc_to_key(loc):
+    """ get bricksdict key of cell at 'loc' """
+    x, y, z = loc
+    return ((x + KEY_BIAS) << (2 * KEY_BITS)) + ((y + KEY_BIAS) << KEY_BITS) + z + KEY_BIAS
+
+
+def key_to_loc(key:int):
+    """ get loc of cell from bricksdict key """
+    return [(key >> (2 * KEY_BITS)) - KEY_BIAS, ((key >> KEY_BITS) & KEY_MASK) - KEY_BIAS, (key & KEY_MASK) - KEY_BIAS]
+
+
+def locs_to_keys(locs:np.ndarray):
+    """ get array of bricksdict keys of cells at (N, 3) array of 'locs' """
+    locs = np.asarray(locs, dtype=np.int64) + KEY_BIAS
+    return (locs[:, 0] << (2 * KEY_BITS)) + (locs[:, 1] << KEY_BITS) + locs[:, 2]
+
+
+def keys_to_locs(keys:np.ndarray):
+    """ get (N, 3) array of locs of cells at array of bricksdict 'keys' """
+    keys = np.asarray(keys, dtype=np.int64)
+    return np.column_stack((keys >> (2 * KEY_BITS), (keys >> KEY_BITS) & KEY_MASK, keys & KEY_MASK)) - KEY_BIAS
+
+
+def key_to_str(key:int):
+    """ get string form of bricksdict key (as used in brick object names, e.g. '12,4,7') """
+    return list_to_str(key_to_loc(key))
+
+
+def str_to_key(string:str):
+    """ get bricksdict key from string form returned by 'key_to_str' """
+    return loc_to_key(str_to_list(string))
+
+
 def created_with_unsupported_version(cm):
     return cm.version[:3] != bpy.props.bricker_version[:3]
 
@@ -285,26 +328,32 @@ def update_can_run(typ):
 
 
 # loc param is more efficient than key, but one or the other must be passed
-def get_locs_in_brick(bricksdict, size, zstep, loc:list=None, key:str=None):
+def get_locs_in_brick(bricksdict, size, zstep, loc:list=None, key:int=None):
     x0, y0, z0 = loc or get_dict_loc(bricksdict, key)
     return [[x0 + x, y0 + y, z0 + z] for z in range(0, size[2], zstep) for y in range(size[1]) for x in range(size[0])]
 
 
-# loc param is more efficient than key, but one or the other must be passed
-def get_keys_in_brick(bricksdict, size, zstep:int, loc:list=None, key:str=None):
-    x0, y0, z0 = loc or get_dict_loc(bricksdict, key)
-    return [list_to_str((x0 + x, y0 + y, z0 + z)) for z in range(0, size[2], zstep) for y in range(size[1]) for x in range(size[0])]
+# key param is more efficient than loc, but one or the other must be passed
+def get_keys_in_brick(bricksdict, size, zstep:int, loc:list=None, key:int=None):
+    k0 = loc_to_key(loc) if key is None else key
+    step_x, step_y, _ = KEY_STEP
+    return [k0 + x * step_x + y * step_y + z for z in range(0, size[2], zstep) for y in range(size[1]) for x in range(size[0])]
 
 
 def get_keys_dict(bricksdict, keys=None):
-    """ get dictionary of bricksdict keys based on z value """
-    keys = keys or list(bricksdict.keys())
+    """ get dictionary of bricksdict keys based on z value (from the layer index of the bricksdict if 'keys' is not passed) """
+    if not keys:
+        keys = np.array(list(bricksdict.keys()), dtype=np.int64)
+        # keys sort by x, y, z, so this sorts by x, y
+        keys = keys[np.argsort(keys >> KEY_BITS, kind="stable")].tolist()
+        return bricksdict.keys_by_layer(), keys
     if len(keys) > 1:
-        keys.sort(key=lambda x: (get_dict_loc(bricksdict, x)[0], get_dict_loc(bricksdict, x)[1]))
+        # keys sort by x, y, z, so this sorts by x, y
+        keys.sort(key=lambda k: k >> KEY_BITS)
     keys_dict = {}
     for k0 in keys:
         if bricksdict[k0]["draw"]:
-            z = get_dict_loc(bricksdict, k0)[2]
+            z = (k0 & KEY_MASK) - KEY_BIAS
             if z in keys_dict:
                 keys_dict[z].append(k0)
             else:
@@ -323,17 +372,19 @@ def get_parent_key(bricksdict, key):
 
 def get_dict_key(name):
     """ get dict key from end of obj name """
-    dkey = name.split("__")[-1]
+    dkey = str_to_key(name.split("__")[-1])
     return dkey
 
 
+def get_brick_name(n, key):
+    """ get name of brick object at bricksdict key in model of source named 'n' (reverse of 'get_dict_key') """
+    key_str = key_to_str(key)
+    return "Bricker_%(n)s__%(key_str)s" % locals()
+
+
 def get_dict_loc(bricksdict, key):
     """ get dict loc from bricksdict key """
-    try:
-        loc = bricksdict[key]["loc"]
-    except KeyError:
-        loc = str_to_list(key)
-    return loc
+    return key_to_loc(key)
 
 
 def get_rgba_vals(cm):
@@ -18,6 +18,7 @@
 # System imports
 import bmesh
 import math
+import numpy as np
 
 # Blender imports
 import bpy
@@ -27,8 +28,8 @@ from mathutils import Vector
 from .common import *
 
 
-def generate_lattice(vert_dist:Vector, scale:Vector, offset:Vector=Vector((0, 0, 0)), extra_res:int=0, visualize:bool=False):
-    """ return lattice coordinate matrix surrounding object of size 'scale'
+def generate_lattice(vert_dist:Vector, scale:Vector, offset:Vector=Vector((0, 0, 0)), extra_res:int=0, visualize:bool=False, coords:bool=False):
+    """ return lattice surrounding object of size 'scale' as origin, spacing and shape (coordinate of lattice point [x, y, z] is origin + [x, y, z] * spacing)
 
     Keyword arguments:
     vert_dist  -- distance between lattice verts in 3D space
@@ -36,6 +37,13 @@ def generate_lattice(vert_dist:Vector, scale:Vector, offset:Vector=Vector((0, 0,
     offset    -- offset lattice center from origin
     extra_res -- additional resolution to add to ends of lattice
     visualize -- draw lattice coordinates in 3D space
+    coords    -- also return (nx, ny, nz, 3) array of lattice coordinates
+
+    returned:
+    - origin  -- coordinate of lattice point [0, 0, 0]
+    - spacing -- distance between lattice points along x, y, z
+    - shape   -- number of lattice points along x, y, z
+    - coords  -- (nx, ny, nz, 3) array of lattice coordinates (only if 'coords')
 
     """
 
@@ -46,20 +54,24 @@ def generate_lattice(vert_dist:Vector, scale:Vector, offset:Vector=Vector((0, 0,
     # round up lattice res
     res = Vector(round_up(round(val), 2) for val in res)
     h_res = res / 2
-    # populate coord matrix
+    # get lattice dimensions
     nx, ny, nz = round(res.x) - 1 + extra_res, round(res.y) - 1 + extra_res, round(res.z) - 1 + extra_res
-    create_coord = lambda v: vec_mult(v - h_res, vert_dist) + offset
-    coord_matrix = [[[create_coord(Vector((x, y, z))) for z in range(nz)] for y in range(ny)] for x in range(nx)]
+    shape = (nx, ny, nz)
+    origin = vec_mult(-h_res, vert_dist) + offset
+    spacing = vert_dist.copy()
+    if not (coords or visualize):
+        return origin, spacing, shape
+    coord_matrix = np.moveaxis(np.mgrid[0:shape[0], 0:shape[1], 0:shape[2]], 0, -1) * np.array(spacing) + np.array(origin)
 
     if visualize:
         # create bmesh
         bme = bmesh.new()
-        vert_matrix = np.zeros((len(coord_matrix), len(coord_matrix[0]), len(coord_matrix[0][0]))).tolist()
+        vert_matrix = np.zeros(shape).tolist()
         # add vertex for each coordinate
-        for x in range(len(coord_matrix)):
-            for y in range(len(coord_matrix[0])):
-                for z in range(len(coord_matrix[0][0])):
-                    vert_matrix[x][y][z] = bme.verts.new(coord_matrix[x][y][z])
+        for x in range(shape[0]):
+            for y in range(shape[1]):
+                for z in range(shape[2]):
+                    vert_matrix[x][y][z] = bme.verts.new(coord_matrix[x, y, z].tolist())
                     # create new edges from vert
                     if x != 0: bme.edges.new((vert_matrix[x][y][z], vert_matrix[x-1][y][z]))
                     if y != 0: bme.edges.new((vert_matrix[x][y][z], vert_matrix[x][y-1][z]))
@@ -67,4 +79,4 @@ def generate_lattice(vert_dist:Vector, scale:Vector, offset:Vector=Vector((0, 0,
         # draw bmesh verts in 3D space
         draw_bmesh(bme)
 
-    return coord_matrix
+    return (origin, spacing, shape, coord_matrix) if coords else (origin, spacing, shape)
@@ -51,7 +51,8 @@ def make_bricks(source, parent, logo, dimensions, bricksdict, action, cm=None, s
     # initialize cm.zstep
     cm.zstep = get_zstep(cm)
 
-    merge_vertical = (keys != "ALL" and "PLATES" in cm.brick_type) or cm.brick_type == "BRICKS AND PLATES"
+    # plates are merged vertically when redrawing customized bricks (not when redrawing bricks patched for edits to the source)
+    merge_vertical = (redraw and keys != "ALL" and "PLATES" in cm.brick_type) or cm.brick_type == "BRICKS AND PLATES"
 
     # get brick collection
     coll_name = coll_name or "Bricker_%(n)s_bricks" % locals()
@@ -65,12 +66,15 @@ def make_bricks(source, parent, logo, dimensions, bricksdict, action, cm=None, s
             bcoll.objects.unlink(obj0)
 
     # get bricksdict keys
-    if keys == "ALL":
+    all_keys = keys == "ALL"
+    if all_keys:
         keys = list(bricksdict.keys())
     if len(keys) == 0:
         return False, None
     # get dictionary of keys based on z value
-    keys_dict, sorted_keys = get_keys_dict(bricksdict, keys)
+    keys_dict, sorted_keys = get_keys_dict(bricksdict, None if all_keys else keys)
+    if all_keys:
+        keys = sorted_keys
     denom = sum([len(keys_dict[z0]) for z0 in keys_dict.keys()])
     # store first key to active keys
     if cm.active_key[0] == -1 and len(keys) > 0:
@@ -170,7 +174,7 @@ def make_bricks(source, parent, logo, dimensions, bricksdict, action, cm=None, s
                 if connect_thresh > 1:
                     bricksdicts_base = {}
                     for k4 in available_keys_base:
-                        bricksdicts_base[k4] = bricksdict[k4]
+                        bricksdicts_base[k4] = dict(bricksdict[k4])
                     bricksdicts = [deepcopy(bricksdicts_base) for j in range(connect_thresh)]
                     num_aligned_edges = [0 for idx in range(connect_thresh)]
                 else:
@@ -226,14 +230,13 @@ def make_bricks(source, parent, logo, dimensions, bricksdict, action, cm=None, s
                         bricksdict[k3] = bricksdicts[optimal_test][k3]
 
         # update cm.brick_sizes_used and cm.brick_types_used
-        for key in keys:
-            if bricksdict[key]["parent"] not in (None, "self"):
-                continue
-            brick_size = bricksdict[key]["size"]
-            if brick_size is None:
-                continue
+        if all_keys:
+            bricks_used = bricksdict.brick_counts()
+        else:
+            bricks_used = [(bricksdict[key]["size"], bricksdict[key]["type"]) for key in keys if bricksdict[key]["parent"] in (None, "self") and bricksdict[key]["size"] is not None]
+        for brick_size, typ in bricks_used:
             brick_size_str = list_to_str(sorted(brick_size[:2]) + [brick_size[2]])
-            update_brick_sizes_and_types_used(cm, brick_size_str, bricksdict[key]["type"])
+            update_brick_sizes_and_types_used(cm, brick_size_str, typ)
 
         # end 'Merging' progress bar
         update_progress_bars(print_status, cursor_status, 1, 0, "Merging", end=True)
@@ -251,7 +254,7 @@ def make_bricks(source, parent, logo, dimensions, bricksdict, action, cm=None, s
                 continue
             loc = get_dict_loc(bricksdict, k2)
             # create brick based on the current brick info
-            draw_brick(cm_id, bricksdict, k2, loc, seed_keys, bcoll, clear_existing_collection, parent, dimensions, zstep, bricksdict[k2]["size"], brick_type, split, last_split_model, custom_object1, custom_object2, custom_object3, mat_dirty, custom_data, brick_scale, bricks_created, all_meshes, logo, mats, brick_mats, internal_mat, brick_height, logo_resolution, logo_decimate, build_is_dirty, material_type, custom_mat, random_mat_seed, stud_detail, exposed_underside_detail, hidden_underside_detail, random_rot, random_loc, logo_type, logo_scale, logo_inset, circle_verts, instance_method, rand_s1, rand_s2, rand_s3)
+            draw_brick(cm_id, n, bricksdict, k2, loc, seed_keys, bcoll, clear_existing_collection, parent, dimensions, zstep, bricksdict[k2]["size"], brick_type, split, last_split_model, custom_object1, custom_object2, custom_object3, mat_dirty, custom_data, brick_scale, bricks_created, all_meshes, logo, mats, brick_mats, internal_mat, brick_height, logo_resolution, logo_decimate, build_is_dirty, material_type, custom_mat, random_mat_seed, stud_detail, exposed_underside_detail, hidden_underside_detail, random_rot, random_loc, logo_type, logo_scale, logo_inset, circle_verts, instance_method, rand_s1, rand_s2, rand_s3)
             # print status to terminal and cursor
             old_percent = update_progress_bars(print_status, cursor_status, i/denom, old_percent, "Building")
 
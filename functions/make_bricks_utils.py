@@ -39,7 +39,7 @@ from .mat_utils import *
 from ..lib.caches import bricker_mesh_cache
 
 
-def draw_brick(cm_id, bricksdict, key, loc, seed_keys, bcoll, clear_existing_collection, parent, dimensions, zstep, brick_size, brick_type, split, last_split_model, custom_object1, custom_object2, custom_object3, mat_dirty, custom_data, brick_scale, bricks_created, all_meshes, logo, mats, brick_mats, internal_mat, brick_height, logo_resolution, logo_decimate, build_is_dirty, material_type, custom_mat, random_mat_seed, stud_detail, exposed_underside_detail, hidden_underside_detail, random_rot, random_loc, logo_type, logo_scale, logo_inset, circle_verts, instance_method, rand_s1, rand_s2, rand_s3):
+def draw_brick(cm_id, n, bricksdict, key, loc, seed_keys, bcoll, clear_existing_collection, parent, dimensions, zstep, brick_size, brick_type, split, last_split_model, custom_object1, custom_object2, custom_object3, mat_dirty, custom_data, brick_scale, bricks_created, all_meshes, logo, mats, brick_mats, internal_mat, brick_height, logo_resolution, logo_decimate, build_is_dirty, material_type, custom_mat, random_mat_seed, stud_detail, exposed_underside_detail, hidden_underside_detail, random_rot, random_loc, logo_type, logo_scale, logo_inset, circle_verts, instance_method, rand_s1, rand_s2, rand_s3):
     brick_d = bricksdict[key]
     # check exposure of current [merged] brick
     if brick_d["top_exposed"] is None or brick_d["bot_exposed"] is None or build_is_dirty:
@@ -72,7 +72,8 @@ def draw_brick(cm_id, bricksdict, key, loc, seed_keys, bcoll, clear_existing_col
     brick_loc = get_brick_center(bricksdict, key, zstep, loc) + loc_offset
 
     if split:
-        brick = bpy.data.objects.get(brick_d["name"])
+        brick_name = get_brick_name(n, key)
+        brick = bpy.data.objects.get(brick_name)
         edge_split = use_edge_split_mod(brick_d, custom_object1, custom_object2, custom_object3)
         if brick:
             # NOTE: last brick object is left in memory (faster)
@@ -86,7 +87,7 @@ def draw_brick(cm_id, bricksdict, key, loc, seed_keys, bcoll, clear_existing_col
                 brick.modifiers.remove(e_mod)
         else:
             # create new object with mesh data
-            brick = bpy.data.objects.new(brick_d["name"], m)
+            brick = bpy.data.objects.new(brick_name, m)
             brick.cmlist_id = cm_id
             # add edge split modifier
             if edge_split:
@@ -102,8 +103,7 @@ def draw_brick(cm_id, bricksdict, key, loc, seed_keys, bcoll, clear_existing_col
         mat = mat or internal_mat
         set_material(brick, mat)
         if mat:
-            keys_in_brick = get_keys_in_brick(bricksdict, brick_size, zstep, loc)
-            for k in keys_in_brick:
+            for k in bricksdict.brick_keys(key):
                 bricksdict[k]["mat_name"] = mat.name
         # append to bricks_created
         bricks_created.append(brick)
@@ -16,13 +16,22 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 # System imports
+import base64
+import json
+import struct
 import time
+import zlib
+import numpy as np
 
 # Module imports
 from .common import *
 from .general import *
 
 
+# prefix of binary smoke data strings (smoke data without it was stored as compressed JSON by older versions)
+SMOKE_DATA_PREFIX = "bin1:"
+
+
 def store_smoke_data(from_obj, to_obj):
     # get evaluated obj
     if b280():
@@ -35,9 +44,6 @@ def store_smoke_data(from_obj, to_obj):
     adapt = domain_settings.use_adaptive_domain
     obj_details_adapt = bounds(from_obj) if adapt else None
     smoke_data = {
-        "density_grid": tuple(domain_settings.density_grid),
-        "flame_grid": tuple(domain_settings.flame_grid),
-        "color_grid": tuple(domain_settings.color_grid),
         "domain_resolution": tuple(domain_settings.domain_resolution),
         "use_adaptive_domain": adapt,
         "adapt_min": tuple(obj_details_adapt.min) if adapt else None,
@@ -46,7 +52,45 @@ def store_smoke_data(from_obj, to_obj):
         "use_high_resolution": domain_settings.use_high_resolution,
         "amplify": domain_settings.amplify,
     }
-    to_obj.smoke_data = compress_str(json.dumps(smoke_data))
+    grids = {
+        "density_grid": get_grid_array(domain_settings.density_grid),
+        "flame_grid": get_grid_array(domain_settings.flame_grid),
+        "color_grid": get_grid_array(domain_settings.color_grid),
+    }
+    to_obj.smoke_data = encode_smoke_data(smoke_data, grids)
+
+
+def get_grid_array(grid):
+    """ returns float32 array of values in smoke domain grid """
+    arr = np.empty(len(grid), dtype=np.float32)
+    if hasattr(grid, "foreach_get"):
+        grid.foreach_get(arr)
+    else:
+        arr[:] = grid
+    return arr
+
+
+def encode_smoke_data(smoke_data:dict, grids:dict):
+    """ returns string with smoke_data settings and raw float32 buffers of grids (zlib compressed) """
+    header = dict(smoke_data, grid_sizes=[(name, grid.size) for name, grid in grids.items()])
+    header = json.dumps(header).encode("utf-8")
+    payload = b"".join([struct.pack("<I", len(header)), header] + [np.asarray(grid, dtype="<f4").tobytes() for grid in grids.values()])
+    # NOTE: StringProperty can't store arbitrary bytes, so compressed payload is base64 encoded
+    return SMOKE_DATA_PREFIX + base64.b64encode(zlib.compress(payload, 1)).decode()
+
+
+def decode_smoke_data(string:str):
+    """ returns smoke_data dictionary from 'encode_smoke_data' string (grids are read-only arrays over the decompressed buffer) """
+    if not string.startswith(SMOKE_DATA_PREFIX):
+        return json.loads(decompress_str(string))
+    payload = zlib.decompress(base64.b64decode(string[len(SMOKE_DATA_PREFIX):]))
+    header_len = struct.unpack_from("<I", payload)[0]
+    offset = 4 + header_len
+    smoke_data = json.loads(payload[4:offset].decode("utf-8"))
+    for name, size in smoke_data.pop("grid_sizes"):
+        smoke_data[name] = np.frombuffer(payload, dtype="<f4", count=size, offset=offset)
+        offset += size * 4
+    return smoke_data
 
 
 # code adapted from https://github.com/bwrsandman/blender-addons/blob/master/render_povray/render.py
@@ -54,7 +98,7 @@ def get_smoke_info(source):
     if not source.smoke_data:
         return [None] * 6
 
-    smoke_data = json.loads(decompress_str(source.smoke_data))
+    smoke_data = decode_smoke_data(source.smoke_data)
 
     # get channel data
     density_grid = smoke_data["density_grid"]
@@ -79,7 +79,7 @@ def handle_selections(junk=None):
                 if obj.is_brick:
                     if scn.bricker_last_active_object_name != obj.name:
                         # adjust scn.active_brick_detail based on active brick
-                        x0, y0, z0 = str_to_list(get_dict_key(obj.name))
+                        x0, y0, z0 = key_to_loc(get_dict_key(obj.name))
                         cm0.active_key = (x0, y0, z0)
                         scn.bricker_last_active_object_name = obj.name
             except AttributeError:
@@ -112,10 +112,18 @@ def handle_undo_stack():
     return 0.02
 
 
+@blender_version_wrapper(">=","2.80")
+def handle_cache_memory_budget():
+    # measure cached values modified in place and evict entries over the memory budget while no operator is running
+    if not bricker_running_blocking_op():
+        enforce_cache_memory_budget()
+    return 1.0
+
+
 @persistent
 @blender_version_wrapper(">=","2.80")
 def register_bricker_timers(scn, jnk=None):
-    timer_fns = (handle_selections, handle_undo_stack)
+    timer_fns = (handle_selections, handle_undo_stack, handle_cache_memory_budget)
     for timer_fn in timer_fns:
         if not bpy.app.timers.is_registered(timer_fn):
             bpy.app.timers.register(timer_fn)
@@ -15,19 +15,64 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+# System imports
+# NONE!
+
+# Blender imports
+# NONE!
+
+# Module imports
+from ..functions.common.blender import get_addon_preferences
+from ..functions.common.caches import BoundedCache, CacheStats, get_cache_stats, set_cache_memory_budget
+from ..functions.bricksdict.deep_cache import decode_deep_cache, encode_deep_cache
+
+
+def _bmeshes_size(bms):
+    # rough size of BMesh data per vert/edge/face (BMesh data isn't visible to Python)
+    return sum(len(bm.verts) * 64 + len(bm.edges) * 64 + len(bm.faces) * 128 for bm in bms)
+
+
 # initialize the brick bmesh cache dictionary
-bricker_mesh_cache = {}
+bricker_mesh_cache = BoundedCache("Brick Meshes", size_of=_bmeshes_size)
 
 # initialize the source mesh cache dictionary
-bricker_source_mesh_cache = {}
+bricker_source_mesh_cache = BoundedCache("Source Meshes")
 
-# initialize the bfm_cache
-bricker_bfm_cache = {}
+# initialize the bfm_cache (evicted blueprints are spilled to disk in the deep cache format)
+bricker_bfm_cache = BoundedCache("Blueprints", spill=(lambda bricksdict: encode_deep_cache(bricksdict).encode(), lambda data: decode_deep_cache(data.decode())))
 
 # initialize the rgba_vals cache
-bricker_rgba_vals_cache = {}
+bricker_rgba_vals_cache = BoundedCache("Material Colors")
+
+# initialize the source BVHTree cache dictionary
+bricker_bvh_cache = BoundedCache("Source BVH Trees")
+
+# initialize the voxelized source cache dictionary (for incremental blueprint updates)
+bricker_voxel_cache = BoundedCache("Voxelized Sources")
+
+# initialize statistics of the deep caches ('cm.bfm_cache'; a hit is a save skipped because the blueprint hadn't changed)
+bricker_deep_cache_stats = CacheStats()
+# seconds the last write of the deep cache of each model took (time saved each time the write is skipped)
+bricker_deep_cache_costs = {}
+# length of the deep cache text of each model (recorded when read or written, so drawing stats needn't read the text)
+bricker_deep_cache_sizes = {}
 
 # cache functions
 def cache_exists(cm):
     """check if light or deep matrix cache exists for cmlist item"""
-    return bricker_bfm_cache.get(cm.id) is not None or cm.bfm_cache not in ("", "null")
+    return bricker_bfm_cache.has_value(cm.id) or cm.bfm_cache not in ("", "null")
+
+
+def update_cache_memory_budget():
+    """ set memory budget of bounded caches from addon preferences """
+    prefs = get_addon_preferences()
+    if prefs is not None:
+        set_cache_memory_budget(prefs.cache_memory * 2**20 if prefs.cache_memory > 0 else None)
+
+
+def get_bricker_cache_stats():
+    """ returns list of statistics of Bricker's bounded caches and deep caches (see 'BoundedCache.get_stats') """
+    deep_sizes = [size for size in bricker_deep_cache_sizes.values() if size > 0]
+    deep_stats = {"name": "Deep Blueprints", "entries": len(deep_sizes), "spilled": 0, "bytes": sum(deep_sizes)}
+    deep_stats.update(bricker_deep_cache_stats.as_dict())
+    return get_cache_stats() + [deep_stats]
@@ -37,6 +37,7 @@ classes = [
     brickify_in_background.BRICKER_OT_brickify_in_background,
     brickify_in_background.BRICKER_OT_stop_brickifying_in_background,
     cache.BRICKER_OT_clear_cache,
+    cache.BRICKER_OT_reset_cache_stats,
     delete_model.BRICKER_OT_delete_model,
     debug_toggle_view_source.BRICKER_OT_debug_toggle_view_source,
     export_ldraw.BRICKER_OT_export_ldraw,
@@ -22,9 +22,14 @@ from bpy.props import *
 
 # Module imports
 from .. import addon_updater_ops
+from .caches import update_cache_memory_budget
 from ..functions.common import *
 
 
+def update_cache_memory(self, context):
+    update_cache_memory_budget()
+
+
 class BRICKER_AP_preferences(AddonPreferences):
     bl_idname = __package__[:__package__.index(".lib")]
 
@@ -53,6 +58,27 @@ class BRICKER_AP_preferences(AddonPreferences):
                ("ON", "On", "Run brickify calculations in background"),
                ("OFF", "Off", "Run brickify calculations in active Blender window (user interface will freeze during calculation)")],
         default="AUTO")
+    voxelizer_processes = bpy.props.IntProperty(
+        name="Voxelizer Processes",
+        description="Number of worker processes used by the 'Parallel' voxelizer (0 for one process per CPU core)",
+        min=0,
+        default=0)
+    blueprint_layers = bpy.props.IntProperty(
+        name="Blueprint Layers",
+        description="Maximum number of lattice layers voxelized at once when generating a model's blueprint; lower values use less memory for tall models, but each slab is voxelized with 2 extra layers above and below it, and internal values are then set with 50 extra layers above and below each slab (0 to voxelize the whole lattice at once)",
+        min=0,
+        default=0)
+    undo_memory = bpy.props.IntProperty(
+        name="Undo Memory (MB)",
+        description="Maximum memory used to undo customizations of Bricker models (oldest undo steps are dropped beyond this)",
+        min=1,
+        default=256)
+    cache_memory = bpy.props.IntProperty(
+        name="Cache Memory (MB)",
+        description="Maximum memory used by Bricker's caches of blueprints, brick meshes and image pixels; least recently used entries are dropped (blueprints are moved to disk) beyond this (0 for no limit)",
+        min=0,
+        default=4096,
+        update=update_cache_memory)
 
 	# addon updater preferences
     auto_check_update = bpy.props.BoolProperty(
@@ -106,6 +132,34 @@ class BRICKER_AP_preferences(AddonPreferences):
         col = split.column(align=True)
         col.prop(prefs, "brickify_in_background", text="")
         col1.separator()
+        row = col1.row(align=False)
+        split = layout_split(row, factor=0.275)
+        col = split.column(align=True)
+        col.label(text="Voxelizer Processes:")
+        col = split.column(align=True)
+        col.prop(prefs, "voxelizer_processes", text="")
+        col1.separator()
+        row = col1.row(align=False)
+        split = layout_split(row, factor=0.275)
+        col = split.column(align=True)
+        col.label(text="Blueprint Layers:")
+        col = split.column(align=True)
+        col.prop(prefs, "blueprint_layers", text="")
+        col1.separator()
+        row = col1.row(align=False)
+        split = layout_split(row, factor=0.275)
+        col = split.column(align=True)
+        col.label(text="Undo Memory (MB):")
+        col = split.column(align=True)
+        col.prop(prefs, "undo_memory", text="")
+        col1.separator()
+        row = col1.row(align=False)
+        split = layout_split(row, factor=0.275)
+        col = split.column(align=True)
+        col.label(text="Cache Memory (MB):")
+        col = split.column(align=True)
+        col.prop(prefs, "cache_memory", text="")
+        col1.separator()
 
         # updater draw function
         addon_updater_ops.update_settings_ui(self,context)
@@ -725,10 +725,24 @@ class CreatedModelProperties(bpy.types.PropertyGroup):
             ("Y", "Y", "Cast rays along Y axis for insideness calculations"),
             ("Z", "Z", "Cast rays along Z axis for insideness calculations"),
             ("XYZ", "XYZ (Best Result)", "Cast rays in all axis directions for insideness calculation (slowest; uses result consistent for at least 2 of the 3 rays)"),
+            ("WINDING", "Winding Number", "Calculate insideness from the generalized winding number of the source mesh (robust to holes and overlaps in non-closed meshes)"),
         ],
         update=dirty_matrix,
         default="HIGH EFFICIENCY",
     )
+    voxelizer = EnumProperty(
+        name="Voxelizer",
+        description="Method used to calculate the brick shell from the source mesh",
+        items=[
+            ("LATTICE", "Lattice Ray Casting", "Cast rays along the edges of the lattice from every lattice point"),
+            ("SCANLINE", "Scanline", "Cast a single ray through each column of the lattice and fill inside spans by intersection parity (much faster at high resolutions)"),
+            ("PARALLEL", "Parallel", "Intersect lattice columns with the source triangles in worker processes, split into slabs of the lattice (number of processes set in the addon preferences)"),
+            ("ADAPTIVE", "Adaptive", "Cast rays at full resolution only through blocks of the lattice touching the source surface, filling other blocks from a low resolution pass (source must be a single closed mesh)"),
+            ("SURFACE", "Surface", "Find every brick overlapped by each source triangle and fill the interior by intersection parity (never misses thin features; cost, and memory for hollow models, scales with surface area rather than lattice volume)"),
+        ],
+        update=dirty_matrix,
+        default="LATTICE",
+    )
     use_normals = BoolProperty(
         name="Use Normals",
         description="Use normals to calculate insideness of bricks (WARNING: May produce inaccurate model if source is not single closed mesh)",
@@ -813,6 +827,7 @@ class CreatedModelProperties(bpy.types.PropertyGroup):
     build_is_dirty = BoolProperty(default=False)
     bricks_are_dirty = BoolProperty(default=True)
     matrix_is_dirty = BoolProperty(default=True)
+    source_is_dirty = BoolProperty(default=False)
     matrix_lost = BoolProperty(default=False)
     internal_is_dirty = BoolProperty(default=True)
     last_logo_type = StringProperty(default="NONE")
@@ -17,12 +17,16 @@
 
 # System imports
 import marshal
+import zlib
 
 # Blender imports
 import bpy
 
 # Module imports
 from .caches import bricker_bfm_cache
+from ..functions.common.blender import get_addon_preferences
+from ..functions.bricksdict.columnar import BricksDict, changed_keys
+from ..functions.bricksdict.deep_cache import decode_deep_cache, encode_deep_cache
 
 python_undo_state = {}
 
@@ -52,14 +56,14 @@ class UndoStack():
 
     def __init__(self):
         assert hasattr(UndoStack, "creating"), "Do not create new UndoStack directly!  Use UndoStack.new()"
-        self.undo = []  # undo stack of causing actions, FSM state, tool states, and rftargets
-        self.redo = []  # redo stack of causing actions, FSM state, tool states, and rftargets
+        self.undo = []  # undo stack of causing actions and the changes they made to bricksdicts
+        self.redo = []  # redo stack of causing actions and the changes they made to bricksdicts
 
     ###################################################
     # class variables
 
     instance = None
-    undo_depth = 500    # set in addon preferences?
+    default_max_bytes = 256 * 2**20  # (if addon preferences are unavailable)
 
     ###################################################
     # undo / redo stack operations
@@ -85,50 +89,91 @@ class UndoStack():
 
     def isUpdating(self): return bpy.props.bricker_updating_undo_state
 
-    def _create_state(self, action, bfm_cache):
+    def get_size(self):
+        """ returns number of bytes used by undo and redo states (changes they recorded, and snapshots of the open state) """
+        return sum(state["size"] for state in self.undo + self.redo)
+
+    def get_max_bytes(self):
+        prefs = get_addon_preferences()
+        return prefs.undo_memory * 2**20 if prefs else self.default_max_bytes
+
+    def _create_state(self, action, affected_ids):
+        """ returns state recording changes to bricksdicts of 'affected_ids' until it is closed (see '_close_state') """
+        if affected_ids == "ALL":
+            snapshots = {cm_id: _snapshot(bricksdict) for cm_id, bricksdict in bricker_bfm_cache.items()}
+        else:
+            # (only get affected bricksdicts, so others spilled to disk by the cache aren't loaded)
+            snapshots = {cm_id: _snapshot(bricker_bfm_cache.get(cm_id)) for cm_id in affected_ids if cm_id in bricker_bfm_cache}
         return {
             "action":       action,
-            "bfm_cache":    bfm_cache
+            "snapshots":    snapshots,  # bricksdicts as of the undo push (only until the state is closed)
+            "changes":      {},
+            "size":         sum(_snapshot_size(snapshot) for snapshot in snapshots.values()),
             }
 
-    def _restore_state(self, state):
-        global bricker_bfm_cache
-        for key in state["bfm_cache"].keys():
-            bricker_bfm_cache[key] = marshal.loads(state["bfm_cache"][key])
+    def _close_state(self, state):
+        """ record changes made to bricksdicts since 'state' was created and drop its snapshots """
+        for cm_id, snapshot in state["snapshots"].items():
+            state["size"] -= _snapshot_size(snapshot)
+            changes = _get_changes(snapshot, bricker_bfm_cache.get(cm_id))
+            if changes is not None:
+                state["changes"][cm_id] = changes
+                state["size"] += sum(len(data) for data in changes[1:] if data is not None)
+        state["snapshots"] = {}
 
-    def append_state(self, action, stackType, affected_ids="ALL"):
+    def _restore_state(self, state, undo=True):
+        """ revert changes recorded in 'state' (or apply them again if not 'undo') """
         global bricker_bfm_cache
-        stack = getattr(self, stackType)
-        bfm_cached = stack[-1]["bfm_cache"] if len(stack) > 0 else {}
-        # perform append state in active Blender session
-        new_bfm_cache = {}
-        for cm_id in bricker_bfm_cache:
-            if affected_ids != "ALL" and cm_id not in affected_ids and cm_id in bfm_cached:
-                new_bfm_cache[cm_id] = bfm_cached[cm_id]
+        self._close_state(state)
+        for cm_id, (kind, before, after) in state["changes"].items():
+            if kind == "ENTRIES":
+                bricksdict = bricker_bfm_cache.get(cm_id)
+                if not isinstance(bricksdict, BricksDict):
+                    continue
+                keys, befores, afters = marshal.loads(zlib.decompress(before))
+                for key, entry in zip(keys, befores if undo else afters):
+                    if entry is None:
+                        bricksdict.pop(key, None)
+                    else:
+                        bricksdict[key] = entry
             else:
-                new_bfm_cache[cm_id] = marshal.dumps(bricker_bfm_cache[cm_id])
-        stack.append(self._create_state(action, new_bfm_cache))
-        return new_bfm_cache
+                data = before if undo else after
+                bricker_bfm_cache[cm_id] = None if data is None else decode_deep_cache(data)
+
+    def _limit_size(self):
+        """ drop oldest states until they fit in the memory budget set in addon preferences (see 'get_size') """
+        size = self.get_size()
+        max_bytes = self.get_max_bytes()
+        while size > max_bytes and len(self.undo) > 1:
+            size -= self.undo.pop(0)["size"]
 
     def undo_push(self, action, affected_ids="ALL", repeatable=False):
+        """ push state recording the changes about to be made to bricksdicts of 'affected_ids'
+
+        returns dict of copies of those bricksdicts as of the push (do not modify them; copy them instead)
+
+        """
         # skip pushing to undo if action is repeatable and we are repeating actions
         if repeatable and self.undo and self.undo[-1]["action"] == action:
             return
         # skip pushing to undo if bricker not initialized
         if not bpy.props.bricker_initialized:
             return
-        new_bfm_cache = self.append_state(action, "undo", affected_ids=affected_ids)
-        while len(self.undo) > self.undo_depth:
-            self.undo.pop(0)  # limit stack size
+        if self.undo:
+            self._close_state(self.undo[-1])
+        state = self._create_state(action, affected_ids)
+        self.undo.append(state)
         self.redo.clear()
+        self._limit_size()
         self.instrument_write(action)
-        return new_bfm_cache
+        return state["snapshots"]
 
     def undo_pop(self):
         if not self.undo:
             return
-        self.append_state("undo", "redo")
-        self._restore_state(self.undo.pop())
+        state = self.undo.pop()
+        self._restore_state(state)
+        self.redo.append(state)
         self.instrument_write("undo")
         # iterate undo states
         global python_undo_state
@@ -148,8 +193,9 @@ class UndoStack():
     def redo_pop(self):
         if not self.redo:
             return
-        self.append_state("redo", "undo")
-        self._restore_state(self.redo.pop())
+        state = self.redo.pop()
+        self._restore_state(state, undo=False)
+        self.undo.append(state)
         self.instrument_write("redo")
         # iterate undo states
         global python_undo_state
@@ -173,3 +219,39 @@ class UndoStack():
         tb.write("")        # position cursor to end
         tb.write(data_str)
         tb.write("\n")
+
+
+def _snapshot(bricksdict):
+    """ returns copy of light cache value that stays unchanged as the light cache changes """
+    if isinstance(bricksdict, BricksDict):
+        return bricksdict.copy()
+    # store frame caches of animations (or None for cleared caches) whole
+    return None if bricksdict is None else encode_deep_cache(bricksdict)
+
+
+def _snapshot_size(snapshot):
+    """ returns estimated number of bytes used by value returned by '_snapshot' """
+    if isinstance(snapshot, BricksDict):
+        return snapshot.nbytes
+    return 0 if snapshot is None else len(snapshot)
+
+
+def _get_changes(snapshot, bricksdict):
+    """ returns (kind, before, after) of changes from 'snapshot' to light cache value 'bricksdict' (None if unchanged)
+
+    changes between bricksdicts are stored as the entries at the changed keys before and after (None where missing)
+
+    """
+    if isinstance(snapshot, BricksDict) and isinstance(bricksdict, BricksDict):
+        keys = changed_keys(bricksdict, snapshot)
+        if not keys:
+            return None
+        # (collecting entries is slow, so bricksdicts that mostly changed, e.g. by brickifying, are stored whole instead)
+        if len(keys) <= max(len(bricksdict), len(snapshot)) // 4:
+            befores = [dict(snapshot[key]) if key in snapshot else None for key in keys]
+            afters = [dict(bricksdict[key]) if key in bricksdict else None for key in keys]
+            return ("ENTRIES", zlib.compress(marshal.dumps((keys, befores, afters)), 1), None)
+    before = encode_deep_cache(snapshot) if isinstance(snapshot, BricksDict) else snapshot
+    after = None if bricksdict is None else encode_deep_cache(bricksdict)
+    return None if before == after else ("WHOLE", before, after)
+
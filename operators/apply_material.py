@@ -103,7 +103,7 @@ class BRICKER_OT_apply_material(bpy.types.Operator):
                 if mat is None: self.report({"WARNING"}, "Specified material doesn't exist")
 
                 for brick in bricks:
-                    if self.action == "CUSTOM" or (self.action == "INTERNAL" and not is_on_shell(bricksdict, brick.name.split("__")[-1], zstep=cm.zstep, shell_depth=cm.mat_shell_depth) and cm.mat_shell_depth <= cm.last_mat_shell_depth):
+                    if self.action == "CUSTOM" or (self.action == "INTERNAL" and not is_on_shell(bricksdict, get_dict_key(brick.name), zstep=cm.zstep, shell_depth=cm.mat_shell_depth) and cm.mat_shell_depth <= cm.last_mat_shell_depth):
                         if len(brick.material_slots) == 0:
                             # Assign material to object data
                             brick.data.materials.append(mat)
@@ -114,7 +114,7 @@ class BRICKER_OT_apply_material(bpy.types.Operator):
                         brick.material_slots[0].material = mat
                     # update bricksdict mat_name values for split models
                     if last_split_model:
-                        bricksdict[brick.name.split("__")[-1]]["mat_name"] = mat.name
+                        bricksdict[get_dict_key(brick.name)]["mat_name"] = mat.name
                 # update bricksdict mat_name values for not split models
                 if self.action == "CUSTOM" and not cm.last_split_model:
                     for k in bricksdict:
@@ -141,7 +141,7 @@ class BRICKER_OT_apply_material(bpy.types.Operator):
             # apply a random material to each brick
             dkeys = sorted(list(bricksdict.keys()))
             for brick in bricks:
-                cur_key = brick.name.split("__")[-1]
+                cur_key = get_dict_key(brick.name)
                 # iterate seed and set random index
                 rand_s0.seed(random_mat_seed + dkeys.index(cur_key))
                 rand_idx = rand_s0.randint(0, len(brick_mats)) if len(brick_mats) > 1 else 0
@@ -21,7 +21,6 @@ import sys
 import math
 import shutil
 import json
-import marshal
 
 # Blender imports
 import bpy
@@ -74,7 +73,7 @@ class BRICKER_OT_brickify(bpy.types.Operator):
                         if anim_action: self.report({"INFO"}, "Completed frame %(frame)s of model '%(n)s'" % locals())
                         # cache bricksdict
                         retrieved_data = self.job_manager.get_retrieved_python_data(job)
-                        bricksdict = None if retrieved_data["bricksdict"] in ("", "null") else marshal.loads(bytes.fromhex(retrieved_data["bricksdict"]))
+                        bricksdict = None if retrieved_data["bricksdict"] in ("", "null") else loads_bricksdict(bytes.fromhex(retrieved_data["bricksdict"]))
                         cm.brick_sizes_used = retrieved_data["brick_sizes_used"]
                         cm.brick_types_used = retrieved_data["brick_types_used"]
                         cm.rgba_vals = retrieved_data["rgba_vals"]
@@ -291,6 +290,16 @@ class BRICKER_OT_brickify(bpy.types.Operator):
             if not matrix_dirty and get_bricksdict(cm) is not None:
                 cm.matrix_is_dirty = False
 
+        # check if source was edited since last brickify (blueprint is patched around the edits)
+        if self.action == "UPDATE_MODEL" and not matrix_dirty and not cm.is_smoke and source_was_edited(cm, self.source):
+            if cm.build_is_dirty:
+                # other build settings changed too, so the whole blueprint is generated again
+                cm.matrix_lost = True
+                matrix_dirty = True
+            else:
+                cm.source_is_dirty = True
+                cm.build_is_dirty = True
+
         # store parent collections to source
         store_parent_collections_to_source(cm, self.source)
 
@@ -335,6 +344,7 @@ class BRICKER_OT_brickify(bpy.types.Operator):
         cm.build_is_dirty = False
         cm.bricks_are_dirty = False
         cm.matrix_is_dirty = False
+        cm.source_is_dirty = False
         cm.matrix_lost = False
         cm.internal_is_dirty = False
         cm.model_created = "ANIM" not in self.action
@@ -378,8 +388,8 @@ class BRICKER_OT_brickify(bpy.types.Operator):
         if (matrix_dirty or self.action != "UPDATE_MODEL") and cm.customized:
             cm.customized = False
 
-        # delete old bricks if present
-        if self.action.startswith("UPDATE") and (matrix_dirty or cm.build_is_dirty or cm.last_split_model != cm.split_model or self.brickify_in_background):
+        # delete old bricks if present (bricks of split models are kept when only the bricks patched for edits to the source are redrawn)
+        if self.action.startswith("UPDATE") and (matrix_dirty or cm.build_is_dirty or cm.last_split_model != cm.split_model or self.brickify_in_background) and not redraws_patched_bricks(cm):
             # skip source, dupes, and parents
             skip_trans_and_anim_data = cm.animated or (cm.split_model or cm.last_split_model) and (matrix_dirty or cm.build_is_dirty)
             bpy.props.bricker_trans_and_anim_data = BRICKER_OT_delete_model.clean_up("MODEL", skip_dupes=True, skip_parents=True, skip_source=True, skip_trans_and_anim_data=skip_trans_and_anim_data)[4]
@@ -387,8 +397,11 @@ class BRICKER_OT_brickify(bpy.types.Operator):
             store_transform_data(cm, None)
             bpy.props.bricker_trans_and_anim_data = []
 
-        # get previously created source duplicate
+        # get previously created source duplicate (replaced if source was edited)
         source_dup = bpy.data.objects.get(n + "__dup__")
+        if source_dup is not None and cm.source_is_dirty:
+            delete(source_dup, remove_meshes=True)
+            source_dup = None
         if source_dup is None:
             # duplicate source
             source_dup = duplicate(self.source, link_to_scene=True)
@@ -470,6 +483,7 @@ class BRICKER_OT_brickify(bpy.types.Operator):
             scn.frame_set(self.orig_frame)
 
         cm.last_source_mid = vec_to_str(parent_loc)
+        store_source_hash(cm, self.source)
 
     def brickify_animation(self, scn, cm, n, matrix_dirty):
         """ create brick animation """
@@ -19,7 +19,6 @@ import os
 import sys
 import math
 import json
-import marshal
 
 # Blender imports
 import bpy
@@ -53,7 +52,7 @@ class BRICKER_OT_brickify_in_background(bpy.types.Operator):
         else:
             BRICKER_OT_brickify.brickify_active_frame(self.action)
         # save last cache to prop temporarily
-        bpy.props.bfm_cache_bytes_hex = marshal.dumps(bricker_bfm_cache[cm.id]).hex()
+        bpy.props.bfm_cache_bytes_hex = dumps_bricksdict(bricker_bfm_cache[cm.id]).hex()
         return {"FINISHED"}
 
     ################################################
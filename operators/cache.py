@@ -68,3 +68,17 @@ class BRICKER_OT_clear_cache(bpy.types.Operator):
         self.undo_stack.undo_push('clear_cache')
 
     #############################################
+
+
+class BRICKER_OT_reset_cache_stats(bpy.types.Operator):
+    """Reset hit, miss, and eviction counters of Bricker's caches"""
+    bl_idname = "bricker.reset_cache_stats"
+    bl_label = "Reset Cache Stats"
+    bl_options = {"REGISTER"}
+
+    ################################################
+    # Blender Operator methods
+
+    def execute(self, context):
+        reset_cache_stats()
+        return{"FINISHED"}
@@ -112,6 +112,7 @@ class BRICKER_OT_bricksculpt(Operator, BricksculptFramework, BricksculptTools, B
         self.dimensions = get_brick_dimensions(cm.brick_height, cm.zstep, cm.gap)
         self.obj = None
         self.cm_idx = cm.idx
+        self.source_name = n
         self.zstep = cm.zstep
         self.keys_to_merge_on_commit = []
         self.brick_type = get_brick_type(cm.brick_type)
@@ -51,7 +51,7 @@ class BricksculptTools:
             status = BRICKER_OT_draw_adjacent.toggle_brick(cm, n, self.bricksdict, self.adj_locs, [[False]], self.dimensions, next_loc, cur_key, cur_loc, obj_size, self.brick_type, 0, 0, self.keys_to_merge_on_commit, is_placeholder_brick=True)
             if not status["val"]:
                 self.report({status["report_type"]}, status["msg"])
-            self.added_bricks.append(self.bricksdict[next_key]["name"])
+            self.added_bricks.append(get_brick_name(self.source_name, next_key))
             self.keys_to_merge_on_release.append(next_key)
             self.all_updated_keys.append(cur_key)
             # draw created bricks
@@ -66,7 +66,7 @@ class BricksculptTools:
             cur_loc = get_dict_loc(self.bricksdict, cur_key)
             keys_to_update, only_new_keys = OBJECT_OT_delete_override.update_adj_bricksdicts(self.bricksdict, cm.zstep, cur_key, cur_loc, [])
             if deep_delete:
-                self.added_bricks_from_delete += [self.bricksdict[k]["name"] for k in only_new_keys]
+                self.added_bricks_from_delete += [get_brick_name(self.source_name, k) for k in only_new_keys]
             # reset bricksdict values
             self.bricksdict[cur_key]["draw"] = False
             self.bricksdict[cur_key]["val"] = 0
@@ -76,7 +76,7 @@ class BricksculptTools:
             self.bricksdict[cur_key]["rotated"] = False
             self.bricksdict[cur_key]["top_exposed"] = False
             self.bricksdict[cur_key]["bot_exposed"] = False
-            brick = bpy.data.objects.get(self.bricksdict[cur_key]["name"])
+            brick = bpy.data.objects.get(get_brick_name(self.source_name, cur_key))
             if brick is not None:
                 delete(brick)
             tag_redraw_areas("VIEW_3D")
@@ -91,18 +91,18 @@ class BricksculptTools:
             brick_keys = [cur_key]
         self.bricksdict[cur_key]["mat_name"] = self.mat_name
         self.bricksdict[cur_key]["custom_mat_name"] = True
-        self.added_bricks.append(self.bricksdict[cur_key]["name"])
+        self.added_bricks.append(get_brick_name(self.source_name, cur_key))
         self.keys_to_merge_on_commit += brick_keys
         # draw created bricks
         draw_updated_bricks(cm, self.bricksdict, brick_keys, action="updating material", select_created=False, temp_brick=True)
 
     def split_brick(self, cm, event, cur_key, cur_loc, obj_size):
-        brick = bpy.data.objects.get(self.bricksdict[cur_key]["name"])
+        brick = bpy.data.objects.get(get_brick_name(self.source_name, cur_key))
         if (event.alt and max(self.bricksdict[cur_key]["size"][:2]) > 1) or (event.shift and self.bricksdict[cur_key]["size"][2] > 1):
             brick_keys = split_brick(self.bricksdict, cur_key, cm.zstep, cm.brick_type, loc=cur_loc, v=event.shift, h=event.alt)
             self.all_updated_keys += brick_keys
             # remove large brick
-            brick = bpy.data.objects.get(self.bricksdict[cur_key]["name"])
+            brick = bpy.data.objects.get(get_brick_name(self.source_name, cur_key))
             delete(brick)
             # draw split bricks
             draw_updated_bricks(cm, self.bricksdict, brick_keys, action="splitting bricks", select_created=True, temp_brick=True)
@@ -113,7 +113,7 @@ class BricksculptTools:
         if state == "DRAG":
             # TODO: Light up bricks as they are selected to be merged
             self.parent_locs_to_merge_on_release.append((cur_loc, cur_key))
-            self.added_bricks.append(self.bricksdict[cur_key]["name"])
+            self.added_bricks.append(get_brick_name(self.source_name, cur_key))
             select(self.obj)
         elif state == "RELEASE":
             # assemble keys_to_merge_on_release
@@ -126,7 +126,7 @@ class BricksculptTools:
             if len(self.keys_to_merge_on_release) > 1:
                 # delete outdated bricks
                 for key in self.keys_to_merge_on_release:
-                    brick_name = "Bricker_%(source_name)s__%(key)s" % locals()
+                    brick_name = get_brick_name(source_name, key)
                     delete(bpy.data.objects.get(brick_name))
                 # split up bricks
                 split_bricks(self.bricksdict, cm.zstep, keys=self.keys_to_merge_on_release)
@@ -163,7 +163,7 @@ class BricksculptTools:
 
     def hide_if_on_layer(self, key, loc, curZ, zstep):
         if loc[2] > curZ or loc[2] + self.bricksdict[key]["size"][2] / zstep <= curZ:
-            brick = bpy.data.objects.get(self.bricksdict[key]["name"])
+            brick = bpy.data.objects.get(get_brick_name(self.source_name, key))
             if brick is None:
                 return
             hide(brick, render=False)
@@ -175,7 +175,7 @@ class BricksculptTools:
 
     def split_brick_and_get_nearest_1x1(self, cm, n, cur_key, cur_loc, obj_size):
         brick_keys = split_brick(self.bricksdict, cur_key, cm.zstep, cm.brick_type, loc=cur_loc, v=True, h=True)
-        brick = bpy.data.objects.get(self.bricksdict[cur_key]["name"])
+        brick = bpy.data.objects.get(get_brick_name(self.source_name, cur_key))
         delete(brick)
         cur_key = self.get_nearest_loc_to_cursor(brick_keys)
         return brick_keys, cur_key
@@ -207,7 +207,7 @@ class BricksculptTools:
             merged_keys = self.keys_to_merge_on_commit
         # remove 1x1 bricks merged into another brick
         for k in self.keys_to_merge_on_commit:
-            delete(None if k in merged_keys else bpy.data.objects.get(self.bricksdict[k]["name"]))
+            delete(None if k in merged_keys else bpy.data.objects.get(get_brick_name(self.source_name, k)))
         # set exposure of created/updated bricks
         keys_to_update = uniquify(merged_keys + self.all_updated_keys)
         for k in keys_to_update:
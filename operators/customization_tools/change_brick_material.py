@@ -16,7 +16,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 # System imports
-import marshal
+# NONE!
 
 # Blender imports
 import bpy
@@ -69,7 +69,7 @@ class BRICKER_OT_change_brick_material(Operator):
                 cm = get_item_by_id(scn.cmlist, cm_id)
                 self.undo_stack.iterate_states(cm)
                 # initialize vars
-                bricksdict = marshal.loads(self.cached_bfm[cm_id])
+                bricksdict = self.cached_bfm[cm_id].copy()
                 keys_to_update = set()
                 cm.customized = True
 
@@ -77,8 +77,7 @@ class BRICKER_OT_change_brick_material(Operator):
                 for obj_name in self.obj_names_dict[cm_id]:
                     dkey = get_dict_key(obj_name)
                     # change material
-                    keys_in_brick = get_keys_in_brick(bricksdict, bricksdict[dkey]["size"], cm.zstep, key=dkey)
-                    for k in keys_in_brick:
+                    for k in bricksdict.brick_keys(dkey):
                         bricksdict[k]["mat_name"] = target_mat_name
                         bricksdict[k]["custom_mat_name"] = True
                     # delete the object that was split
@@ -161,7 +161,7 @@ class BRICKER_OT_change_brick_type(Operator):
             cm = get_item_by_id(scn.cmlist, cm_id)
             self.undo_stack.iterate_states(cm)
             # initialize vars
-            bricksdict = deepcopy(self.bricksdicts[cm_id])
+            bricksdict = self.bricksdicts[cm_id].copy()
             keys_to_update = set()
             update_has_custom_objs(cm, target_brick_type)
             cm.customized = True
@@ -191,7 +191,7 @@ class BRICKER_OT_change_brick_type(Operator):
 
                 # verify locations above are not obstructed
                 if target_brick_type in get_brick_types(height=3) and size[2] == 1:
-                    above_keys = [list_to_str((x0 + x, y0 + y, z0 + z)) for z in range(1, 3) for y in range(size[1]) for x in range(size[0])]
+                    above_keys = [loc_to_key((x0 + x, y0 + y, z0 + z)) for z in range(1, 3) for y in range(size[1]) for x in range(size[0])]
                     obstructed = False
                     for cur_key in above_keys:
                         if cur_key in bricksdict and bricksdict[cur_key]["draw"]:
@@ -209,7 +209,8 @@ class BRICKER_OT_change_brick_type(Operator):
                 # update height of brick if necessary, and update dictionary accordingly
                 if flat_brick_type(brick_type):
                     dimensions = get_brick_dimensions(brick_height, cm.zstep, gap)
-                    size = update_brick_size_and_dict(dimensions, get_source_name(cm), bricksdict, size, dkey, dloc, cur_height=size[2], target_type=target_brick_type)
+                    size = update_brick_size_and_dict(dimensions, bricksdict, size, dkey, dloc, cur_height=size[2], target_type=target_brick_type)
+                    bricksdict[dkey]["size"] = size
 
                 # check if brick spans 3 matrix locations
                 b_and_p_brick = flat_brick_type(brick_type) and size[2] == 3
@@ -219,8 +220,8 @@ class BRICKER_OT_change_brick_type(Operator):
                 for cur_loc in brick_locs:
                     bricksdict = verify_all_brick_exposures(scn, cm.zstep, cur_loc, bricksdict, decriment=3 if b_and_p_brick else 1)
                     # add bricks to keys_to_update
-                    keys_to_update |= set([get_parent_key(bricksdict, list_to_str((x0 + x, y0 + y, z0 + z))) for z in (-1, 0, 3 if b_and_p_brick else 1) for y in range(size[1]) for x in range(size[0])])
-                obj_names_to_select += [bricksdict[list_to_str(loc)]["name"] for loc in brick_locs]
+                    keys_to_update |= set([get_parent_key(bricksdict, loc_to_key((x0 + x, y0 + y, z0 + z))) for z in (-1, 0, 3 if b_and_p_brick else 1) for y in range(size[1]) for x in range(size[0])])
+                obj_names_to_select += [get_brick_name(get_source_name(cm), loc_to_key(loc)) for loc in brick_locs]
 
             # remove null keys
             keys_to_update = [x for x in keys_to_update if x != None]
@@ -202,7 +202,7 @@ class BRICKER_OT_draw_adjacent(Operator):
     @staticmethod
     def get_brick_d(bricksdict, dkl):
         """ set up adj_brick_d """
-        adjacent_key = list_to_str(dkl)
+        adjacent_key = loc_to_key(dkl)
         try:
             brick_d = bricksdict[adjacent_key]
             return adjacent_key, brick_d
@@ -240,6 +240,7 @@ class BRICKER_OT_draw_adjacent(Operator):
         dir_bool = None
 
         adjacent_key, adj_brick_d = BRICKER_OT_draw_adjacent.get_brick_d(bricksdict, adjacent_loc)
+        adjacent_key_str = key_to_str(adjacent_key)
 
         # get duplicate of nearest_intersection tuple
         ni = bricksdict[dkey]["near_intersection"]
@@ -248,7 +249,6 @@ class BRICKER_OT_draw_adjacent(Operator):
         if not adj_brick_d:
             co = BRICKER_OT_draw_adjacent.get_new_coord(cm, bricksdict, dkey, dloc, adjacent_key, adjacent_loc, dimensions)
             bricksdict[adjacent_key] = create_bricksdict_entry(
-                name=              "Bricker_%(n)s__%(adjacent_key)s" % locals(),
                 loc=               adjacent_loc,
                 co=                co,
                 near_face=         bricksdict[dkey]["near_face"],
@@ -258,7 +258,7 @@ class BRICKER_OT_draw_adjacent(Operator):
             )
             adj_brick_d = bricksdict[adjacent_key]
             # dir_bool = [side, False]
-            # return {"val":False, "dir_bool":dir_bool, "report_type":"WARNING", "msg":"Matrix not available at the following location: %(adjacent_key)s" % locals()}
+            # return {"val":False, "dir_bool":dir_bool, "report_type":"WARNING", "msg":"Matrix not available at the following location: %(adjacent_key_str)s" % locals()}
 
         # if brick exists there
         if adj_brick_d["draw"] and not (add_brick and adj_bricks_created[side][brick_num]):
@@ -267,12 +267,12 @@ class BRICKER_OT_draw_adjacent(Operator):
                 # reset direction bool if no bricks could be added
                 if not BRICKER_OT_draw_adjacent.is_brick_already_created(adj_locs, adj_bricks_created, brick_num, side):
                     dir_bool = [side, False]
-                return {"val":False, "dir_bool":dir_bool, "report_type":"INFO", "msg":"Brick already exists in the following location: %(adjacent_key)s" % locals()}
+                return {"val":False, "dir_bool":dir_bool, "report_type":"INFO", "msg":"Brick already exists in the following location: %(adjacent_key_str)s" % locals()}
             # if attempting to remove brick
             elif adj_brick_d["created_from"] == dkey:
                 # update bricksdict values for brick being removed
                 x0, y0, z0 = adjacent_loc
-                brick_keys = [list_to_str((x0, y0, z0 + z)) for z in range((cm.zstep + 2) % 4 if side in (4, 5) else 1)]
+                brick_keys = [loc_to_key((x0, y0, z0 + z)) for z in range((cm.zstep + 2) % 4 if side in (4, 5) else 1)]
                 for k in brick_keys:
                     bricksdict[k]["draw"] = False
                     set_cur_brick_val(bricksdict, get_dict_loc(bricksdict, k), k, action="REMOVE")
@@ -287,13 +287,13 @@ class BRICKER_OT_draw_adjacent(Operator):
         else:
             # if attempting to remove brick
             if not add_brick:
-                return {"val":False, "dir_bool":dir_bool, "report_type":"INFO", "msg":"Brick does not exist in the following location: %(adjacent_key)s" % locals()}
+                return {"val":False, "dir_bool":dir_bool, "report_type":"INFO", "msg":"Brick does not exist in the following location: %(adjacent_key_str)s" % locals()}
             # check if locs above current are available
             cur_type = adj_bricks_created[side][brick_num] if adj_bricks_created[side][brick_num] else "PLATE"
             if check_two_more_above:
                 x0, y0, z0 = adjacent_loc
                 for z in range(1, 3):
-                    new_key = list_to_str((x0, y0, z0 + z))
+                    new_key = loc_to_key((x0, y0, z0 + z))
                     # if brick drawn in next loc and not just rerunning based on new direction selection
                     if (new_key in bricksdict and bricksdict[new_key]["draw"] and
                         (not BRICKER_OT_draw_adjacent.is_brick_already_created(adj_locs, adj_bricks_created, brick_num, side) or
@@ -308,7 +308,7 @@ class BRICKER_OT_draw_adjacent(Operator):
                         keys_to_merge.append(new_key)
             # update dictionary of locations above brick
             if flat_brick_type(cm.brick_type) and side in (4, 5):
-                update_brick_size_and_dict(dimensions, n, bricksdict, [1, 1, new_brick_height], adjacent_key, adjacent_loc, dec=2 if side == 5 else 0, cur_type=cur_type, target_type=target_type, created_from=dkey)
+                update_brick_size_and_dict(dimensions, bricksdict, [1, 1, new_brick_height], adjacent_key, adjacent_loc, dec=2 if side == 5 else 0, cur_type=cur_type, target_type=target_type, created_from=dkey)
             # update dictionary location of adjacent brick created
             adj_brick_d["draw"] = True
             adj_brick_d["type"] = target_type
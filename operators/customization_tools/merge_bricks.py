@@ -137,7 +137,7 @@ class BRICKER_OT_merge_bricks(Operator):
         height_3_only = merge_vertical and not any_height
 
         # sort keys
-        keys.sort(key=lambda k: (str_to_list(k)[0] * str_to_list(k)[1] * str_to_list(k)[2]))
+        keys.sort(key=lambda k: (key_to_loc(k)[0] * key_to_loc(k)[1] * key_to_loc(k)[2]))
 
         for key in keys:
             # skip keys already merged to another brick
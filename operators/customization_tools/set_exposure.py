@@ -16,7 +16,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 # System imports
-import marshal
+# NONE!
 
 # Blender imports
 import bpy
@@ -63,20 +63,15 @@ class BRICKER_OT_set_exposure(Operator):
             for cm_id in self.obj_names_dict.keys():
                 cm = get_item_by_id(scn.cmlist, cm_id)
                 self.undo_stack.iterate_states(cm)
-                bricksdict = marshal.loads(self.cached_bfm[cm_id])
+                bricksdict = self.cached_bfm[cm_id].copy()
                 keys_to_update = []
                 cm.customized = True
-                zstep = cm.zstep
 
                 # iterate through names of selected objects
                 for obj_name in self.obj_names_dict[cm_id]:
                     # get dict key details of current obj
                     dkey = get_dict_key(obj_name)
-                    # get size of current brick (e.g. [2, 4, 1])
-                    obj_size = bricksdict[dkey]["size"]
-
-                    keys_in_brick = get_keys_in_brick(bricksdict, obj_size, zstep, key=dkey)
-                    for key in keys_in_brick:
+                    for key in bricksdict.brick_keys(dkey):
                         # set top as exposed
                         if self.side in ("TOP", "BOTH"):
                             bricksdict[key]["top_exposed"] = not bricksdict[key]["top_exposed"]
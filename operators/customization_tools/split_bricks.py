@@ -16,7 +16,7 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 # System imports
-import marshal
+# NONE!
 
 # Blender imports
 import bpy
@@ -131,7 +131,7 @@ class BRICKER_OT_split_bricks(Operator):
             for cm_id in self.obj_names_dict.keys():
                 cm = get_item_by_id(scn.cmlist, cm_id)
                 self.undo_stack.iterate_states(cm)
-                bricksdict = marshal.loads(self.cached_bfm[cm_id]) if deep_copy_matrix else self.bricksdicts[cm_id]
+                bricksdict = self.cached_bfm[cm_id].copy() if deep_copy_matrix else self.bricksdicts[cm_id]
                 keys_to_update = set()
                 cm.customized = True
 
@@ -368,6 +368,7 @@ class BRICKER_OT_delete_model(bpy.types.Operator):
             "model_is_dirty",
             "build_is_dirty",
             "matrix_is_dirty",
+            "source_is_dirty",
             "bricks_are_dirty",
             "armature",
             "expose_parent",
@@ -117,6 +117,7 @@ class OBJECT_OT_delete_override(Operator):
             cm = get_item_by_id(scn.cmlist, cm_id)
             if created_with_unsupported_version(cm):
                 continue
+            n = get_source_name(cm)
             last_blender_state = cm.blender_undo_state
             # get bricksdict from cache
             bricksdict = get_bricksdict(cm)
@@ -139,7 +140,7 @@ class OBJECT_OT_delete_override(Operator):
                 for x in range(x0, x0 + obj_size[0]):
                     for y in range(y0, y0 + obj_size[1]):
                         for z in range(z0, z0 + (obj_size[2] // cm.zstep)):
-                            cur_key = list_to_str((x, y, z))
+                            cur_key = loc_to_key((x, y, z))
                             # make adjustments to adjacent bricks
                             if cm.auto_update_on_delete and cm.last_split_model:
                                 self.update_adj_bricksdicts(bricksdict, cm.zstep, cur_key, [x, y, z], keys_to_update)
@@ -165,7 +166,7 @@ class OBJECT_OT_delete_override(Operator):
                 keys_to_update = uniquify1(keys_to_update)
                 # remove duplicate keys from the list and delete those objects
                 for k2 in keys_to_update:
-                    brick = bpy.data.objects.get(bricksdict[k2]["name"])
+                    brick = bpy.data.objects.get(get_brick_name(n, k2))
                     delete(brick)
                 # create new bricks at all keys_to_update locations (attempts merge as well)
                 draw_updated_bricks(cm, bricksdict, keys_to_update, select_created=False)
@@ -225,7 +226,7 @@ class OBJECT_OT_delete_override(Operator):
                     keys_to_update.append(k0)
                     new_bricks.append(k0)
         # top of bricks below are now exposed
-        k0 = list_to_str((x, y, z - 1))
+        k0 = loc_to_key((x, y, z - 1))
         if k0 in bricksdict and bricksdict[k0]["draw"]:
             k1 = k0 if bricksdict[k0]["parent"] == "self" else bricksdict[k0]["parent"]
             if not bricksdict[k1]["top_exposed"]:
@@ -233,7 +234,7 @@ class OBJECT_OT_delete_override(Operator):
                 # add key to list for drawing
                 keys_to_update.append(k1)
         # bottom of bricks above are now exposed
-        k0 = list_to_str((x, y, z + 1))
+        k0 = loc_to_key((x, y, z + 1))
         if k0 in bricksdict and bricksdict[k0]["draw"]:
             k1 = k0 if bricksdict[k0]["parent"] == "self" else bricksdict[k0]["parent"]
             if not bricksdict[k1]["bot_exposed"]:
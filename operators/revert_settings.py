@@ -83,6 +83,9 @@ class BRICKER_OT_revert_settings(Operator):
             cm.flame_color[1] = settings[21]
             cm.flame_color[2] = settings[22]
             cm.flame_intensity = settings[23]
+        # voxelizer is only stored if not the default (see 'get_matrix_settings')
+        num_settings = 24 if cm.last_is_smoke else 16
+        cm.voxelizer = settings[num_settings] if len(settings) > num_settings else "LATTICE"
         cm.matrix_is_dirty = False
 
     ################################################
@@ -75,6 +75,8 @@ class VIEW3D_PT_bricker_advanced(Panel):
         row = col.row(align=True)
         row.prop(cm, "insideness_ray_cast_dir", text="")
         row = col.row(align=True)
+        row.prop(cm, "voxelizer", text="")
+        row = col.row(align=True)
         row.prop(cm, "use_normals")
         row = col.row(align=True)
         row.prop(cm, "verify_exposure")
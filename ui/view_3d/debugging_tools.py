@@ -25,6 +25,7 @@ from bpy.props import *
 
 # Module imports
 from ...functions import *
+from ...lib.caches import get_bricker_cache_stats
 
 
 class VIEW3D_PT_bricker_debugging_tools(Panel):
@@ -51,3 +52,15 @@ class VIEW3D_PT_bricker_debugging_tools(Panel):
         source_name = cm.source_obj.name if cm.source_obj else ""
         layout.operator("bricker.generate_brick", icon="MOD_BUILD")
         layout.operator("bricker.debug_toggle_view_source", icon="RESTRICT_VIEW_OFF" if source_name in scn.objects else "RESTRICT_VIEW_ON")
+
+        layout.separator()
+        col = layout.column(align=True)
+        col.label(text="Cache Stats:")
+        for stats in get_bricker_cache_stats():
+            box = col.box()
+            box.label(text="{name}: {entries} entries, {mb:.1f} MB".format(mb=stats["bytes"] / 2**20, **stats))
+            lookups = stats["hits"] + stats["misses"]
+            hit_rate = 100 * stats["hits"] / lookups if lookups > 0 else 0
+            box.label(text="Hits: {hits}  Misses: {misses}  Evicted: {evictions}".format(**stats))
+            box.label(text="Hit Rate: {hit_rate:.0f}%  Saved: {time_saved:.2f}s".format(hit_rate=hit_rate, **stats))
+        col.operator("bricker.reset_cache_stats", icon="FILE_REFRESH")
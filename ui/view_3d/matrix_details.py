@@ -81,13 +81,13 @@ class VIEW3D_PT_bricker_matrix_details(Panel):
             layout.label(text="Matrix not available")
             return
         try:
-            dkey = list_to_str(tuple(cm.active_key))
+            dkey = loc_to_key(tuple(cm.active_key))
             brick_d = bricksdict[dkey]
         except Exception as e:
             layout.label(text="No brick details available")
             if len(bricksdict) == 0:
                 print("[Bricker] Skipped drawing Brick Details")
-            elif str(e)[1:-1] == dkey:
+            elif str(e) == str(dkey):
                 pass
                 # print("[Bricker] Key '" + str(dkey) + "' not found")
             elif dkey is None:
@@ -100,7 +100,6 @@ class VIEW3D_PT_bricker_matrix_details(Panel):
         split = layout_split(col1, factor=0.35)
         # hard code keys so that they are in the order I want
         keys = [
-            "name",
             "val",
             "draw",
             "co",
@@ -132,7 +131,9 @@ class VIEW3D_PT_bricker_matrix_details(Panel):
         col = split.column(align=True)
         col.scale_y = 0.65
         row = col.row(align=True)
-        row.label(text=dkey)
+        row.label(text=key_to_str(dkey))
         for key in keys:
             row = col.row(align=True)
-            row.label(text=str(brick_d[key]))
+            value = brick_d[key]
+            # show keys of other bricks in their string form
+            row.label(text=key_to_str(value) if key in ("parent", "created_from") and value not in (None, "self") else str(value))